@@ -1,6 +1,6 @@
+import asyncio
 import traceback
 
-import aiofiles
 import aiofiles.os
 from aiohttp import web, web_exceptions
 
@@ -11,12 +11,12 @@ from v03_pipeline.api.model import (
     RebuildGtStatsRequest,
     RefreshClickhouseReferenceDataRequest,
 )
+from v03_pipeline.api.queue_backends import get_queue_backend
 from v03_pipeline.lib.core.environment import Env
 from v03_pipeline.lib.logger import get_logger
-from v03_pipeline.lib.misc.runs import is_queue_full, new_run_id
+from v03_pipeline.lib.misc.runs import new_run_id
 from v03_pipeline.lib.paths import (
     loading_pipeline_queue_dir,
-    loading_pipeline_queue_path,
 )
 
 logger = get_logger(__name__)
@@ -43,7 +43,8 @@ async def _enqueue_request(
     if not request.body_exists:
         raise web.HTTPUnprocessableEntity
 
-    if is_queue_full():
+    queue_backend = get_queue_backend()
+    if await asyncio.to_thread(queue_backend.is_full):
         return web.json_response(
             f'Pipeline queue is full. Please try again later. (limit={Env.LOADING_QUEUE_LIMIT})',
             status=web_exceptions.HTTPConflict.status_code,
@@ -54,9 +55,17 @@ async def _enqueue_request(
     except ValueError as e:
         raise web.HTTPBadRequest from e
 
-    queue_path = loading_pipeline_queue_path(new_run_id())
-    async with aiofiles.open(queue_path, 'w') as f:
-        await f.write(model_instance.model_dump_json())
+    run_id = new_run_id()
+    queued_run_id = await asyncio.to_thread(
+        queue_backend.enqueue,
+        run_id,
+        model_instance,
+    )
+    if queued_run_id != run_id:
+        return web.json_response(
+            {'Already queued': model_instance.model_dump(), 'run_id': queued_run_id},
+            status=web_exceptions.HTTPAccepted.status_code,
+        )
 
     return web.json_response(
         {'Successfully queued': model_instance.model_dump()},
@@ -98,6 +107,12 @@ async def status(_: web.Request) -> web.Response:
     return web.json_response({'success': True})
 
 
+async def queue_status(_: web.Request) -> web.Response:
+    return web.json_response(
+        await asyncio.to_thread(get_queue_backend().status),
+    )
+
+
 async def init_web_app():
     await aiofiles.os.makedirs(
         loading_pipeline_queue_dir(),
@@ -107,6 +122,7 @@ async def init_web_app():
     app.add_routes(
         [
             web.get('/status', status),
+            web.get('/queue_status', queue_status),
             web.post('/loading_pipeline_enqueue', loading_pipeline_enqueue),
             web.post('/delete_families_enqueue', delete_families_enqueue),
             web.post('/rebuild_gt_stats_enqueue', rebuild_gt_stats_enqueue),
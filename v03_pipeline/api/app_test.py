@@ -20,6 +20,27 @@ class AppTest(AioHTTPTestCase, MockedDatarootTestCase):
             resp_json = await resp.json()
         self.assertDictEqual(resp_json, {'success': True})
 
+    async def test_queue_status(self):
+        body = {'project_guid': 'project_a', 'family_guids': ['family_a1']}
+        for _ in range(2):
+            async with self.client.request(
+                'POST',
+                '/delete_families_enqueue',
+                json=body,
+            ) as resp:
+                self.assertEqual(
+                    resp.status,
+                    web_exceptions.HTTPAccepted.status_code,
+                )
+                resp_json = await resp.json()
+        self.assertIn('Already queued', resp_json)
+        async with self.client.request('GET', '/queue_status') as resp:
+            self.assertEqual(resp.status, 200)
+            resp_json = await resp.json()
+        self.assertEqual(len(resp_json['pending']), 1)
+        self.assertEqual(resp_json['running'], [])
+        self.assertEqual(resp_json['dead_lettered'], [])
+
     async def test_missing_route(self):
         with self.assertLogs(level='ERROR') as _:
             async with self.client.request('GET', '/loading_pip') as resp:
@@ -11,7 +11,10 @@ from pydantic import (
 )
 
 from v03_pipeline.lib.core import DatasetType, ReferenceGenome, SampleType
-from v03_pipeline.lib.misc.clickhouse import ClickhouseReferenceDataset
+from v03_pipeline.lib.misc.clickhouse import (
+    ClickHouseDictionary,
+    ClickhouseReferenceDataset,
+)
 from v03_pipeline.lib.misc.validation import ALL_VALIDATIONS, SKIPPABLE_VALIDATIONS
 
 MAX_LOADING_PIPELINE_ATTEMPTS = 3
@@ -26,6 +29,19 @@ class PipelineRunnerRequest(BaseModel):
         super().__init_subclass__(**kwargs)
         cls.model_fields['request_type'].default = cls.__name__
 
+    @property
+    def resources(self) -> set[tuple[ReferenceGenome, DatasetType]]:
+        """
+        The (reference_genome, dataset_type) pairs whose tables the request
+        reads or writes.  Requests sharing a resource never run concurrently,
+        so requests claim every pair unless they narrow it.
+        """
+        return {
+            (reference_genome, dataset_type)
+            for dataset_type in DatasetType
+            for reference_genome in dataset_type.reference_genomes
+        }
+
 
 class LoadingPipelineRequest(PipelineRunnerRequest):
     attempt_id: conint(ge=0, le=MAX_LOADING_PIPELINE_ATTEMPTS - 1) = 0
@@ -42,6 +58,10 @@ class LoadingPipelineRequest(PipelineRunnerRequest):
     skip_expect_tdr_metrics: bool = False
     validations_to_skip: list[Literal[*STRINGIFIED_SKIPPABLE_VALIDATIONS]] = []
 
+    @property
+    def resources(self) -> set[tuple[ReferenceGenome, DatasetType]]:
+        return {(self.reference_genome, self.dataset_type)}
+
     def incr_attempt(self):
         if self.attempt_id == (MAX_LOADING_PIPELINE_ATTEMPTS - 1):
             return False
@@ -99,6 +119,29 @@ class RebuildGtStatsRequest(PipelineRunnerRequest):
         frozen=True,
     )
 
+    @property
+    def resources(self) -> set[tuple[ReferenceGenome, DatasetType]]:
+        return {
+            (reference_genome, dataset_type)
+            for dataset_type in DatasetType
+            for reference_genome in dataset_type.reference_genomes
+            if ClickHouseDictionary.GT_STATS_DICT
+            in ClickHouseDictionary.for_dataset_type(dataset_type)
+        }
+
 
 class RefreshClickhouseReferenceDataRequest(PipelineRunnerRequest):
     reference_dataset: ClickhouseReferenceDataset
+
+    @property
+    def resources(self) -> set[tuple[ReferenceGenome, DatasetType]]:
+        return {
+            (reference_genome, dataset_type)
+            for dataset_type in DatasetType
+            for reference_genome in dataset_type.reference_genomes
+            if self.reference_dataset
+            in ClickhouseReferenceDataset.for_reference_genome_dataset_type(
+                reference_genome,
+                dataset_type,
+            )
+        }
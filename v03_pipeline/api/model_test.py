@@ -1,7 +1,12 @@
 import unittest
 from pathlib import Path
 
-from v03_pipeline.api.model import DeleteFamiliesRequest, LoadingPipelineRequest
+from v03_pipeline.api.model import (
+    DeleteFamiliesRequest,
+    LoadingPipelineRequest,
+    RebuildGtStatsRequest,
+    RefreshClickhouseReferenceDataRequest,
+)
 from v03_pipeline.lib.core import DatasetType, ReferenceGenome, SampleType
 
 CALLSET_PATH = str(Path('v03_pipeline/var/test/callsets/1kg_30variants.vcf').resolve())
@@ -21,6 +26,10 @@ class ModelTest(unittest.TestCase):
         self.assertEqual(lpr.project_guids, ['project_a'])
         self.assertEqual(lpr.request_type, 'LoadingPipelineRequest')
         self.assertEqual(lpr.attempt_id, 0)
+        self.assertEqual(
+            lpr.resources,
+            {(ReferenceGenome.GRCh38, DatasetType.SNV_INDEL)},
+        )
 
         # Test wildcard VCF
         raw_request['callset_path'] = CALLSET_PATH.replace(
@@ -83,3 +92,23 @@ class ModelTest(unittest.TestCase):
         dfr = DeleteFamiliesRequest.model_validate(raw_request)
         self.assertEqual(dfr.project_guid, 'project_a')
         self.assertEqual(dfr.request_type, 'DeleteFamiliesRequest')
+        self.assertEqual(len(dfr.resources), 5)
+
+    def test_request_resources(self) -> None:
+        rgsr = RebuildGtStatsRequest.model_validate({'project_guids': ['project_a']})
+        self.assertEqual(
+            rgsr.resources,
+            {
+                (ReferenceGenome.GRCh37, DatasetType.SNV_INDEL),
+                (ReferenceGenome.GRCh38, DatasetType.SNV_INDEL),
+                (ReferenceGenome.GRCh38, DatasetType.MITO),
+                (ReferenceGenome.GRCh38, DatasetType.SV),
+            },
+        )
+        rcrdr = RefreshClickhouseReferenceDataRequest.model_validate(
+            {'reference_dataset': 'gnomad_mito'},
+        )
+        self.assertEqual(
+            rcrdr.resources,
+            {(ReferenceGenome.GRCh38, DatasetType.MITO)},
+        )
@@ -0,0 +1,358 @@
+import abc
+import contextlib
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import time
+from collections.abc import Callable, Iterator
+from dataclasses import dataclass
+from enum import StrEnum
+
+from v03_pipeline.api.model import PipelineRunnerRequest
+from v03_pipeline.lib.core.environment import Env
+from v03_pipeline.lib.logger import get_logger
+from v03_pipeline.lib.misc.locks import queue_lock
+from v03_pipeline.lib.misc.runs import get_queue_paths
+from v03_pipeline.lib.paths import (
+    loading_pipeline_deadletter_queue_dir,
+    loading_pipeline_deadletter_queue_path,
+    loading_pipeline_queue_db_path,
+    loading_pipeline_queue_dir,
+    loading_pipeline_queue_path,
+    loading_pipeline_running_dir,
+)
+
+logger = get_logger(__name__)
+
+QUEUE_FILE_REGEX = r'request_(\d{8}-\d{6}-\d{6})\.json'
+SQLITE_TIMEOUT_S = 30
+
+
+class QueueStatus(StrEnum):
+    PENDING = 'pending'
+    RUNNING = 'running'
+    DEAD_LETTERED = 'dead_lettered'
+
+
+@dataclass
+class QueueEntry:
+    run_id: str
+    request_json: str
+
+    @property
+    def raw_request(self) -> dict:
+        return json.loads(self.request_json)
+
+    @property
+    def priority(self) -> int:
+        return request_priority(self.raw_request['request_type'])
+
+    def model_dump(self) -> dict:
+        return {'run_id': self.run_id, 'request': self.raw_request}
+
+
+def request_priority(request_type: str) -> int:
+    return dict(Env.PIPELINE_QUEUE_REQUEST_PRIORITIES).get(request_type, 0)
+
+
+def request_hash(raw_request: dict) -> str:
+    # Retries of a request differ only in attempt_id, so it's excluded when
+    # determining whether two requests are identical.
+    raw_request = {k: v for k, v in raw_request.items() if k != 'attempt_id'}
+    return hashlib.sha256(
+        json.dumps(raw_request, sort_keys=True).encode(),
+    ).hexdigest()
+
+
+class QueueBackend(abc.ABC):
+    @abc.abstractmethod
+    def enqueue(self, run_id: str, prr: PipelineRunnerRequest) -> str:
+        """
+        Queues the request, returning its run_id.  If an identical request is
+        already pending, nothing is queued and the pending run_id is returned.
+        """
+
+    @abc.abstractmethod
+    def is_full(self) -> bool:
+        pass
+
+    @abc.abstractmethod
+    def entries(self, status: str) -> list[QueueEntry]:
+        """
+        Returns the entries with the given status.  Pending entries are returned
+        in processing order: highest priority first, then oldest first.
+        """
+
+    @abc.abstractmethod
+    def mark_running(self, run_id: str) -> None:
+        pass
+
+    @abc.abstractmethod
+    def requeue(self, run_id: str, prr: PipelineRunnerRequest) -> None:
+        pass
+
+    @abc.abstractmethod
+    def complete(self, run_id: str) -> None:
+        pass
+
+    @abc.abstractmethod
+    def dead_letter(self, run_id: str, prr: PipelineRunnerRequest) -> None:
+        pass
+
+    @abc.abstractmethod
+    def recover(self) -> None:
+        """
+        Returns any entries left running by a previous worker to pending.
+        """
+
+    def next_pending(self) -> QueueEntry | None:
+        pending = self.entries(QueueStatus.PENDING)
+        return pending[0] if pending else None
+
+    def status(self) -> dict[str, list[dict]]:
+        return {
+            status: [entry.model_dump() for entry in self.entries(status)]
+            for status in [
+                QueueStatus.PENDING,
+                QueueStatus.RUNNING,
+                QueueStatus.DEAD_LETTERED,
+            ]
+        }
+
+
+class FileQueueBackend(QueueBackend):
+    """
+    One json file per request in the queue directory, ordered by ctime.
+    """
+
+    def _running_marker_path(self, run_id: str) -> str:
+        return os.path.join(loading_pipeline_running_dir(), run_id)
+
+    def _remove_running_marker(self, run_id: str) -> None:
+        with contextlib.suppress(FileNotFoundError):
+            os.remove(self._running_marker_path(run_id))
+
+    def _read_entries(
+        self,
+        paths: list[str],
+        include_run_id: Callable[[str], bool] = lambda _: True,
+    ) -> list[QueueEntry]:
+        entries = []
+        for path in paths:
+            match = re.search(QUEUE_FILE_REGEX, os.path.basename(path))
+            if not match:
+                logger.warning(f'Skipping unrecognized queue file {path}')
+                continue
+            # NB: the status of a queued request is known from its run_id,
+            # so files with another status are skipped without reading them.
+            if not include_run_id(match.group(1)):
+                continue
+            try:
+                with open(path) as f:
+                    entries.append(QueueEntry(match.group(1), f.read()))
+            except FileNotFoundError:
+                # Completed by a worker while we were listing.
+                continue
+        return entries
+
+    def enqueue(self, run_id: str, prr: PipelineRunnerRequest) -> str:
+        request_json = prr.model_dump_json()
+        h = request_hash(json.loads(request_json))
+        with queue_lock():
+            for entry in self.entries(QueueStatus.PENDING):
+                if request_hash(entry.raw_request) == h:
+                    return entry.run_id
+            with open(loading_pipeline_queue_path(run_id), 'w') as f:
+                f.write(request_json)
+        return run_id
+
+    def is_full(self) -> bool:
+        return len(os.listdir(loading_pipeline_queue_dir())) >= Env.LOADING_QUEUE_LIMIT
+
+    def entries(self, status: str) -> list[QueueEntry]:
+        if status == QueueStatus.DEAD_LETTERED:
+            if not os.path.isdir(loading_pipeline_deadletter_queue_dir()):
+                return []
+            return self._read_entries(
+                [
+                    os.path.join(loading_pipeline_deadletter_queue_dir(), f)
+                    for f in sorted(os.listdir(loading_pipeline_deadletter_queue_dir()))
+                ],
+            )
+        running_run_ids = (
+            set(os.listdir(loading_pipeline_running_dir()))
+            if os.path.isdir(loading_pipeline_running_dir())
+            else set()
+        )
+        entries = self._read_entries(
+            get_queue_paths(),
+            lambda run_id: (
+                (run_id in running_run_ids) == (status == QueueStatus.RUNNING)
+            ),
+        )
+        # NB: sorted is stable, so ctime order is kept within a priority.
+        return sorted(entries, key=lambda entry: -entry.priority)
+
+    def mark_running(self, run_id: str) -> None:
+        os.makedirs(loading_pipeline_running_dir(), exist_ok=True)
+        with open(self._running_marker_path(run_id), 'w'):
+            pass
+
+    def requeue(self, run_id: str, prr: PipelineRunnerRequest) -> None:
+        with open(loading_pipeline_queue_path(run_id), 'w') as f:
+            f.write(prr.model_dump_json())
+        self._remove_running_marker(run_id)
+
+    def complete(self, run_id: str) -> None:
+        os.remove(loading_pipeline_queue_path(run_id))
+        self._remove_running_marker(run_id)
+
+    def dead_letter(self, run_id: str, prr: PipelineRunnerRequest) -> None:
+        os.makedirs(loading_pipeline_deadletter_queue_dir(), exist_ok=True)
+        with open(loading_pipeline_deadletter_queue_path(run_id), 'w') as f:
+            f.write(prr.model_dump_json())
+        self.complete(run_id)
+
+    def recover(self) -> None:
+        if not os.path.isdir(loading_pipeline_running_dir()):
+            return
+        for run_id in os.listdir(loading_pipeline_running_dir()):
+            self._remove_running_marker(run_id)
+
+
+class SqliteQueueBackend(QueueBackend):
+    """
+    A single SQLite table indexed on (status, priority, enqueued_at), so that
+    dequeuing is an index lookup rather than a directory scan.
+    """
+
+    def __init__(self, db_path: str | None = None):
+        self.db_path = db_path or loading_pipeline_queue_db_path()
+        os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
+        with self._connection() as conn:
+            conn.executescript(
+                """
+                CREATE TABLE IF NOT EXISTS requests (
+                    run_id TEXT PRIMARY KEY,
+                    request_json TEXT NOT NULL,
+                    request_hash TEXT NOT NULL,
+                    priority INTEGER NOT NULL,
+                    status TEXT NOT NULL,
+                    enqueued_at REAL NOT NULL
+                );
+                CREATE INDEX IF NOT EXISTS requests_status_priority_enqueued_at
+                ON requests (status, priority DESC, enqueued_at);
+                CREATE INDEX IF NOT EXISTS requests_request_hash
+                ON requests (request_hash, status);
+                """,
+            )
+
+    @contextlib.contextmanager
+    def _connection(self) -> Iterator[sqlite3.Connection]:
+        conn = sqlite3.connect(self.db_path, timeout=SQLITE_TIMEOUT_S)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def _update(self, run_id: str, status: str, prr=None) -> None:
+        with self._connection() as conn:
+            if prr is None:
+                conn.execute(
+                    'UPDATE requests SET status = ? WHERE run_id = ?',
+                    (status, run_id),
+                )
+                return
+            conn.execute(
+                'UPDATE requests SET status = ?, request_json = ? WHERE run_id = ?',
+                (status, prr.model_dump_json(), run_id),
+            )
+
+    def enqueue(self, run_id: str, prr: PipelineRunnerRequest) -> str:
+        request_json = prr.model_dump_json()
+        h = request_hash(json.loads(request_json))
+        with self._connection() as conn:
+            # BEGIN IMMEDIATE so the dedup check and insert are atomic
+            # across API processes.
+            conn.execute('BEGIN IMMEDIATE')
+            row = conn.execute(
+                'SELECT run_id FROM requests WHERE request_hash = ? AND status = ?',
+                (h, QueueStatus.PENDING),
+            ).fetchone()
+            if row:
+                return row[0]
+            conn.execute(
+                'INSERT INTO requests VALUES (?, ?, ?, ?, ?, ?)',
+                (
+                    run_id,
+                    request_json,
+                    h,
+                    request_priority(prr.request_type),
+                    QueueStatus.PENDING,
+                    time.time(),
+                ),
+            )
+        return run_id
+
+    def is_full(self) -> bool:
+        with self._connection() as conn:
+            count = conn.execute(
+                'SELECT COUNT(*) FROM requests WHERE status IN (?, ?)',
+                (QueueStatus.PENDING, QueueStatus.RUNNING),
+            ).fetchone()[0]
+        return count >= Env.LOADING_QUEUE_LIMIT
+
+    def entries(self, status: str) -> list[QueueEntry]:
+        with self._connection() as conn:
+            rows = conn.execute(
+                """
+                SELECT run_id, request_json FROM requests
+                WHERE status = ?
+                ORDER BY priority DESC, enqueued_at
+                """,
+                (status,),
+            ).fetchall()
+        return [QueueEntry(*row) for row in rows]
+
+    def next_pending(self) -> QueueEntry | None:
+        with self._connection() as conn:
+            row = conn.execute(
+                """
+                SELECT run_id, request_json FROM requests
+                WHERE status = ?
+                ORDER BY priority DESC, enqueued_at
+                LIMIT 1
+                """,
+                (QueueStatus.PENDING,),
+            ).fetchone()
+        return QueueEntry(*row) if row else None
+
+    def mark_running(self, run_id: str) -> None:
+        self._update(run_id, QueueStatus.RUNNING)
+
+    def requeue(self, run_id: str, prr: PipelineRunnerRequest) -> None:
+        self._update(run_id, QueueStatus.PENDING, prr)
+
+    def complete(self, run_id: str) -> None:
+        with self._connection() as conn:
+            conn.execute('DELETE FROM requests WHERE run_id = ?', (run_id,))
+
+    def dead_letter(self, run_id: str, prr: PipelineRunnerRequest) -> None:
+        self._update(run_id, QueueStatus.DEAD_LETTERED, prr)
+
+    def recover(self) -> None:
+        with self._connection() as conn:
+            conn.execute(
+                'UPDATE requests SET status = ? WHERE status = ?',
+                (QueueStatus.PENDING, QueueStatus.RUNNING),
+            )
+
+
+def get_queue_backend() -> QueueBackend:
+    return {
+        'file': FileQueueBackend,
+        'sqlite': SqliteQueueBackend,
+    }[Env.PIPELINE_QUEUE_BACKEND]()
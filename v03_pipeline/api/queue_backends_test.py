@@ -0,0 +1,102 @@
+import os
+from unittest.mock import patch
+
+from v03_pipeline.api.model import DeleteFamiliesRequest, RebuildGtStatsRequest
+from v03_pipeline.api.queue_backends import (
+    FileQueueBackend,
+    QueueStatus,
+    SqliteQueueBackend,
+)
+from v03_pipeline.lib.core.environment import Env
+from v03_pipeline.lib.paths import loading_pipeline_queue_dir
+from v03_pipeline.lib.test.mocked_dataroot_testcase import MockedDatarootTestCase
+
+
+class QueueBackendsTest(MockedDatarootTestCase):
+    def setUp(self) -> None:
+        super().setUp()
+        os.makedirs(loading_pipeline_queue_dir(), exist_ok=True)
+
+    def test_queue_backends(self) -> None:
+        for queue_backend in [FileQueueBackend(), SqliteQueueBackend()]:
+            with self.subTest(queue_backend=type(queue_backend).__name__):
+                self._test_queue_backend(queue_backend)
+
+    def _test_queue_backend(self, queue_backend) -> None:
+        dfr = DeleteFamiliesRequest(project_guid='project_a', family_guids=['f1'])
+        rgsr = RebuildGtStatsRequest(project_guids=['project_a'])
+        self.assertEqual(
+            queue_backend.enqueue('20250101-000000-000001', dfr),
+            '20250101-000000-000001',
+        )
+        self.assertEqual(
+            queue_backend.enqueue('20250101-000000-000002', rgsr),
+            '20250101-000000-000002',
+        )
+
+        # Identical pending requests are deduplicated.
+        self.assertEqual(
+            queue_backend.enqueue(
+                '20250101-000000-000003',
+                DeleteFamiliesRequest(project_guid='project_a', family_guids=['f1']),
+            ),
+            '20250101-000000-000001',
+        )
+        self.assertEqual(
+            [e.run_id for e in queue_backend.entries(QueueStatus.PENDING)],
+            ['20250101-000000-000001', '20250101-000000-000002'],
+        )
+        self.assertEqual(queue_backend.next_pending().run_id, '20250101-000000-000001')
+
+        queue_backend.mark_running('20250101-000000-000001')
+        self.assertEqual(queue_backend.next_pending().run_id, '20250101-000000-000002')
+        self.assertEqual(
+            queue_backend.status(),
+            {
+                'pending': [
+                    {'run_id': '20250101-000000-000002', 'request': rgsr.model_dump()},
+                ],
+                'running': [
+                    {'run_id': '20250101-000000-000001', 'request': dfr.model_dump()},
+                ],
+                'dead_lettered': [],
+            },
+        )
+        queue_backend.recover()
+        self.assertEqual(len(queue_backend.entries(QueueStatus.PENDING)), 2)
+
+        queue_backend.mark_running('20250101-000000-000001')
+        queue_backend.complete('20250101-000000-000001')
+        queue_backend.mark_running('20250101-000000-000002')
+        queue_backend.dead_letter('20250101-000000-000002', rgsr)
+        self.assertEqual(queue_backend.entries(QueueStatus.PENDING), [])
+        self.assertEqual(queue_backend.entries(QueueStatus.RUNNING), [])
+        self.assertEqual(
+            [e.run_id for e in queue_backend.entries(QueueStatus.DEAD_LETTERED)],
+            ['20250101-000000-000002'],
+        )
+
+    def test_queue_priorities(self) -> None:
+        with patch.object(
+            Env,
+            'PIPELINE_QUEUE_REQUEST_PRIORITIES',
+            (('DeleteFamiliesRequest', 1),),
+        ):
+            for queue_backend in [FileQueueBackend(), SqliteQueueBackend()]:
+                queue_backend.enqueue(
+                    '20250101-000000-000001',
+                    RebuildGtStatsRequest(project_guids=['project_a']),
+                )
+                queue_backend.enqueue(
+                    '20250101-000000-000002',
+                    DeleteFamiliesRequest(
+                        project_guid='project_a',
+                        family_guids=['f1'],
+                    ),
+                )
+                self.assertEqual(
+                    queue_backend.next_pending().run_id,
+                    '20250101-000000-000002',
+                )
+                queue_backend.complete('20250101-000000-000001')
+                queue_backend.complete('20250101-000000-000002')
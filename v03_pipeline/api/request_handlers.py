@@ -19,6 +19,7 @@ from v03_pipeline.lib.misc.clickhouse import (
     rebuild_gt_stats,
     refresh_clickhouse_reference_data,
 )
+from v03_pipeline.lib.tasks.base.completion_cache import completion_cache
 from v03_pipeline.lib.tasks.write_clickhouse_load_success_file import (
     WriteClickhouseLoadSuccessFileTask,
 )
@@ -32,16 +33,17 @@ def run_loading_pipeline(
     local_scheduler: bool,
     *_: Any,
 ):
-    luigi_task_result = luigi.build(
-        [
-            WriteClickhouseLoadSuccessFileTask(
-                run_id=run_id,
-                **lpr.model_dump(exclude='request_type'),
-            ),
-        ],
-        detailed_summary=True,
-        local_scheduler=local_scheduler,
-    )
+    with completion_cache():
+        luigi_task_result = luigi.build(
+            [
+                WriteClickhouseLoadSuccessFileTask(
+                    run_id=run_id,
+                    **lpr.model_dump(exclude='request_type'),
+                ),
+            ],
+            detailed_summary=True,
+            local_scheduler=local_scheduler,
+        )
     if luigi_task_result.status in {
         luigi.execution_summary.LuigiStatusCode.SUCCESS,
         luigi.execution_summary.LuigiStatusCode.SUCCESS_WITH_RETRY,
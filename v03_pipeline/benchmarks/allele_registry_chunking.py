@@ -0,0 +1,73 @@
+"""
+Times the splitting of a table into Allele Registry request payloads across
+a range of table sizes.  The time per variant should stay flat as the table
+grows; the process exits non-zero if it grows by more than --tolerance
+between the smallest and largest sizes, which catches chunking that is
+quadratic in the number of variants.
+
+    python -m v03_pipeline.benchmarks.allele_registry_chunking --n-variants 100000 1000000 10000000
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import hail as hl
+
+from v03_pipeline.lib.core import ReferenceGenome
+from v03_pipeline.lib.misc.allele_registry import write_vcf_payloads
+
+
+def synthetic_variants_ht(n_variants: int, n_partitions: int) -> hl.Table:
+    ht = hl.utils.range_table(n_variants, n_partitions=n_partitions)
+    ht = ht.select(
+        locus=hl.locus('chr1', ht.idx + 1, reference_genome='GRCh38'),
+        alleles=['A', 'C'],
+    )
+    return ht.key_by('locus', 'alleles')
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        '--n-variants',
+        type=int,
+        nargs='+',
+        default=[100000, 1000000, 10000000],
+    )
+    parser.add_argument('--n-partitions', type=int, default=100)
+    parser.add_argument('--chunk-size', type=int, default=100000)
+    parser.add_argument('--tolerance', type=float, default=0.5)
+    parser.add_argument('--tmp-dir', default=tempfile.gettempdir())
+    args = parser.parse_args()
+    hl.init(idempotent=True, tmp_dir=args.tmp_dir)
+
+    us_per_variant = []
+    print('n_variants\tpayloads\ts\tus_per_variant')  # noqa: T201
+    for n_variants in sorted(args.n_variants):
+        ht = synthetic_variants_ht(n_variants, args.n_partitions).checkpoint(
+            os.path.join(args.tmp_dir, f'variants_{n_variants}.ht'),
+            overwrite=True,
+        )
+        start = time.perf_counter()
+        payload_paths = write_vcf_payloads(
+            ht,
+            ReferenceGenome.GRCh38,
+            tempfile.mkdtemp(dir=args.tmp_dir),
+            args.chunk_size,
+        )
+        elapsed_s = time.perf_counter() - start
+        us_per_variant.append(elapsed_s / n_variants * 1e6)
+        print(  # noqa: T201
+            f'{n_variants}\t{len(payload_paths)}\t{elapsed_s:.2f}'
+            f'\t{us_per_variant[-1]:.3f}',
+        )
+    if us_per_variant[-1] > us_per_variant[0] * (1 + args.tolerance):
+        print('REGRESSION time per variant grows with the number of variants')  # noqa: T201
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
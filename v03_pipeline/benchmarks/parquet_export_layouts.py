@@ -0,0 +1,107 @@
+"""
+Compares ClickHouse ingestion of entries parquet written with Spark's
+defaults against the tuned layout written by write_tuned_parquet, across a
+range of output file counts.  `clickhouse local` stands in for the
+ClickHouse server.
+
+    python -m v03_pipeline.benchmarks.parquet_export_layouts --n-rows 10000000 --n-files 1 8 64
+"""
+
+import argparse
+import glob
+import os
+import subprocess
+import tempfile
+import time
+
+import hail as hl
+
+from v03_pipeline.lib.misc.io import write_tuned_parquet
+
+N_PROJECTS = 20
+N_FAMILIES = 2000
+CALLS_PER_ROW = 3
+
+
+def synthetic_entries_df(n_rows: int, n_partitions: int):
+    ht = hl.utils.range_table(n_rows, n_partitions=n_partitions)
+    # Keys are shuffled, as they are across the projects of a real export.
+    ht = ht.annotate(rand=hl.rand_int64())
+    ht = ht.select(
+        key_=hl.int32(ht.rand % n_rows),
+        project_guid=hl.format('R%04d_project', hl.int32(ht.idx % N_PROJECTS)),
+        family_guid=hl.format('F%06d_family', hl.int32(ht.idx % N_FAMILIES)),
+        sample_type='WGS',
+        xpos=1000000000 + ht.idx,
+        filters=hl.empty_array(hl.tstr),
+        calls=hl.range(CALLS_PER_ROW).map(
+            lambda i: hl.struct(
+                sampleId=hl.format('sample_%d', i),
+                gt=hl.int32(hl.rand_cat([0.5, 0.4, 0.1])),
+                gq=hl.int32(hl.rand_unif(0, 99)),
+                ab=hl.rand_unif(0, 1),
+                dp=hl.int32(hl.rand_unif(0, 60)),
+            ),
+        ),
+        sign=1,
+    )
+    df = ht.to_spark(flatten=False)
+    return df.withColumnRenamed('key_', 'key')
+
+
+def ingest_s(clickhouse_binary: str, path: str) -> float:
+    start = time.perf_counter()
+    subprocess.run(  # noqa: S603
+        [
+            clickhouse_binary,
+            'local',
+            '--query',
+            f"""
+            CREATE TABLE entries ENGINE = MergeTree ORDER BY key
+            AS SELECT * FROM file('{path}/*.parquet', Parquet)
+            """,  # noqa: S608
+        ],
+        check=True,
+    )
+    return time.perf_counter() - start
+
+
+def layout_stats(path: str) -> tuple[int, int]:
+    paths = glob.glob(os.path.join(path, '*.parquet'))
+    return len(paths), sum(os.path.getsize(p) for p in paths)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--n-rows', type=int, default=10000000)
+    parser.add_argument('--n-partitions', type=int, default=200)
+    parser.add_argument('--n-files', type=int, nargs='+', default=[1, 8, 64])
+    parser.add_argument('--clickhouse-binary', default='clickhouse')
+    parser.add_argument('--tmp-dir', default=tempfile.gettempdir())
+    args = parser.parse_args()
+    hl.init(idempotent=True, tmp_dir=args.tmp_dir)
+
+    df = synthetic_entries_df(args.n_rows, args.n_partitions).cache()
+    layouts = {'spark_defaults': os.path.join(args.tmp_dir, 'spark_defaults')}
+    df.write.parquet(layouts['spark_defaults'], mode='overwrite')
+    for n_files in args.n_files:
+        path = os.path.join(args.tmp_dir, f'tuned_{n_files}')
+        write_tuned_parquet(
+            df,
+            path,
+            ('project_guid', 'family_guid', 'sample_type'),
+            n_files=n_files,
+        )
+        layouts[f'tuned_{n_files}'] = path
+
+    print('layout\tfiles\tbytes\tingest_s')  # noqa: T201
+    for layout, path in layouts.items():
+        n_files, n_bytes = layout_stats(path)
+        print(  # noqa: T201
+            f'{layout}\t{n_files}\t{n_bytes}\t'
+            f'{ingest_s(args.clickhouse_binary, path):.2f}',
+        )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,117 @@
+"""
+Compares annotating new variants with one join and checkpoint per reference
+dataset, as WriteNewVariantsTableTask previously did, against the single
+copartitioned multi-way lookup in annotate_reference_datasets.
+
+    python -m v03_pipeline.benchmarks.reference_dataset_joins --n-variants 10000 1000000 10000000
+"""
+
+import argparse
+import os
+import tempfile
+import time
+
+import hail as hl
+
+from v03_pipeline.lib.misc.io import checkpoint, copartitioned_read_tables
+
+# Spacing of the synthetic variants along chr1, so that 10M variants fit.
+POSITION_STEP = 20
+
+
+def synthetic_variants_ht(n_variants: int, offset: int) -> hl.Table:
+    ht = hl.utils.range_table(n_variants)
+    ht = ht.key_by(
+        locus=hl.locus(
+            'chr1',
+            ht.idx * POSITION_STEP + offset + 1,
+            reference_genome='GRCh38',
+        ),
+        alleles=['A', 'C'],
+    )
+    return ht.drop('idx')
+
+
+def write_reference_dataset_hts(
+    tmp_dir: str,
+    n_reference_datasets: int,
+    n_rows: int,
+) -> list[str]:
+    paths = []
+    for i in range(n_reference_datasets):
+        ht = synthetic_variants_ht(n_rows, i)
+        ht = ht.annotate(score=hl.rand_unif(0, 1), source=f'reference_dataset_{i}')
+        path = os.path.join(tmp_dir, f'reference_dataset_{i}.ht')
+        ht.write(path, overwrite=True)
+        paths.append(path)
+    return paths
+
+
+def sequential_joins(ht: hl.Table, paths: list[str]) -> hl.Table:
+    for i, path in enumerate(paths):
+        reference_dataset_ht = hl.read_table(path)
+        reference_dataset_ht = reference_dataset_ht.select(
+            **{
+                f'reference_dataset_{i}': hl.Struct(
+                    **reference_dataset_ht.row_value,
+                ),
+            },
+        )
+        ht = ht.join(reference_dataset_ht, 'left')
+        ht, _ = checkpoint(ht)
+    return ht
+
+
+def multi_way_lookup(ht: hl.Table, paths: list[str]) -> hl.Table:
+    ht, reference_dataset_hts = copartitioned_read_tables(ht, paths)
+    return ht.annotate(
+        **{
+            f'reference_dataset_{i}': reference_dataset_ht[ht.key]
+            for i, reference_dataset_ht in enumerate(reference_dataset_hts)
+        },
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        '--n-variants',
+        type=int,
+        nargs='+',
+        default=[10000, 1000000, 10000000],
+    )
+    parser.add_argument('--n-reference-datasets', type=int, default=10)
+    parser.add_argument(
+        '--reference-dataset-rows',
+        type=int,
+        default=10000000,
+        help='Rows per synthetic reference dataset.',
+    )
+    parser.add_argument('--tmp-dir', default=tempfile.gettempdir())
+    args = parser.parse_args()
+    hl.init(idempotent=True, tmp_dir=args.tmp_dir)
+
+    paths = write_reference_dataset_hts(
+        args.tmp_dir,
+        args.n_reference_datasets,
+        args.reference_dataset_rows,
+    )
+    print('n_variants\tsequential_s\tmulti_way_s')  # noqa: T201
+    for n_variants in args.n_variants:
+        # Drop some positions so that the variants are a sparse subset of
+        # the reference datasets, as new variants are.
+        ht = synthetic_variants_ht(n_variants, 0)
+        ht = ht.filter(ht.locus.position % 3 != 0)
+        timings = []
+        for fn in [sequential_joins, multi_way_lookup]:
+            start = time.perf_counter()
+            fn(ht, paths).write(
+                os.path.join(args.tmp_dir, f'{fn.__name__}_{n_variants}.ht'),
+                overwrite=True,
+            )
+            timings.append(time.perf_counter() - start)
+        print(f'{n_variants}\t{timings[0]:.2f}\t{timings[1]:.2f}')  # noqa: T201
+
+
+if __name__ == '__main__':
+    main()
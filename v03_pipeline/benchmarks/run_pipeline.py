@@ -0,0 +1,276 @@
+"""
+Runs the loading pipeline end to end on a synthetic callset with VEP
+mocked, reporting each task's wall time, throughput, peak memory and bytes
+written.  With --baseline, the report is compared against a previous run's
+and the process exits non-zero if any task regressed by more than
+--tolerance.
+
+The pipeline runs against the usual environment (PIPELINE_DATA_DIR,
+REFERENCE_DATASETS_DIR, CLICKHOUSE_SERVICE_HOSTNAME, ...), so point those at
+scratch directories and a local ClickHouse server, or pass --skip-clickhouse
+to stop after the parquet exports.
+
+    python -m v03_pipeline.benchmarks.run_pipeline --n-samples 1000 --n-variants 1000000 \
+        --report-path report.json --baseline baseline.json
+"""
+
+import argparse
+import collections
+import json
+import os
+import re
+import sys
+import tempfile
+from unittest.mock import patch
+
+import hail as hl
+import hailtop.fs as hfs
+import luigi
+import luigi.execution_summary
+import pyspark
+
+from v03_pipeline.benchmarks.synthetic_callset import write_synthetic_callset
+from v03_pipeline.lib.core import DatasetType, ReferenceGenome, SampleType
+from v03_pipeline.lib.misc.runs import new_run_id
+from v03_pipeline.lib.paths import project_pedigree_path, runs_path
+from v03_pipeline.lib.tasks.base.completion_cache import completion_cache
+from v03_pipeline.lib.tasks.run_pipeline import RunPipelineTask
+from v03_pipeline.lib.tasks.write_clickhouse_load_success_file import (
+    WriteClickhouseLoadSuccessFileTask,
+)
+
+# Compared against the baseline; all are lower-is-better.
+REGRESSION_METRICS = ['wall_time_s', 'peak_rss_bytes', 'bytes_written']
+VALIDATIONS_TO_SKIP = [
+    'validate_expected_contig_frequency',
+    'validate_sample_type',
+]
+
+# Peak resident set size of each task, keyed by task_id.
+_PEAK_RSS_BYTES: dict[str, int] = {}
+
+
+def _process_pids() -> list[int]:
+    sc = pyspark.SparkContext._active_spark_context  # noqa: SLF001
+    jvm = getattr(sc and sc._gateway, 'proc', None)  # noqa: SLF001
+    return [os.getpid(), *([jvm.pid] if jvm else [])]
+
+
+def reset_peak_rss() -> None:
+    # Writing 5 to clear_refs resets the VmHWM high water mark (Linux only).
+    for pid in _process_pids():
+        try:
+            with open(f'/proc/{pid}/clear_refs', 'w') as f:
+                f.write('5')
+        except OSError:
+            continue
+
+
+def peak_rss_bytes() -> int:
+    peak = 0
+    for pid in _process_pids():
+        try:
+            with open(f'/proc/{pid}/status') as f:
+                match = re.search(r'VmHWM:\s+(\d+) kB', f.read())
+        except OSError:
+            continue
+        if match:
+            peak += int(match.group(1)) * 1024
+    return peak
+
+
+@luigi.Task.event_handler(luigi.Event.START)
+def start_peak_rss(_):
+    reset_peak_rss()
+
+
+@luigi.Task.event_handler(luigi.Event.SUCCESS)
+def record_peak_rss(task):
+    _PEAK_RSS_BYTES[task.task_id] = peak_rss_bytes()
+
+
+def mock_vep(ht: hl.Table, **_) -> hl.Table:
+    from v03_pipeline.var.test.vep.mock_vep_data import MOCK_38_VEP_DATA
+
+    return ht.annotate(vep=MOCK_38_VEP_DATA)
+
+
+def stage_timings(
+    reference_genome: ReferenceGenome,
+    dataset_type: DatasetType,
+    run_id: str,
+) -> list[dict]:
+    stage_timings_dir = os.path.join(
+        runs_path(reference_genome, dataset_type),
+        run_id,
+        'stage_timings',
+    )
+    stages = []
+    for file_info in hfs.ls(stage_timings_dir):
+        with hfs.open(file_info.path) as f:
+            stages.append(json.load(f))
+    return stages
+
+
+def report(stages: list[dict], n_variants: int) -> dict[str, dict]:
+    """
+    Aggregates the stage timings by task, as tasks that run once per project
+    are reported together.
+    """
+    tasks = collections.defaultdict(
+        lambda: {
+            'wall_time_s': 0.0,
+            'hail_stages': 0,
+            'bytes_written': 0,
+            'rows_written': 0,
+            'peak_rss_bytes': 0,
+        },
+    )
+    for stage in stages:
+        task = tasks[stage['task']]
+        task['wall_time_s'] += stage['wall_time_s']
+        task['hail_stages'] += stage['hail_stages'] or 0
+        task['bytes_written'] += sum(op.get('bytes', 0) for op in stage['operations'])
+        task['rows_written'] += sum(op.get('rows', 0) for op in stage['operations'])
+        task['peak_rss_bytes'] = max(
+            task['peak_rss_bytes'],
+            _PEAK_RSS_BYTES.get(stage['task_id'], 0),
+        )
+    for task in tasks.values():
+        task['variants_per_s'] = (
+            n_variants / task['wall_time_s'] if task['wall_time_s'] else None
+        )
+    return dict(sorted(tasks.items()))
+
+
+def regressions(
+    tasks: dict[str, dict],
+    baseline_tasks: dict[str, dict],
+    tolerance: float,
+) -> list[str]:
+    return [
+        f'{task}.{metric}: {tasks[task][metric]} vs baseline {baseline[metric]}'
+        for task, baseline in baseline_tasks.items()
+        if task in tasks
+        for metric in REGRESSION_METRICS
+        if baseline.get(metric)
+        and tasks[task][metric] > baseline[metric] * (1 + tolerance)
+    ]
+
+
+def run(args: argparse.Namespace) -> str:
+    reference_genome = ReferenceGenome.GRCh38
+    dataset_type = DatasetType.SNV_INDEL
+    sample_type = SampleType.WGS
+    run_id = new_run_id()
+    callset_path = os.path.join(args.tmp_dir, f'benchmark_{run_id}.vcf')
+    pedigree_path = os.path.join(args.tmp_dir, f'benchmark_{run_id}_pedigree.tsv')
+    write_synthetic_callset(
+        callset_path,
+        pedigree_path,
+        args.n_samples,
+        args.n_variants,
+        args.multiallelic_fraction,
+        args.family_size,
+        args.project_guid,
+        args.seed,
+    )
+    hfs.copy(
+        pedigree_path,
+        project_pedigree_path(
+            reference_genome,
+            dataset_type,
+            sample_type,
+            args.project_guid,
+        ),
+    )
+    task_cls = (
+        RunPipelineTask if args.skip_clickhouse else WriteClickhouseLoadSuccessFileTask
+    )
+    with (
+        patch('v03_pipeline.lib.vep.hl.vep', side_effect=mock_vep),
+        patch('v03_pipeline.lib.vep.vep_config_hash', return_value='benchmark'),
+        completion_cache(),
+    ):
+        result = luigi.build(
+            [
+                task_cls(
+                    run_id=run_id,
+                    attempt_id=0,
+                    reference_genome=reference_genome,
+                    dataset_type=dataset_type,
+                    sample_type=sample_type,
+                    callset_path=callset_path,
+                    project_guids=[args.project_guid],
+                    skip_check_sex_and_relatedness=True,
+                    skip_expect_tdr_metrics=True,
+                    validations_to_skip=VALIDATIONS_TO_SKIP,
+                ),
+            ],
+            detailed_summary=True,
+            local_scheduler=True,
+        )
+    if result.status not in {
+        luigi.execution_summary.LuigiStatusCode.SUCCESS,
+        luigi.execution_summary.LuigiStatusCode.SUCCESS_WITH_RETRY,
+    }:
+        raise RuntimeError(result.status.value[1])
+    return run_id
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--n-samples', type=int, default=100)
+    parser.add_argument('--n-variants', type=int, default=100000)
+    parser.add_argument('--multiallelic-fraction', type=float, default=0.05)
+    parser.add_argument('--family-size', type=int, default=3)
+    parser.add_argument('--project-guid', default='R0001_benchmark')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--skip-clickhouse', action='store_true')
+    parser.add_argument('--report-path')
+    parser.add_argument('--baseline', help='A report written by a previous run.')
+    parser.add_argument(
+        '--tolerance',
+        type=float,
+        default=0.2,
+        help='Fractional increase over the baseline that counts as a regression.',
+    )
+    parser.add_argument('--tmp-dir', default=tempfile.gettempdir())
+    args = parser.parse_args()
+    hl.init(idempotent=True, tmp_dir=args.tmp_dir)
+
+    run_id = run(args)
+    tasks = report(
+        stage_timings(ReferenceGenome.GRCh38, DatasetType.SNV_INDEL, run_id),
+        args.n_variants,
+    )
+    params = {
+        k: getattr(args, k)
+        for k in ['n_samples', 'n_variants', 'multiallelic_fraction', 'family_size']
+    }
+    if args.report_path:
+        with open(args.report_path, 'w') as f:
+            json.dump({'run_id': run_id, 'params': params, 'tasks': tasks}, f, indent=2)
+
+    print('task\twall_time_s\tvariants_per_s\tpeak_rss_bytes\tbytes_written')  # noqa: T201
+    for task, metrics in tasks.items():
+        print(  # noqa: T201
+            f'{task}\t{metrics["wall_time_s"]:.1f}\t{metrics["variants_per_s"] or 0:.0f}'
+            f'\t{metrics["peak_rss_bytes"]}\t{metrics["bytes_written"]}',
+        )
+    if not args.baseline:
+        return
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    if baseline['params'] != params:
+        print(f'Baseline was run with different parameters: {baseline["params"]}')  # noqa: T201
+        sys.exit(1)
+    found = regressions(tasks, baseline['tasks'], args.tolerance)
+    for regression in found:
+        print(f'REGRESSION {regression}')  # noqa: T201
+    if found:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,218 @@
+"""
+Writes a synthetic SNV_INDEL callset and a matching pedigree, for
+benchmarking the loading pipeline at arbitrary scale.
+
+    python -m v03_pipeline.benchmarks.synthetic_callset --n-samples 1000 --n-variants 1000000 \
+        --multiallelic-fraction 0.05 --family-size 3 --vcf-path callset.vcf.gz --pedigree-path pedigree.tsv
+"""
+
+import argparse
+import gzip
+import random
+
+BASES = 'ACGT'
+CONTIGS = [f'chr{i}' for i in [*range(1, 23), 'X']]
+PEDIGREE_HEADER = [
+    'Project_GUID',
+    'Family_GUID',
+    'Family_ID',
+    'Individual_ID',
+    'Paternal_ID',
+    'Maternal_ID',
+    'Sex',
+]
+VCF_HEADER = [
+    '##fileformat=VCFv4.2',
+    '##FORMAT=<ID=GT,Number=1,Type=String,Description="Genotype">',
+    '##FORMAT=<ID=AD,Number=R,Type=Integer,Description="Allelic depths">',
+    '##FORMAT=<ID=DP,Number=1,Type=Integer,Description="Read depth">',
+    '##FORMAT=<ID=GQ,Number=1,Type=Integer,Description="Genotype quality">',
+    '##FILTER=<ID=PASS,Description="All filters passed">',
+]
+VCF_COLUMNS = ['#CHROM', 'POS', 'ID', 'REF', 'ALT', 'QUAL', 'FILTER', 'INFO', 'FORMAT']
+# Fraction of non-multiallelic variants that are indels rather than SNVs.
+INDEL_FRACTION = 0.1
+MAX_ALLELE_FREQUENCY = 0.5
+
+
+def sample_ids(n_samples: int) -> list[str]:
+    return [f'SAMPLE_{i:07d}' for i in range(n_samples)]
+
+
+def families(samples: list[str], family_size: int) -> list[list[str]]:
+    return [samples[i : i + family_size] for i in range(0, len(samples), family_size)]
+
+
+def write_pedigree(
+    pedigree_path: str,
+    project_guid: str,
+    samples: list[str],
+    family_size: int,
+) -> None:
+    """
+    Families of more than two samples are two parents and their children;
+    smaller families are unrelated individuals.
+    """
+    with open(pedigree_path, 'w') as f:
+        f.write('\t'.join(PEDIGREE_HEADER) + '\n')
+        for i, family in enumerate(families(samples, family_size)):
+            for j, s in enumerate(family):
+                has_parents = len(family) > 2 and j >= 2  # noqa: PLR2004
+                f.write(
+                    '\t'.join(
+                        [
+                            project_guid,
+                            f'family_{i}_1',
+                            f'family_{i}',
+                            s,
+                            family[1] if has_parents else '',
+                            family[0] if has_parents else '',
+                            'M' if j % 2 else 'F',
+                        ],
+                    )
+                    + '\n',
+                )
+
+
+def alleles(rng: random.Random, multiallelic_fraction: float) -> list[str]:
+    ref = rng.choice(BASES)
+    if rng.random() < multiallelic_fraction:
+        return [ref, *[b for b in BASES if b != ref][: rng.randint(2, 3)]]
+    if rng.random() < INDEL_FRACTION:
+        return [ref, ref + ''.join(rng.choices(BASES, k=rng.randint(1, 20)))]
+    return [ref, rng.choice([b for b in BASES if b != ref])]
+
+
+def genotypes(
+    rng: random.Random,
+    n_alleles: int,
+    samples_by_family: list[list[str]],
+) -> list[tuple[int, int]]:
+    # Parents' alleles are drawn independently, and each child inherits one
+    # allele from each parent, so relatedness checks see real families.
+    allele_frequency = rng.random() * MAX_ALLELE_FREQUENCY
+    gts = []
+    for family in samples_by_family:
+        family_gts = []
+        for j in range(len(family)):
+            if len(family) > 2 and j >= 2:  # noqa: PLR2004
+                family_gts.append(
+                    (rng.choice(family_gts[0]), rng.choice(family_gts[1])),
+                )
+                continue
+            family_gts.append(
+                tuple(
+                    rng.randint(1, n_alleles - 1)
+                    if rng.random() < allele_frequency
+                    else 0
+                    for _ in range(2)
+                ),
+            )
+        gts.extend(family_gts)
+    return gts
+
+
+def format_entry(rng: random.Random, gt: tuple[int, int], n_alleles: int) -> str:
+    dp = rng.randint(10, 60)
+    ad = [0] * n_alleles
+    for allele in gt:
+        ad[allele] += dp // 2
+    return f'{gt[0]}/{gt[1]}:{",".join(map(str, ad))}:{dp}:{rng.randint(20, 99)}'
+
+
+def write_vcf(
+    vcf_path: str,
+    samples: list[str],
+    n_variants: int,
+    multiallelic_fraction: float,
+    family_size: int,
+    seed: int,
+) -> None:
+    rng = random.Random(seed)  # noqa: S311
+    samples_by_family = families(samples, family_size)
+    positions_per_contig = -(-n_variants // len(CONTIGS))
+    open_fn = gzip.open if vcf_path.endswith('gz') else open
+    with open_fn(vcf_path, 'wt') as f:
+        for line in VCF_HEADER:
+            f.write(line + '\n')
+        for contig in CONTIGS:
+            f.write(f'##contig=<ID={contig}>\n')
+        f.write('\t'.join([*VCF_COLUMNS, *samples]) + '\n')
+        for i in range(n_variants):
+            contig = CONTIGS[i // positions_per_contig]
+            # Spaced so that every variant fits on the smallest contig.
+            position = 10000 + (i % positions_per_contig) * 10
+            variant_alleles = alleles(rng, multiallelic_fraction)
+            gts = genotypes(rng, len(variant_alleles), samples_by_family)
+            f.write(
+                '\t'.join(
+                    [
+                        contig,
+                        str(position),
+                        '.',
+                        variant_alleles[0],
+                        ','.join(variant_alleles[1:]),
+                        '100',
+                        'PASS',
+                        '.',
+                        'GT:AD:DP:GQ',
+                    ],
+                )
+                + '\t'
+                + '\t'.join(format_entry(rng, gt, len(variant_alleles)) for gt in gts)
+                + '\n',
+            )
+
+
+def write_synthetic_callset(  # noqa: PLR0913
+    vcf_path: str,
+    pedigree_path: str,
+    n_samples: int,
+    n_variants: int,
+    multiallelic_fraction: float = 0.05,
+    family_size: int = 3,
+    project_guid: str = 'R0001_benchmark',
+    seed: int = 0,
+) -> None:
+    samples = sample_ids(n_samples)
+    write_pedigree(pedigree_path, project_guid, samples, family_size)
+    write_vcf(
+        vcf_path,
+        samples,
+        n_variants,
+        multiallelic_fraction,
+        family_size,
+        seed,
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--n-samples', type=int, required=True)
+    parser.add_argument('--n-variants', type=int, required=True)
+    parser.add_argument('--multiallelic-fraction', type=float, default=0.05)
+    parser.add_argument(
+        '--family-size',
+        type=int,
+        default=3,
+        help='Samples per family; families larger than two have two parents.',
+    )
+    parser.add_argument('--project-guid', default='R0001_benchmark')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--vcf-path', required=True)
+    parser.add_argument('--pedigree-path', required=True)
+    args = parser.parse_args()
+    write_synthetic_callset(
+        args.vcf_path,
+        args.pedigree_path,
+        args.n_samples,
+        args.n_variants,
+        args.multiallelic_fraction,
+        args.family_size,
+        args.project_guid,
+        args.seed,
+    )
+
+
+if __name__ == '__main__':
+    main()
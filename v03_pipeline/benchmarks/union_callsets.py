@@ -0,0 +1,111 @@
+"""
+Compares the left-deep fold previously used to union per-project callsets
+against the union planner in v03_pipeline.lib.misc.callsets.
+
+    python -m v03_pipeline.benchmarks.union_callsets --project-counts 1 10 50 200
+"""
+
+import argparse
+import functools
+import time
+from collections.abc import Callable
+
+import hail as hl
+
+from v03_pipeline.lib.misc.callsets import union_callset_mts, union_hts
+
+
+def synthetic_project_mts(
+    n_projects: int,
+    n_rows: int,
+    n_samples: int,
+) -> list[hl.MatrixTable]:
+    mts = []
+    for i in range(n_projects):
+        mt = hl.utils.range_matrix_table(n_rows, n_samples)
+        # Offset the rows so projects partially overlap, as real projects do.
+        mt = mt.key_rows_by(id=mt.row_idx + i * (n_rows // 2))
+        mt = mt.annotate_rows(row_field=i)
+        mt = mt.key_cols_by(s=hl.format('project_%d_sample_%d', i, mt.col_idx))
+        mt = mt.select_entries(GT=hl.Call([0, (mt.row_idx + i) % 2]))
+        mts.append(mt.drop('row_idx', 'col_idx'))
+    return mts
+
+
+def left_deep_union_mts(mts: list[hl.MatrixTable]) -> hl.MatrixTable:
+    return functools.reduce(
+        (
+            lambda mt1, mt2: mt1.union_cols(
+                mt2,
+                row_join_type='outer',
+                drop_right_row_fields=True,
+            )
+        ),
+        mts,
+    )
+
+
+def left_deep_union_hts(hts: list[hl.Table]) -> hl.Table:
+    return functools.reduce((lambda ht1, ht2: ht1.union(ht2)), hts)
+
+
+def timed(fn: Callable[[], int]) -> tuple[float, int]:
+    start = time.perf_counter()
+    result = fn()
+    return time.perf_counter() - start, result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        '--project-counts',
+        type=int,
+        nargs='+',
+        default=[1, 10, 50, 200],
+    )
+    parser.add_argument('--rows-per-project', type=int, default=1000)
+    parser.add_argument('--samples-per-project', type=int, default=2)
+    parser.add_argument(
+        '--checkpoint-interval',
+        type=int,
+        default=0,
+        help='Checkpoint every N inputs in the planned unions, 0 to disable.',
+    )
+    args = parser.parse_args()
+    hl.init(idempotent=True)
+
+    print('projects\tunion\tleft_deep_s\tplanned_s')  # noqa: T201
+    for n_projects in args.project_counts:
+        mts = synthetic_project_mts(
+            n_projects,
+            args.rows_per_project,
+            args.samples_per_project,
+        )
+        hts = [mt.rows() for mt in mts]
+        for union, left_deep_fn, planned_fn in [
+            (
+                'Table.union',
+                lambda hts=hts: left_deep_union_hts(hts).count(),
+                lambda hts=hts: union_hts(hts, args.checkpoint_interval).count(),
+            ),
+            (
+                'MatrixTable.union_cols',
+                lambda mts=mts: left_deep_union_mts(mts).entries().count(),
+                lambda mts=mts: union_callset_mts(
+                    mts,
+                    args.checkpoint_interval,
+                )
+                .entries()
+                .count(),
+            ),
+        ]:
+            left_deep_s, left_deep_count = timed(left_deep_fn)
+            planned_s, planned_count = timed(planned_fn)
+            if left_deep_count != planned_count:
+                msg = f'Row counts differ: {left_deep_count} != {planned_count}'
+                raise ValueError(msg)
+            print(f'{n_projects}\t{union}\t{left_deep_s:.2f}\t{planned_s:.2f}')  # noqa: T201
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,110 @@
+"""
+Compares running the callset validations one Hail job at a time against
+the fused single-pass validation in v03_pipeline.lib.misc.validation.
+
+    python -m v03_pipeline.benchmarks.validate_callset --n-rows 100000 1000000
+    python -m v03_pipeline.benchmarks.validate_callset --callset-path gs://.../imported_callset.mt
+"""
+
+import argparse
+import time
+
+import hail as hl
+
+from v03_pipeline.lib.core import DatasetType, ReferenceGenome, SampleType
+from v03_pipeline.lib.misc.validation import (
+    SKIPPABLE_VALIDATIONS,
+    SeqrValidationError,
+    fused_validation_errors,
+    validate_sample_type,
+)
+
+
+def synthetic_callset_mt(n_rows: int, n_samples: int) -> hl.MatrixTable:
+    mt = hl.balding_nichols_model(
+        1,
+        n_samples,
+        n_rows,
+        reference_genome=ReferenceGenome.GRCh38.value,
+    )
+    mt = mt.annotate_entries(
+        AD=hl.if_else(
+            # Sprinkle in some malformed AD arrays so that every check
+            # has rows to report.
+            (mt.locus.position % 1000 == 0) & (mt.sample_idx == 0),
+            [1],
+            [mt.GT.n_alt_alleles(), 2 - mt.GT.n_alt_alleles()],
+        ),
+    )
+    return mt.select_rows().select_cols().select_globals()
+
+
+def per_check_validation_errors(
+    mt: hl.MatrixTable,
+    validations_to_skip: list[str],
+    **kwargs,
+) -> list[SeqrValidationError]:
+    errors = []
+    for validation_f in SKIPPABLE_VALIDATIONS:
+        if validation_f.__name__ in validations_to_skip:
+            continue
+        try:
+            validation_f(mt, **kwargs)
+        except SeqrValidationError as e:
+            errors.append(e)
+    return errors
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--n-rows', type=int, nargs='+', default=[100000])
+    parser.add_argument('--n-samples', type=int, default=10)
+    parser.add_argument(
+        '--callset-path',
+        help='An imported callset to validate instead of a synthetic one.',
+    )
+    parser.add_argument(
+        '--coding-and-noncoding-variants-path',
+        help='The gnomad_coding_and_noncoding table.  Sample type validation is skipped if unset.',
+    )
+    args = parser.parse_args()
+    hl.init(idempotent=True)
+
+    kwargs = {
+        'reference_genome': ReferenceGenome.GRCh38,
+        'dataset_type': DatasetType.SNV_INDEL,
+        'sample_type': SampleType.WGS,
+        'project_guids': ['benchmark'],
+        'validations_to_skip': [],
+    }
+    if args.coding_and_noncoding_variants_path:
+        kwargs['coding_and_noncoding_variants_ht'] = hl.read_table(
+            args.coding_and_noncoding_variants_path,
+        )
+    else:
+        kwargs['validations_to_skip'] = [validate_sample_type.__name__]
+
+    callsets = (
+        [(args.callset_path, hl.read_matrix_table(args.callset_path))]
+        if args.callset_path
+        else [
+            (f'synthetic_{n_rows}', synthetic_callset_mt(n_rows, args.n_samples))
+            for n_rows in args.n_rows
+        ]
+    )
+    print('callset\tper_check_s\tfused_s')  # noqa: T201
+    for name, mt in callsets:
+        start = time.perf_counter()
+        per_check_errors = per_check_validation_errors(mt, **kwargs)
+        per_check_s = time.perf_counter() - start
+        start = time.perf_counter()
+        fused_errors = fused_validation_errors(mt, **kwargs)
+        fused_s = time.perf_counter() - start
+        if [e.msg for e in per_check_errors] != [e.msg for e in fused_errors]:
+            msg = f'Validation errors differ for {name}'
+            raise ValueError(msg)
+        print(f'{name}\t{per_check_s:.2f}\t{fused_s:.2f}')  # noqa: T201
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,19 @@
+#!/usr/bin/env python3
+import argparse
+
+from v03_pipeline.lib.core import Env
+from v03_pipeline.lib.misc.checkpoints import delete_stale_checkpoints
+
+S_PER_DAY = 24 * 60 * 60
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+        description='Deletes checkpoints under HAIL_TMP_DIR orphaned by failed runs.',
+    )
+    parser.add_argument(
+        '--max-age-days',
+        type=float,
+        default=Env.STALE_CHECKPOINT_MAX_AGE_S / S_PER_DAY,
+    )
+    args = parser.parse_args()
+    delete_stale_checkpoints(int(args.max_age_days * S_PER_DAY))
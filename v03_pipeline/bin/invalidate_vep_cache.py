@@ -0,0 +1,28 @@
+#!/usr/bin/env python3
+import argparse
+
+import hailtop.fs as hfs
+
+from v03_pipeline.lib.core import DatasetType, ReferenceGenome
+from v03_pipeline.lib.paths import vep_cache_dir
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+        description='Deletes the cached VEP annotations, e.g. after a VEP version bump.',
+    )
+    parser.add_argument(
+        '--reference-genome',
+        type=ReferenceGenome,
+        choices=list(ReferenceGenome),
+        action='append',
+        help='Defaults to every reference genome.',
+    )
+    args = parser.parse_args()
+    for reference_genome in args.reference_genome or list(ReferenceGenome):
+        for dataset_type in DatasetType:
+            if not dataset_type.veppable:
+                continue
+            cache_dir = vep_cache_dir(reference_genome, dataset_type)
+            if hfs.exists(cache_dir):
+                hfs.rmtree(cache_dir)
+                print(f'Deleted {cache_dir}')  # noqa: T201
@@ -1,7 +1,6 @@
 #!/usr/bin/env python3
 import json
-import os
-import re
+import multiprocessing
 import signal
 import sys
 import time
@@ -9,27 +8,48 @@ import time
 from v03_pipeline.api.model import (
     PipelineRunnerRequest,
 )
+from v03_pipeline.api.queue_backends import (
+    QueueEntry,
+    QueueStatus,
+    get_queue_backend,
+)
 from v03_pipeline.api.request_handlers import REQUEST_HANDLER_MAP
+from v03_pipeline.lib.core.environment import Env
 from v03_pipeline.lib.logger import get_logger
+from v03_pipeline.lib.misc.checkpoints import delete_stale_checkpoints
 from v03_pipeline.lib.misc.clickhouse import (
+    close_pooled_clickhouse_clients,
     drop_staging_db,
 )
-from v03_pipeline.lib.misc.runs import get_oldest_queue_path
+from v03_pipeline.lib.misc.locks import (
+    release_resource_locks,
+    try_acquire_resource_locks,
+)
 from v03_pipeline.lib.misc.slack import (
     safe_post_to_slack_failure,
     safe_post_to_slack_success,
 )
-from v03_pipeline.lib.paths import (
-    loading_pipeline_deadletter_queue_dir,
-    loading_pipeline_deadletter_queue_path,
-    loading_pipeline_queue_path,
-)
 
 logger = get_logger(__name__)
 
+# Runs being processed by this process and, when PIPELINE_WORKER_CONCURRENCY > 1,
+# the worker processes (and the resource locks they hold) keyed by run_id.
+RUNNING_RUN_IDS: set[str] = set()
+WORKER_PROCESSES: dict[
+    str,
+    tuple[multiprocessing.Process, list[int], PipelineRunnerRequest],
+] = {}
+
 
 def signal_handler(*_):
-    drop_staging_db()
+    # Worker processes drop their own staging databases when terminated.
+    for process, *_ in WORKER_PROCESSES.values():
+        process.terminate()
+    for process, *_ in WORKER_PROCESSES.values():
+        process.join()
+    for run_id in RUNNING_RUN_IDS:
+        drop_staging_db(run_id)
+    close_pooled_clickhouse_clients()
     sys.exit(0)
 
 
@@ -37,15 +57,10 @@ signal.signal(signal.SIGINT, signal_handler)
 signal.signal(signal.SIGTERM, signal_handler)
 
 
-def parse_latest_queue_path(
-    latest_queue_path: str,
-) -> tuple[PipelineRunnerRequest, str]:
-    run_id = re.search(
-        r'request_(\d{8}-\d{6}-\d{6})\.json',
-        os.path.basename(latest_queue_path),
-    ).group(1)
-    with open(latest_queue_path) as f:
-        raw_json = json.load(f)
+def parse_queue_entry(
+    queue_entry: QueueEntry,
+) -> PipelineRunnerRequest:
+    raw_json = json.loads(queue_entry.request_json)
     request_type_name = raw_json['request_type']
     request_cls = next(
         (cls for cls in REQUEST_HANDLER_MAP if cls.__name__ == request_type_name),
@@ -54,19 +69,36 @@ def parse_latest_queue_path(
     if not request_cls:
         msg = f'Unknown request_type: {request_type_name}'
         raise ValueError(msg)
-    prr = request_cls.model_validate(raw_json)
-    return prr, run_id
+    return request_cls.model_validate(raw_json)
 
 
-def process_queue(local_scheduler=False):
+def requeue_or_dead_letter(
+    run_id: str,
+    prr: PipelineRunnerRequest,
+    e: Exception,
+) -> None:
+    queue_backend = get_queue_backend()
+    if hasattr(prr, 'attempt_id') and prr.incr_attempt():
+        queue_backend.requeue(run_id, prr)
+        return
+    safe_post_to_slack_failure(
+        run_id,
+        prr,
+        e,
+    )
+    queue_backend.dead_letter(run_id, prr)
+
+
+def process_queue_entry(queue_entry: QueueEntry, local_scheduler=False):
+    queue_backend = get_queue_backend()
     run_id = None
     try:
-        latest_queue_path = get_oldest_queue_path()
-        if latest_queue_path is None:
-            return
-        prr, run_id = parse_latest_queue_path(latest_queue_path)
+        prr = parse_queue_entry(queue_entry)
+        run_id = queue_entry.run_id
+        RUNNING_RUN_IDS.add(run_id)
+        queue_backend.mark_running(run_id)
         REQUEST_HANDLER_MAP[type(prr)](prr, run_id, local_scheduler)
-        os.remove(latest_queue_path)
+        queue_backend.complete(run_id)
         safe_post_to_slack_success(
             run_id,
             prr,
@@ -75,24 +107,102 @@ def process_queue(local_scheduler=False):
         logger.exception('Unhandled Exception')
         if run_id is None:
             return
-        if hasattr(prr, 'attempt_id') and prr.incr_attempt():
-            with open(loading_pipeline_queue_path(run_id), 'w') as f:
-                f.write(prr.model_dump_json())
+        requeue_or_dead_letter(run_id, prr, e)
+    finally:
+        RUNNING_RUN_IDS.discard(run_id)
+
+
+def process_queue(local_scheduler=False):
+    try:
+        queue_entry = get_queue_backend().next_pending()
+    except Exception:
+        logger.exception('Unhandled Exception')
+        return
+    if queue_entry is None:
+        return
+    process_queue_entry(queue_entry, local_scheduler)
+
+
+def reap_worker_processes():
+    for run_id, (process, fds, prr) in list(WORKER_PROCESSES.items()):
+        if process.is_alive():
+            continue
+        process.join()
+        # Worker processes requeue or dead letter their own failed requests,
+        # so a non-zero exit code means the process itself died (e.g. was
+        # OOM killed) with its request still marked running.  The request is
+        # handled before its locks are released so that no conflicting
+        # request can start ahead of it.
+        if process.exitcode:
+            logger.error(f'Worker process for {run_id} exited with {process.exitcode}')
+            requeue_or_dead_letter(
+                run_id,
+                prr,
+                RuntimeError(f'Worker process exited with code {process.exitcode}'),
+            )
+        release_resource_locks(fds)
+        del WORKER_PROCESSES[run_id]
+
+
+def process_queue_concurrently(local_scheduler=False):
+    # Starts up to PIPELINE_WORKER_CONCURRENCY requests, each in its own process
+    # holding locks on the (reference_genome, dataset_type) tables it touches.
+    reap_worker_processes()
+    # Requests are considered in queue order.  A request that cannot start yet
+    # reserves its resources so that younger conflicting requests can't
+    # jump ahead of it.
+    reserved_resources = set()
+    queue_backend = get_queue_backend()
+    try:
+        queue_entries = queue_backend.entries(QueueStatus.PENDING)
+    except Exception:
+        logger.exception('Unhandled Exception')
+        return
+    for queue_entry in queue_entries:
+        if len(WORKER_PROCESSES) >= Env.PIPELINE_WORKER_CONCURRENCY:
             return
-        safe_post_to_slack_failure(
-            run_id,
-            prr,
-            e,
+        if queue_entry.run_id in WORKER_PROCESSES:
+            continue
+        try:
+            prr = parse_queue_entry(queue_entry)
+        except Exception:
+            logger.exception(f'Unable to parse request {queue_entry.run_id}')
+            continue
+        if prr.resources & reserved_resources:
+            continue
+        reserved_resources |= prr.resources
+        fds = try_acquire_resource_locks(prr.resources)
+        if fds is None:
+            continue
+        # Another worker may have claimed the request while we took the locks.
+        if queue_entry.run_id not in {
+            e.run_id for e in queue_backend.entries(QueueStatus.PENDING)
+        }:
+            release_resource_locks(fds)
+            continue
+        # NB: spawn (rather than fork) so that workers neither inherit the
+        # lock file descriptors held for other requests nor share the JVM.
+        queue_backend.mark_running(queue_entry.run_id)
+        process = multiprocessing.get_context('spawn').Process(
+            target=process_queue_entry,
+            args=(queue_entry, local_scheduler),
         )
-        os.makedirs(loading_pipeline_deadletter_queue_dir(), exist_ok=True)
-        with open(loading_pipeline_deadletter_queue_path(run_id), 'w') as f:
-            f.write(prr.model_dump_json())
-        os.remove(latest_queue_path)
+        process.start()
+        WORKER_PROCESSES[queue_entry.run_id] = (process, fds, prr)
 
 
 def main():
+    # Nothing can be running before the worker starts.
+    get_queue_backend().recover()
+    try:
+        delete_stale_checkpoints(Env.STALE_CHECKPOINT_MAX_AGE_S)
+    except Exception:
+        logger.exception('Unable to delete stale checkpoints')
     while True:
-        process_queue()
+        if Env.PIPELINE_WORKER_CONCURRENCY > 1:
+            process_queue_concurrently()
+        else:
+            process_queue()
         logger.info('Looking for more work')
         time.sleep(1)
 
@@ -7,13 +7,18 @@ import hailtop.fs as hfs
 import luigi
 import luigi.worker
 
-from v03_pipeline.bin.pipeline_worker import process_queue
+from v03_pipeline.bin.pipeline_worker import (
+    WORKER_PROCESSES,
+    process_queue,
+    process_queue_concurrently,
+    reap_worker_processes,
+)
 from v03_pipeline.lib.core import DatasetType, ReferenceGenome, SampleType
 from v03_pipeline.lib.core.environment import Env
 from v03_pipeline.lib.misc.clickhouse import (
-    STAGING_CLICKHOUSE_DATABASE,
     ClickhouseReferenceDataset,
     get_clickhouse_client,
+    staging_database,
 )
 from v03_pipeline.lib.paths import (
     clickhouse_load_success_file_path,
@@ -29,6 +34,7 @@ from v03_pipeline.var.test.vep.mock_vep_data import MOCK_38_VEP_DATA
 TEST_PEDIGREE_3_REMAP = 'v03_pipeline/var/test/pedigrees/test_pedigree_3_remap.tsv'
 TEST_SCHEMA = 'v03_pipeline/var/test/test_clickhouse_schema.sql'
 TEST_VCF = 'v03_pipeline/var/test/callsets/1kg_30variants.vcf'
+TEST_RUN_ID = '20250916-200704-123456'
 
 
 class MyFailingTask(luigi.Task):
@@ -46,7 +52,7 @@ class PipelineWorkerTest(MockedReferenceDatasetsTestCase):
         client = get_clickhouse_client()
         client.execute(
             f"""
-            DROP DATABASE IF EXISTS {STAGING_CLICKHOUSE_DATABASE};
+            DROP DATABASE IF EXISTS {staging_database(TEST_RUN_ID)};
             """,
         )
         client.execute(
@@ -135,7 +141,7 @@ class PipelineWorkerTest(MockedReferenceDatasetsTestCase):
         client = get_clickhouse_client()
         client.execute(
             f"""
-           DROP DATABASE IF EXISTS {STAGING_CLICKHOUSE_DATABASE};
+           DROP DATABASE IF EXISTS {staging_database(TEST_RUN_ID)};
            """,
         )
         client.execute(
@@ -150,11 +156,12 @@ class PipelineWorkerTest(MockedReferenceDatasetsTestCase):
         return_value=[ClickhouseReferenceDataset.CLINVAR],
     )
     @patch(
-        'v03_pipeline.lib.tasks.write_new_variants_table.load_gencode_ensembl_to_refseq_id',
+        'v03_pipeline.lib.tasks.write_new_variants_table.gencode_ensembl_to_refseq_id_mapping',
     )
     @patch(
         'v03_pipeline.lib.tasks.update_new_variants_with_caids.register_alleles_in_chunks',
     )
+    @patch('v03_pipeline.lib.vep.vep_config_hash', new=Mock(return_value='test'))
     @patch('v03_pipeline.lib.vep.hl.vep')
     @patch('v03_pipeline.lib.misc.slack._safe_post_to_slack')
     @patch('v03_pipeline.bin.pipeline_worker.logger')
@@ -285,3 +292,64 @@ class PipelineWorkerTest(MockedReferenceDatasetsTestCase):
             r = json.load(f)
             self.assertEqual(r['request_type'], 'LoadingPipelineRequest')
             self.assertEqual(r['attempt_id'], 2)
+
+    @patch('v03_pipeline.bin.pipeline_worker.multiprocessing')
+    def test_process_queue_concurrently(self, mock_multiprocessing):
+        os.makedirs(
+            loading_pipeline_queue_dir(),
+            exist_ok=True,
+        )
+        for run_id, reference_genome in [
+            ('20250919-200704-000001', ReferenceGenome.GRCh38),
+            ('20250919-200704-000002', ReferenceGenome.GRCh38),
+            ('20250919-200704-000003', ReferenceGenome.GRCh37),
+        ]:
+            with open(
+                os.path.join(
+                    loading_pipeline_queue_dir(),
+                    f'request_{run_id}.json',
+                ),
+                'w',
+            ) as f:
+                json.dump(
+                    {
+                        'request_type': 'LoadingPipelineRequest',
+                        'callset_path': TEST_VCF,
+                        'projects_to_run': ['project_a'],
+                        'sample_type': SampleType.WGS.value,
+                        'reference_genome': reference_genome.value,
+                        'dataset_type': DatasetType.SNV_INDEL.value,
+                    },
+                    f,
+                )
+        with patch.object(Env, 'PIPELINE_WORKER_CONCURRENCY', 3):
+            process_queue_concurrently()
+            # The two GRCh38/SNV_INDEL requests conflict, so only one of them
+            # runs alongside the GRCh37 request.
+            self.assertEqual(len(WORKER_PROCESSES), 2)
+            self.assertIn('20250919-200704-000003', WORKER_PROCESSES)
+            process_queue_concurrently()
+            self.assertEqual(len(WORKER_PROCESSES), 2)
+
+            # A worker that died requeues its request for another attempt.
+            process, *_ = WORKER_PROCESSES['20250919-200704-000003']
+            process.is_alive.return_value = False
+            process.exitcode = -9
+            reap_worker_processes()
+            self.assertEqual(len(WORKER_PROCESSES), 1)
+            with open(
+                os.path.join(
+                    loading_pipeline_queue_dir(),
+                    'request_20250919-200704-000003.json',
+                ),
+            ) as f:
+                self.assertEqual(json.load(f)['attempt_id'], 1)
+
+            # Finished workers release their locks.
+            for process, *_ in WORKER_PROCESSES.values():
+                process.is_alive.return_value = False
+                process.exitcode = 0
+            for queue_path in os.listdir(loading_pipeline_queue_dir()):
+                os.remove(os.path.join(loading_pipeline_queue_dir(), queue_path))
+            reap_worker_processes()
+            self.assertEqual(len(WORKER_PROCESSES), 0)
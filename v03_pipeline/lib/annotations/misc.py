@@ -15,10 +15,63 @@ from v03_pipeline.lib.annotations.enums import (
 )
 from v03_pipeline.lib.core import DatasetType
 from v03_pipeline.lib.core.definitions import ReferenceGenome
+from v03_pipeline.lib.misc.io import copartitioned_read_tables
 from v03_pipeline.lib.paths import valid_reference_dataset_path
+from v03_pipeline.lib.reference_datasets.lookup import prune_to_intervals
 from v03_pipeline.lib.reference_datasets.reference_dataset import ReferenceDataset
 
 
+def annotate_reference_datasets(
+    ht: hl.Table,
+    reference_genome: ReferenceGenome,
+    dataset_type: DatasetType,
+    intervals: list[hl.Interval] | None = None,
+) -> hl.Table:
+    # Annotates ht with each reference dataset that is not a formatting
+    # annotation, as a struct field named after the dataset.  If provided,
+    # only the partitions of the reference datasets overlapping intervals
+    # are read.
+    reference_datasets = [
+        reference_dataset
+        for reference_dataset in ReferenceDataset.for_reference_genome_dataset_type_annotations(
+            reference_genome,
+            dataset_type,
+        )
+        if not reference_dataset.formatting_annotation
+    ]
+    ht, reference_dataset_hts = copartitioned_read_tables(
+        ht,
+        [
+            valid_reference_dataset_path(reference_genome, reference_dataset)
+            for reference_dataset in reference_datasets
+        ],
+    )
+    annotations = {}
+    for reference_dataset, reference_dataset_ht in zip(
+        reference_datasets,
+        reference_dataset_hts,
+        strict=True,
+    ):
+        reference_dataset_ht = prune_to_intervals(  # noqa: PLW2901
+            reference_dataset_ht,
+            intervals,
+        )
+        if reference_dataset.select:
+            reference_dataset_ht = reference_dataset.select(  # noqa: PLW2901
+                reference_genome,
+                dataset_type,
+                reference_dataset_ht,
+            )
+        if reference_dataset.filter:
+            reference_dataset_ht = reference_dataset.filter(  # noqa: PLW2901
+                reference_genome,
+                dataset_type,
+                reference_dataset_ht,
+            )
+        annotations[reference_dataset.name] = reference_dataset_ht[ht.key]
+    return ht.annotate(**annotations)
+
+
 def annotate_reference_dataset_globals(
     ht: hl.Table,
     reference_genome: ReferenceGenome,
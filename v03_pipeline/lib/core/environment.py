@@ -25,6 +25,10 @@ VEP_REFERENCE_DATASETS_DIR = os.environ.get(
     'VEP_REFERENCE_DATASETS_DIR',
     '/var/seqr/vep-reference-data',
 )
+# Checkpoint every N inputs when unioning per-project callsets, 0 to disable.
+CALLSET_UNION_CHECKPOINT_INTERVAL = int(
+    os.environ.get('CALLSET_UNION_CHECKPOINT_INTERVAL', '0'),
+)
 CLICKHOUSE_DATABASE = os.environ.get('CLICKHOUSE_DATABASE', 'seqr')
 CLICKHOUSE_SERVICE_HOSTNAME = os.environ.get(
     'CLICKHOUSE_SERVICE_HOSTNAME',
@@ -41,6 +45,9 @@ CLINGEN_ALLELE_REGISTRY_PASSWORD = os.environ.get(
     'CLINGEN_ALLELE_REGISTRY_PASSWORD',
     '',
 )
+CLINGEN_ALLELE_REGISTRY_CONCURRENCY = int(
+    os.environ.get('CLINGEN_ALLELE_REGISTRY_CONCURRENCY', '4'),
+)
 DEPLOYMENT_TYPE = os.environ.get('DEPLOYMENT_TYPE', 'prod')
 GCLOUD_DATAPROC_SECONDARY_WORKERS = int(
     os.environ.get('GCLOUD_DATAPROC_SECONDARY_WORKERS', '5'),
@@ -48,6 +55,16 @@ GCLOUD_DATAPROC_SECONDARY_WORKERS = int(
 GCLOUD_PROJECT = os.environ.get('GCLOUD_PROJECT')
 GCLOUD_ZONE = os.environ.get('GCLOUD_ZONE')
 GCLOUD_REGION = os.environ.get('GCLOUD_REGION')
+PIPELINE_QUEUE_BACKEND = os.environ.get('PIPELINE_QUEUE_BACKEND', 'file')
+# Formatted as comma separated request_type:priority pairs, e.g.
+# "DeleteFamiliesRequest:1,RebuildGtStatsRequest:1".  Higher priorities are
+# processed first, requests default to 0.
+PIPELINE_QUEUE_REQUEST_PRIORITIES = tuple(
+    (x.split(':')[0], int(x.split(':')[1]))
+    for x in os.environ.get('PIPELINE_QUEUE_REQUEST_PRIORITIES', '').split(',')
+    if x
+)
+PIPELINE_WORKER_CONCURRENCY = int(os.environ.get('PIPELINE_WORKER_CONCURRENCY', '1'))
 PIPELINE_RUNNER_APP_VERSION = os.environ.get('PIPELINE_RUNNER_APP_VERSION', 'latest')
 SAMPLE_TYPE_VALIDATION_EXCLUDED_PROJECTS = tuple(
     x
@@ -58,18 +75,86 @@ LOADING_QUEUE_LIMIT = int(os.environ.get('LOADING_QUEUE_LIMIT', '10'))
 CLICKHOUSE_OPTIMIZE_TABLE_WAIT_S = int(
     os.environ.get('CLICKHOUSE_OPTIMIZE_TABLE_WAIT_S', '150'),
 )
+CLICKHOUSE_OPTIMIZE_TABLE_MIN_WAIT_S = float(
+    os.environ.get('CLICKHOUSE_OPTIMIZE_TABLE_MIN_WAIT_S', '0.5'),
+)
+CLICKHOUSE_OPTIMIZE_TABLE_DEADLINE_S = int(
+    os.environ.get('CLICKHOUSE_OPTIMIZE_TABLE_DEADLINE_S', '86400'),
+)
+# The number of per-project partition statements issued to ClickHouse at
+# once.  Partitions are operated on one at a time unless this is raised.
+CLICKHOUSE_PARTITION_OPERATION_CONCURRENCY = int(
+    os.environ.get('CLICKHOUSE_PARTITION_OPERATION_CONCURRENCY', '1'),
+)
+# The number of variant annotations table deltas at which they are compacted
+# back into the table.
+VARIANT_ANNOTATIONS_TABLE_MAX_DELTAS = int(
+    os.environ.get('VARIANT_ANNOTATIONS_TABLE_MAX_DELTAS', '20'),
+)
+# The number of cache table (registered CAIDs and VEP annotations) deltas at
+# which they are compacted back into the cache table.
+CACHE_TABLE_MAX_DELTAS = int(os.environ.get('CACHE_TABLE_MAX_DELTAS', '20'))
+# The window size, in bases, at which reference datasets are pruned to the
+# loci of the variants being annotated.
+REFERENCE_DATASET_LOOKUP_WINDOW_SIZE = int(
+    os.environ.get('REFERENCE_DATASET_LOOKUP_WINDOW_SIZE', '100000'),
+)
+# Comma separated names of the validated_hl_functions (import_vcf,
+# select_relevant_fields, split_multi_hts) that checkpoint their output to
+# surface errors eagerly.  Those omitted surface errors when the imported
+# callset is written.  Set to an empty string to validate lazily throughout.
+VALIDATION_CHECKPOINT_STAGES = tuple(
+    x
+    for x in os.environ.get(
+        'VALIDATION_CHECKPOINT_STAGES',
+        'import_vcf,select_relevant_fields,split_multi_hts',
+    ).split(',')
+    if x
+)
+# Checkpoints under HAIL_TMP_DIR older than this are deleted when the
+# pipeline worker starts.
+STALE_CHECKPOINT_MAX_AGE_S = int(
+    os.environ.get('STALE_CHECKPOINT_MAX_AGE_S', str(7 * 24 * 60 * 60)),
+)
+# Tuned parquet exports are written as this many files, or as one file per
+# partition when 0.
+PARQUET_EXPORT_N_FILES = int(os.environ.get('PARQUET_EXPORT_N_FILES', '0'))
+# Parquet exports are streamed directly from the table's IR, unless the
+# rendered IR is longer than this (when non-zero), in which case the table is
+# checkpointed first.
+PARQUET_EXPORT_CHECKPOINT_MIN_IR_LENGTH = int(
+    os.environ.get('PARQUET_EXPORT_CHECKPOINT_MIN_IR_LENGTH', '0'),
+)
+PARQUET_EXPORT_ROW_GROUP_SIZE_BYTES = int(
+    os.environ.get('PARQUET_EXPORT_ROW_GROUP_SIZE_BYTES', str(64 * 1024 * 1024)),
+)
+# When set, per-task metrics are also written here in the Prometheus text
+# format, e.g. for node_exporter's textfile collector.
+PROMETHEUS_TEXTFILE_DIR = os.environ.get('PROMETHEUS_TEXTFILE_DIR', '')
 SLACK_NOTIFICATION_CHANNEL = os.environ.get('SLACK_NOTIFICATION_CHANNEL', '')
+# VEP partitions are sized to run in roughly this long.
+VEP_TARGET_PARTITION_RUNTIME_S = int(
+    os.environ.get('VEP_TARGET_PARTITION_RUNTIME_S', '600'),
+)
 SLACK_TOKEN = os.environ.get('SLACK_TOKEN', '')
 
 
 @dataclass
 class Env:
+    CACHE_TABLE_MAX_DELTAS: int = CACHE_TABLE_MAX_DELTAS
+    CALLSET_UNION_CHECKPOINT_INTERVAL: int = CALLSET_UNION_CHECKPOINT_INTERVAL
     CLICKHOUSE_DATABASE: str = CLICKHOUSE_DATABASE
+    CLICKHOUSE_OPTIMIZE_TABLE_DEADLINE_S: int = CLICKHOUSE_OPTIMIZE_TABLE_DEADLINE_S
+    CLICKHOUSE_OPTIMIZE_TABLE_MIN_WAIT_S: float = CLICKHOUSE_OPTIMIZE_TABLE_MIN_WAIT_S
     CLICKHOUSE_OPTIMIZE_TABLE_WAIT_S: str = CLICKHOUSE_OPTIMIZE_TABLE_WAIT_S
+    CLICKHOUSE_PARTITION_OPERATION_CONCURRENCY: int = (
+        CLICKHOUSE_PARTITION_OPERATION_CONCURRENCY
+    )
     CLICKHOUSE_SERVICE_HOSTNAME: str = CLICKHOUSE_SERVICE_HOSTNAME
     CLICKHOUSE_SERVICE_PORT: int = CLICKHOUSE_SERVICE_PORT
     CLICKHOUSE_WRITER_PASSWORD: str = CLICKHOUSE_WRITER_PASSWORD
     CLICKHOUSE_WRITER_USER: str = CLICKHOUSE_WRITER_USER
+    CLINGEN_ALLELE_REGISTRY_CONCURRENCY: int = CLINGEN_ALLELE_REGISTRY_CONCURRENCY
     CLINGEN_ALLELE_REGISTRY_LOGIN: str | None = CLINGEN_ALLELE_REGISTRY_LOGIN
     CLINGEN_ALLELE_REGISTRY_PASSWORD: str | None = CLINGEN_ALLELE_REGISTRY_PASSWORD
     DEPLOYMENT_TYPE: Literal['dev', 'prod'] = DEPLOYMENT_TYPE
@@ -82,12 +167,28 @@ class Env:
     PIPELINE_DATA_DIR: str = PIPELINE_DATA_DIR
     LOADING_DATASETS_DIR: str = LOADING_DATASETS_DIR
     LOADING_QUEUE_LIMIT: int = LOADING_QUEUE_LIMIT
+    PIPELINE_QUEUE_BACKEND: Literal['file', 'sqlite'] = PIPELINE_QUEUE_BACKEND
+    PIPELINE_QUEUE_REQUEST_PRIORITIES: tuple[tuple[str, int]] = (
+        PIPELINE_QUEUE_REQUEST_PRIORITIES
+    )
     PIPELINE_RUNNER_APP_VERSION: str = PIPELINE_RUNNER_APP_VERSION
+    PIPELINE_WORKER_CONCURRENCY: int = PIPELINE_WORKER_CONCURRENCY
+    PARQUET_EXPORT_CHECKPOINT_MIN_IR_LENGTH: int = (
+        PARQUET_EXPORT_CHECKPOINT_MIN_IR_LENGTH
+    )
+    PARQUET_EXPORT_N_FILES: int = PARQUET_EXPORT_N_FILES
+    PARQUET_EXPORT_ROW_GROUP_SIZE_BYTES: int = PARQUET_EXPORT_ROW_GROUP_SIZE_BYTES
     PRIVATE_REFERENCE_DATASETS_DIR: str = PRIVATE_REFERENCE_DATASETS_DIR
+    PROMETHEUS_TEXTFILE_DIR: str = PROMETHEUS_TEXTFILE_DIR
+    REFERENCE_DATASET_LOOKUP_WINDOW_SIZE: int = REFERENCE_DATASET_LOOKUP_WINDOW_SIZE
     REFERENCE_DATASETS_DIR: str = REFERENCE_DATASETS_DIR
     SAMPLE_TYPE_VALIDATION_EXCLUDED_PROJECTS: tuple[str] = (
         SAMPLE_TYPE_VALIDATION_EXCLUDED_PROJECTS
     )
     SLACK_NOTIFICATION_CHANNEL: str = SLACK_NOTIFICATION_CHANNEL
     SLACK_TOKEN: str = SLACK_TOKEN
+    STALE_CHECKPOINT_MAX_AGE_S: int = STALE_CHECKPOINT_MAX_AGE_S
+    VALIDATION_CHECKPOINT_STAGES: tuple[str] = VALIDATION_CHECKPOINT_STAGES
+    VARIANT_ANNOTATIONS_TABLE_MAX_DELTAS: int = VARIANT_ANNOTATIONS_TABLE_MAX_DELTAS
     VEP_REFERENCE_DATASETS_DIR: str = VEP_REFERENCE_DATASETS_DIR
+    VEP_TARGET_PARTITION_RUNTIME_S: int = VEP_TARGET_PARTITION_RUNTIME_S
@@ -5,14 +5,30 @@ from dataclasses import dataclass
 ACCESS_PRIVATE_REFERENCE_DATASETS = (
     os.environ.get('ACCESS_PRIVATE_REFERENCE_DATASETS') == '1'
 )
+CACHE_VEP_ANNOTATIONS = os.environ.get('CACHE_VEP_ANNOTATIONS') == '1'
 CHECK_SEX_AND_RELATEDNESS = os.environ.get('CHECK_SEX_AND_RELATEDNESS') == '1'
 EXPECT_TDR_METRICS = os.environ.get('EXPECT_TDR_METRICS') == '1'
+EXPORT_ENTRIES_WITH_SINGLE_JOIN = (
+    os.environ.get('EXPORT_ENTRIES_WITH_SINGLE_JOIN') == '1'
+)
+RUN_FUSED_VALIDATIONS = os.environ.get('RUN_FUSED_VALIDATIONS') == '1'
 RUN_PIPELINE_ON_DATAPROC = os.environ.get('RUN_PIPELINE_ON_DATAPROC') == '1'
+WRITE_TUNED_PARQUET_EXPORTS = os.environ.get('WRITE_TUNED_PARQUET_EXPORTS') == '1'
+WRITE_VARIANT_ANNOTATIONS_TABLE_DELTAS = (
+    os.environ.get('WRITE_VARIANT_ANNOTATIONS_TABLE_DELTAS') == '1'
+)
 
 
 @dataclass
 class FeatureFlag:
     ACCESS_PRIVATE_REFERENCE_DATASETS: bool = ACCESS_PRIVATE_REFERENCE_DATASETS
+    CACHE_VEP_ANNOTATIONS: bool = CACHE_VEP_ANNOTATIONS
     CHECK_SEX_AND_RELATEDNESS: bool = CHECK_SEX_AND_RELATEDNESS
     EXPECT_TDR_METRICS: bool = EXPECT_TDR_METRICS
+    EXPORT_ENTRIES_WITH_SINGLE_JOIN: bool = EXPORT_ENTRIES_WITH_SINGLE_JOIN
+    RUN_FUSED_VALIDATIONS: bool = RUN_FUSED_VALIDATIONS
     RUN_PIPELINE_ON_DATAPROC: bool = RUN_PIPELINE_ON_DATAPROC
+    WRITE_TUNED_PARQUET_EXPORTS: bool = WRITE_TUNED_PARQUET_EXPORTS
+    WRITE_VARIANT_ANNOTATIONS_TABLE_DELTAS: bool = (
+        WRITE_VARIANT_ANNOTATIONS_TABLE_DELTAS
+    )
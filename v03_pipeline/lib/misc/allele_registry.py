@@ -1,8 +1,12 @@
+import codecs
+import concurrent.futures
 import dataclasses
 import hashlib
-import math
+import json
+import os
 import time
 import uuid
+from collections.abc import Iterator
 
 import hail as hl
 import hailtop.fs as hfs
@@ -16,6 +20,8 @@ from v03_pipeline.lib.misc.requests import requests_retry_session
 MAX_VARIANTS_PER_REQUEST = 1000000
 ALLELE_REGISTRY_URL = 'https://reg.genome.network/alleles?file=vcf&fields=none+@id+genomicAlleles+externalRecords.{}.id'
 HTTP_REQUEST_TIMEOUT_S = 420
+JSON_ARRAY_DELIMITERS = ' \t\r\n[,]'
+RESPONSE_CHUNK_SIZE_B = 1 << 20
 
 logger = get_logger(__name__)
 
@@ -48,64 +54,197 @@ class AlleleRegistryError:
         )
 
 
+@dataclasses.dataclass
+class RegisteredAllele:
+    contig: str
+    position: int
+    alleles: list[str]
+    CAID: str
+
+    @property
+    def tsv_line(self) -> str:
+        return (
+            f'{self.contig}:{self.position}\t{json.dumps(self.alleles)}\t{self.CAID}\n'
+        )
+
+    def struct(self, reference_genome: ReferenceGenome) -> hl.Struct:
+        return hl.Struct(
+            locus=hl.Locus(
+                self.contig,
+                self.position,
+                reference_genome=reference_genome.value,
+            ),
+            alleles=self.alleles,
+            CAID=self.CAID,
+        )
+
+
 def register_alleles_in_chunks(
     ht: hl.Table,
     reference_genome: ReferenceGenome,
     base_url: str = ALLELE_REGISTRY_URL,
     chunk_size: int = MAX_VARIANTS_PER_REQUEST,
-):
-    num_rows = ht.count()
-    num_chunks = math.ceil(num_rows / chunk_size)
+    checkpoint_dir: str | None = None,
+) -> Iterator[hl.Table]:
+    """
+    Registers the alleles in `ht`, yielding a table of CAIDs per chunk as
+    each request completes.
+
+    Every chunk is checkpointed under `checkpoint_dir`, so calling again with
+    the same directory after a failure only re-sends the unregistered chunks.
+    """
+    if checkpoint_dir is None:
+        checkpoint_dir = os.path.join(
+            Env.HAIL_TMP_DIR,
+            'allele_registry',
+            str(uuid.uuid4()),
+        )
+    payload_paths = write_vcf_payloads(
+        ht,
+        reference_genome,
+        checkpoint_dir,
+        chunk_size,
+    )
     logger.info(
-        f'Registering {num_rows} allele(s) in chunks of {chunk_size} in {num_chunks} request(s).',
+        f'Registering alleles in chunks of {chunk_size} in {len(payload_paths)} request(s).',
     )
-    for start_idx in range(0, num_rows, chunk_size):
-        end_idx = start_idx + chunk_size
-        if end_idx == chunk_size:
-            chunk_ht = ht.head(chunk_size)
-        elif end_idx <= num_rows:
-            chunk_ht = ht.head(end_idx).tail(chunk_size)
-        else:
-            chunk_ht = ht.tail(end_idx - num_rows)
-        yield register_alleles(chunk_ht, reference_genome, base_url)
-
-
-def register_alleles(
+    with concurrent.futures.ThreadPoolExecutor(
+        max_workers=Env.CLINGEN_ALLELE_REGISTRY_CONCURRENCY,
+    ) as executor:
+        futures = [
+            executor.submit(
+                register_vcf_payload,
+                payload_path,
+                reference_genome,
+                base_url,
+            )
+            for payload_path in payload_paths
+        ]
+        try:
+            for future in concurrent.futures.as_completed(futures):
+                yield import_registered_alleles(future.result(), reference_genome)
+        finally:
+            # Chunks already in flight are allowed to finish and checkpoint.
+            for future in futures:
+                future.cancel()
+
+
+def write_vcf_payloads(
     ht: hl.Table,
     reference_genome: ReferenceGenome,
-    base_url: str,
-) -> hl.Table:
-    uuid4 = uuid.uuid4()
-    raw_vcf_file_name = f'{Env.HAIL_TMP_DIR}/r_{uuid4}.vcf'
-    formatted_vcf_file_name = f'{Env.HAIL_TMP_DIR}/f_{uuid4}.vcf'
-
-    # Export the variants to a VCF
-    hl.export_vcf(ht, raw_vcf_file_name)
+    checkpoint_dir: str,
+    chunk_size: int,
+) -> list[str]:
+    manifest_path = os.path.join(checkpoint_dir, 'payloads.json')
+    if hfs.exists(manifest_path):
+        with hfs.open(manifest_path, 'r') as f:
+            return json.load(f)
 
-    # Reformat the VCF created by hail's 'export_vcf' function to be compatible with the Allele Registry
-    with (
-        hfs.open(raw_vcf_file_name, 'r') as vcf_in,
-        hfs.open(
-            formatted_vcf_file_name,
-            'w',
-        ) as vcf_out,
-    ):
-        vcf_out.writelines(reference_genome.allele_registry_vcf_header)
-        for line in vcf_in:
-            if not line.startswith('#'):
+    # Each partition is exported in parallel as a shard of VCF data lines,
+    # which are then streamed into request sized payloads.
+    lines_dir = os.path.join(checkpoint_dir, 'lines')
+    ht = ht.annotate(
+        line=hl.delimit(
+            [
                 # NB: The Allele Registry does not accept contigs prefixed with 'chr', even for GRCh38
-                vcf_out.write(line.replace('chr', ''))
+                ht.locus.contig.replace('chr', ''),
+                hl.str(ht.locus.position),
+                hl.or_else(ht.rsid, '.') if 'rsid' in ht.row else '.',
+                ht.alleles[0],
+                hl.delimit(ht.alleles[1:], ','),
+                '.',
+                '.',
+                '.',
+            ],
+            '\t',
+        ),
+    )
+    ht.key_by().select('line').export(
+        lines_dir,
+        header=False,
+        parallel='separate_header',
+    )
+    shard_paths = sorted(
+        f.path
+        for f in hfs.ls(lines_dir)
+        if os.path.basename(f.path).startswith('part-')
+    )
+
+    payload_paths = []
+    vcf_out = None
+    num_rows = 0
+    try:
+        for shard_path in shard_paths:
+            with hfs.open(shard_path, 'r') as vcf_in:
+                for line in vcf_in:
+                    if num_rows % chunk_size == 0:
+                        if vcf_out is not None:
+                            vcf_out.close()
+                        payload_paths.append(
+                            os.path.join(
+                                checkpoint_dir,
+                                f'chunk_{len(payload_paths):05d}.vcf',
+                            ),
+                        )
+                        vcf_out = hfs.open(payload_paths[-1], 'w')
+                        vcf_out.writelines(reference_genome.allele_registry_vcf_header)
+                    vcf_out.write(line)
+                    num_rows += 1
+    finally:
+        if vcf_out is not None:
+            vcf_out.close()
+    logger.info(f'Wrote {num_rows} allele(s) to {len(payload_paths)} payload(s).')
+    with hfs.open(manifest_path, 'w') as f:
+        json.dump(payload_paths, f)
+    return payload_paths
+
+
+def register_vcf_payload(
+    payload_path: str,
+    reference_genome: ReferenceGenome,
+    base_url: str,
+) -> str:
+    root, _ = os.path.splitext(payload_path)
+    registered_alleles_path = f'{root}.tsv'
+    success_path = f'{root}._SUCCESS'
+    if hfs.exists(success_path):
+        logger.info(f'Skipping previously registered {payload_path}')
+        return registered_alleles_path
 
-    logger.info('Calling the ClinGen Allele Registry')
-    with hfs.open(formatted_vcf_file_name, 'r') as vcf_in:
+    logger.info(f'Calling the ClinGen Allele Registry with {payload_path}')
+    with hfs.open(payload_path, 'r') as vcf_in:
         data = vcf_in.read()
-        s = requests_retry_session()
-        res = s.put(
+    s = requests_retry_session()
+    with (
+        s.put(
             url=build_url(base_url, reference_genome),
             data=data,
             timeout=HTTP_REQUEST_TIMEOUT_S,
-        )
-        return handle_api_response(res, base_url, reference_genome)
+            stream=True,
+        ) as res,
+        hfs.open(registered_alleles_path, 'w') as tsv_out,
+    ):
+        tsv_out.write('locus\talleles\tCAID\n')
+        for registered_allele in parse_api_response(res, base_url, reference_genome):
+            tsv_out.write(registered_allele.tsv_line)
+    with hfs.open(success_path, 'w'):
+        pass
+    return registered_alleles_path
+
+
+def import_registered_alleles(
+    registered_alleles_path: str,
+    reference_genome: ReferenceGenome,
+) -> hl.Table:
+    ht = hl.import_table(
+        registered_alleles_path,
+        types={
+            'locus': hl.tlocus(reference_genome.value),
+            'alleles': hl.tarray(hl.tstr),
+            'CAID': hl.tstr,
+        },
+    )
+    return ht.key_by('locus', 'alleles')
 
 
 def build_url(base_url: str, reference_genome: ReferenceGenome) -> str:
@@ -124,25 +263,75 @@ def build_url(base_url: str, reference_genome: ReferenceGenome) -> str:
     return base_url + '&gbLogin=' + login + '&gbTime=' + gb_time + '&gbToken=' + token
 
 
-def handle_api_response(  # noqa: C901
+def iter_api_response(  # noqa: C901
+    res: requests.Response,
+    base_url: str,
+) -> Iterator[dict]:
+    """
+    Yields the allele responses as they are read off the wire, rather than
+    decoding the full (potentially very large) json array at once.
+    """
+    if not res.ok:
+        raise_api_error(res.json(), base_url)
+    text_decoder = codecs.getincrementaldecoder('utf-8')()
+    text_chunks = (
+        text_decoder.decode(chunk)
+        for chunk in res.iter_content(chunk_size=RESPONSE_CHUNK_SIZE_B)
+    )
+    json_decoder = json.JSONDecoder()
+    buffer, idx, in_array = '', 0, False
+    for text_chunk in text_chunks:
+        buffer = buffer[idx:] + text_chunk
+        idx = 0
+        if not in_array:
+            buffer = buffer.lstrip()
+            if not buffer:
+                continue
+            if not buffer.startswith('['):
+                # A request level error is returned as a single object.
+                raise_api_error(json.loads(buffer + ''.join(text_chunks)), base_url)
+            in_array = True
+        while True:
+            while idx < len(buffer) and buffer[idx] in JSON_ARRAY_DELIMITERS:
+                idx += 1
+            if idx == len(buffer):
+                break
+            try:
+                allele_response, idx = json_decoder.raw_decode(buffer, idx)
+            except json.JSONDecodeError:
+                # The element is incomplete, wait for the next chunk.
+                break
+            yield allele_response
+    if buffer[idx:].strip(JSON_ARRAY_DELIMITERS):
+        msg = f'Truncated response from {base_url}'
+        raise HTTPError(msg)
+
+
+def raise_api_error(response: dict, base_url: str) -> None:
+    error = AlleleRegistryError.from_api_response(response, base_url)
+    logger.error(error)
+    raise HTTPError(error.message)
+
+
+def parse_api_response(  # noqa: C901
     res: requests.Response,
     base_url: str,
     reference_genome: ReferenceGenome,
-) -> hl.Table:
-    response = res.json()
-    if not res.ok or 'errorType' in response:
-        error = AlleleRegistryError.from_api_response(response, base_url)
-        logger.error(error)
-        raise HTTPError(error.message)
-
-    parsed_structs = []
-    errors = []
-    unmappable_variants = []
-    for allele_response in response:
+) -> Iterator[RegisteredAllele]:
+    num_responses = 0
+    num_errors = 0
+    first_error = None
+    num_unmappable_variants = 0
+    first_unmappable_variant = None
+    for allele_response in iter_api_response(res, base_url):
+        num_responses += 1
         if 'errorType' in allele_response:
-            errors.append(
-                AlleleRegistryError.from_api_response(allele_response, base_url),
-            )
+            num_errors += 1
+            if first_error is None:
+                first_error = AlleleRegistryError.from_api_response(
+                    allele_response,
+                    base_url,
+                )
             continue
 
         # Extract CAID and allele info
@@ -158,7 +347,8 @@ def handle_api_response(  # noqa: C901
             ref = allele_info['coordinates'][0]['referenceAllele']
             alt = allele_info['coordinates'][0]['allele']
         except (KeyError, StopIteration):
-            unmappable_variants.append(allele_response)
+            num_unmappable_variants += 1
+            first_unmappable_variant = first_unmappable_variant or allele_response
             continue
 
         if ref == '' or alt == '':
@@ -169,7 +359,8 @@ def handle_api_response(  # noqa: C901
                 ][0]['id']
                 chrom, pos, ref, alt = gnomad_id.split('-')
             else:
-                unmappable_variants.append(allele_response)
+                num_unmappable_variants += 1
+                first_unmappable_variant = first_unmappable_variant or allele_response
                 continue
 
         formatted_chromosome = chrom
@@ -178,31 +369,41 @@ def handle_api_response(  # noqa: C901
             if chrom == 'MT':
                 formatted_chromosome = 'chrM'
 
-        struct = hl.Struct(
-            locus=hl.Locus(
-                formatted_chromosome,
-                int(pos),
-                reference_genome=reference_genome.value,
-            ),
+        yield RegisteredAllele(
+            contig=formatted_chromosome,
+            position=int(pos),
             alleles=[ref, alt],
             CAID=caid,
         )
-        parsed_structs.append(struct)
 
     logger.info(
-        f'{len(response) - len(errors)} out of {len(response)} variants returned CAID(s)',
+        f'{num_responses - num_errors} out of {num_responses} variants returned CAID(s)',
     )
-    if unmappable_variants:
+    if num_unmappable_variants:
         logger.info(
-            f'{len(unmappable_variants)} registered variant(s) cannot be mapped back to ours. '
-            f'\nFirst unmappable variant:\n{unmappable_variants[0]}',
+            f'{num_unmappable_variants} registered variant(s) cannot be mapped back to ours. '
+            f'\nFirst unmappable variant:\n{first_unmappable_variant}',
         )
-    if errors:
+    if num_errors:
         logger.warning(
-            f'{len(errors)} failed. First error: {errors[0]}',
+            f'{num_errors} failed. First error: {first_error}',
         )
+
+
+def handle_api_response(
+    res: requests.Response,
+    base_url: str,
+    reference_genome: ReferenceGenome,
+) -> hl.Table:
     return hl.Table.parallelize(
-        parsed_structs,
+        [
+            registered_allele.struct(reference_genome)
+            for registered_allele in parse_api_response(
+                res,
+                base_url,
+                reference_genome,
+            )
+        ],
         hl.tstruct(
             locus=hl.tlocus(reference_genome.value),
             alleles=hl.tarray(hl.tstr),
@@ -1,43 +1,109 @@
+import http.server
+import json
+import os
 import shutil
 import tempfile
-from unittest.mock import ANY, Mock, patch
+import threading
+from collections.abc import Callable
+from unittest.mock import Mock, patch
 
 import hail as hl
 import requests
 
 from v03_pipeline.lib.core import ReferenceGenome
 from v03_pipeline.lib.misc.allele_registry import (
-    HTTP_REQUEST_TIMEOUT_S as ALLELE_REGISTRY_TIMEOUT,
-)
-from v03_pipeline.lib.misc.allele_registry import (
-    register_alleles,
+    RegisteredAllele,
+    parse_api_response,
     register_alleles_in_chunks,
 )
 from v03_pipeline.lib.test.mocked_dataroot_testcase import MockedDatarootTestCase
 
-TEST_SERVER_URL = 'http://reg.test.genome.network/alleles?file=vcf&fields=none+@id'
+
+class StubAlleleRegistryHandler(http.server.BaseHTTPRequestHandler):
+    def do_PUT(self) -> None:  # noqa: N802
+        body = self.rfile.read(int(self.headers['Content-Length'])).decode()
+        self.server.request_bodies.append(body)
+        status, response = self.server.respond(body)
+        payload = json.dumps(response).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, *_) -> None:
+        pass
+
+
+class StubAlleleRegistryServer(http.server.ThreadingHTTPServer):
+    def __init__(self, respond: Callable[[str], tuple[int, dict | list]]):
+        super().__init__(('127.0.0.1', 0), StubAlleleRegistryHandler)
+        self.respond = respond
+        self.request_bodies = []
+
+    @property
+    def url(self) -> str:
+        return f'http://127.0.0.1:{self.server_port}/alleles?file=vcf&fields=none+@id'
+
+
+def registered_allele_response(vcf_line: str) -> dict:
+    chrom, pos, _, ref, alt, *_ = vcf_line.split('\t')
+    return {
+        '@id': f'http://reg.genome.network/allele/CA{pos}',
+        'genomicAlleles': [
+            {
+                'chromosome': chrom,
+                'coordinates': [
+                    {
+                        'allele': alt,
+                        'end': int(pos),
+                        'referenceAllele': ref,
+                        'start': int(pos) - 1,
+                    },
+                ],
+                'referenceGenome': 'GRCh38',
+            },
+        ],
+    }
+
+
+def vcf_data_lines(body: str) -> list[str]:
+    return [line for line in body.splitlines() if not line.startswith('#')]
 
 
 class AlleleRegistryTest(MockedDatarootTestCase):
     def setUp(self):
+        super().setUp()
         self.temp_dir = tempfile.TemporaryDirectory()
+        self.server = None
+        patcher = patch('v03_pipeline.lib.misc.allele_registry.Env')
+        self.mock_allele_registry_env = patcher.start()
+        self.addCleanup(patcher.stop)
+        self.mock_allele_registry_env.HAIL_TMP_DIR = self.temp_dir.name
+        self.mock_allele_registry_env.CLINGEN_ALLELE_REGISTRY_CONCURRENCY = 2
+        self.mock_allele_registry_env.CLINGEN_ALLELE_REGISTRY_LOGIN = ''
+        self.mock_allele_registry_env.CLINGEN_ALLELE_REGISTRY_PASSWORD = ''
 
     def tearDown(self):
+        super().tearDown()
+        if self.server:
+            self.server.shutdown()
+            self.server.server_close()
         shutil.rmtree(self.temp_dir.name)
 
-    @patch.object(requests.Session, 'put')
-    @patch('v03_pipeline.lib.misc.allele_registry.Env')
+    def start_server(
+        self,
+        respond: Callable[[str], tuple[int, dict | list]],
+    ) -> StubAlleleRegistryServer:
+        self.server = StubAlleleRegistryServer(respond)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        return self.server
+
     @patch('v03_pipeline.lib.misc.allele_registry.logger')
     def test_register_alleles_38(
         self,
         mock_logger: Mock,
-        mock_env: Mock,
-        mock_put_request: Mock,
     ):
-        mock_env.HAIL_TMP_DIR = self.temp_dir.name
-        mock_env.CLINGEN_ALLELE_REGISTRY_LOGIN = ''
-        mock_env.CLINGEN_ALLELE_REGISTRY_PASSWORD = ''
-
         new_variants_ht = hl.Table.parallelize(
             [
                 {
@@ -85,10 +151,7 @@ class AlleleRegistryTest(MockedDatarootTestCase):
             key=('locus', 'alleles'),
         )
 
-        mock_response = Mock()
-        mock_put_request.return_value = mock_response
-        mock_response.ok = True
-        mock_response.json.return_value = [
+        response = [
             {
                 '@id': 'http://reg.genome.network/allele/CA997563840',
                 'genomicAlleles': [
@@ -152,10 +215,11 @@ class AlleleRegistryTest(MockedDatarootTestCase):
             },
         ]
 
-        ar_ht = register_alleles(
+        server = self.start_server(lambda _: (200, response))
+        (ar_ht,) = register_alleles_in_chunks(
             new_variants_ht,
             ReferenceGenome.GRCh38,
-            TEST_SERVER_URL,
+            server.url,
         )
         self.assertEqual(
             ar_ht.collect(),
@@ -172,48 +236,120 @@ class AlleleRegistryTest(MockedDatarootTestCase):
                 ),
             ],
         )
-        mock_put_request.assert_called_once_with(
-            url=ANY,
-            data=f'{"".join(ReferenceGenome.GRCh38.allele_registry_vcf_header)}'
-            f'1\t10126\trs370233999\tTA\tT\t.\t.\t.\n'
-            f'1\t10128\trs370234000\tA\tG\t.\t.\t.\n'
-            f'1\t10129\trs370233997\tT\tTC\t.\t.\t.\n'
-            f'1\t10469\trs370233998\tC\tG\t.\t.\t.\n',
-            timeout=ALLELE_REGISTRY_TIMEOUT,
+        self.assertEqual(
+            server.request_bodies,
+            [
+                f'{"".join(ReferenceGenome.GRCh38.allele_registry_vcf_header)}'
+                f'1\t10126\trs370233999\tTA\tT\t.\t.\t.\n'
+                f'1\t10128\trs370234000\tA\tG\t.\t.\t.\n'
+                f'1\t10129\trs370233997\tT\tTC\t.\t.\t.\n'
+                f'1\t10469\trs370233998\tC\tG\t.\t.\t.\n',
+            ],
         )
         mock_logger.warning.assert_called_once_with(
             '1 failed. First error: \n'
-            'API URL: http://reg.test.genome.network/alleles?file=vcf&fields=none+@id\n'
+            f'API URL: {server.url}\n'
             'TYPE: InternalServerError\n'
             'DESCRIPTION: Given allele cannot be mapped in consistent way to reference genome.\n'
             'MESSAGE: 1\t10469\trs370233998\tC\tG\t.\t.\t.\n'
             'INPUT_LINE: Cannot align NC_000001.10 [10468,10469).',
         )
 
-    @patch('v03_pipeline.lib.misc.allele_registry.register_alleles')
-    def test_register_alleles_in_chunks(self, mock_register_alleles):
-        chunk_size = 10
+    def test_register_alleles_in_chunks(self):
         ht = hl.Table.parallelize(
-            [{'x': x} for x in range(chunk_size * 3 + 5)],  # 35 rows, expect 4 chunks
-            hl.tstruct(x=hl.tint32),
-            key='x',
+            [
+                {
+                    'locus': hl.Locus('chr1', x, 'GRCh38'),
+                    'alleles': ['A', 'C'],
+                }
+                for x in range(1, 36)
+            ],  # 35 rows, expect 4 chunks
+            hl.tstruct(
+                locus=hl.tlocus(ReferenceGenome.GRCh38.value),
+                alleles=hl.tarray(hl.tstr),
+            ),
+            key=('locus', 'alleles'),
         )
+        checkpoint_dir = os.path.join(self.temp_dir.name, 'run_1')
+        # Fail the last chunk so every other chunk has already been sent.
+        fail_chunk_containing = {'1\t35\t'}
 
-        # Instead of actually calling register_alleles, capture and assert on
-        # the value of 'x' in the first row of each chunk and number of rows in each chunk
-        def _side_effect(chunk_ht: hl.Table, *_):
-            value_in_first_row = hl.eval(chunk_ht.take(1)[0].x)
-            num_rows_in_chunk = chunk_ht.count()
-            return value_in_first_row, num_rows_in_chunk
+        def _respond(body: str) -> tuple[int, dict | list]:
+            lines = vcf_data_lines(body)
+            if any(line.startswith(tuple(fail_chunk_containing)) for line in lines):
+                return 400, {
+                    'description': 'Bad request',
+                    'errorType': 'BadRequest',
+                    'message': 'Bad request',
+                }
+            return 200, [registered_allele_response(line) for line in lines]
 
-        mock_register_alleles.side_effect = _side_effect
-        generator = register_alleles_in_chunks(
-            ht=ht,
-            reference_genome=ReferenceGenome.GRCh38,
-            base_url=TEST_SERVER_URL,
-            chunk_size=chunk_size,
+        server = self.start_server(_respond)
+        with self.assertRaises(requests.HTTPError):
+            list(
+                register_alleles_in_chunks(
+                    ht=ht,
+                    reference_genome=ReferenceGenome.GRCh38,
+                    base_url=server.url,
+                    chunk_size=10,
+                    checkpoint_dir=checkpoint_dir,
+                ),
+            )
+        self.assertEqual(
+            sorted(len(vcf_data_lines(body)) for body in server.request_bodies),
+            [5, 10, 10, 10],
+        )
+
+        # Only the failed chunk is re-sent when resuming.
+        server.request_bodies.clear()
+        fail_chunk_containing.clear()
+        ar_hts = list(
+            register_alleles_in_chunks(
+                ht=ht,
+                reference_genome=ReferenceGenome.GRCh38,
+                base_url=server.url,
+                chunk_size=10,
+                checkpoint_dir=checkpoint_dir,
+            ),
+        )
+        self.assertEqual(len(ar_hts), 4)
+        self.assertEqual(
+            [vcf_data_lines(body)[0] for body in server.request_bodies],
+            ['1\t31\t.\tA\tC\t.\t.\t.'],
+        )
+        self.assertEqual(
+            sorted(ar_hts[0].union(*ar_hts[1:]).CAID.collect()),
+            sorted(f'CA{x}' for x in range(1, 36)),
+        )
+
+    @patch('v03_pipeline.lib.misc.allele_registry.RESPONSE_CHUNK_SIZE_B', 16)
+    def test_parse_api_response_incrementally(self):
+        lines = [f'1\t{x}\t.\tA\tC\t.\t.\t.' for x in range(1, 4)]
+        server = self.start_server(
+            lambda _: (200, [registered_allele_response(line) for line in lines]),
+        )
+        with requests.put(server.url, data='', stream=True, timeout=10) as res:
+            self.assertEqual(
+                list(parse_api_response(res, server.url, ReferenceGenome.GRCh38)),
+                [
+                    RegisteredAllele('chr1', x, ['A', 'C'], f'CA{x}')
+                    for x in range(1, 4)
+                ],
+            )
+
+        server.respond = lambda _: (
+            200,
+            {
+                'description': 'Unauthorized',
+                'errorType': 'AuthorizationError',
+                'message': 'Bad login',
+            },
         )
-        self.assertEqual(list(generator), [(0, 10), (10, 10), (20, 10), (30, 5)])
+        with (
+            requests.put(server.url, data='', stream=True, timeout=10) as res,
+            self.assertRaisesRegex(requests.HTTPError, 'Bad login'),
+        ):
+            list(parse_api_response(res, server.url, ReferenceGenome.GRCh38))
 
     def test_register_alleles_in_chunks_no_new_variants(self):
         ht = hl.Table.parallelize(
@@ -224,7 +360,7 @@ class AlleleRegistryTest(MockedDatarootTestCase):
         empty_generator = register_alleles_in_chunks(
             ht=ht,
             reference_genome=ReferenceGenome.GRCh38,
-            base_url=TEST_SERVER_URL,
+            base_url='http://127.0.0.1/alleles',
         )
         with self.assertRaises(StopIteration):
             next(empty_generator)
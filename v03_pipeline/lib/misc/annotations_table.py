@@ -0,0 +1,110 @@
+import hail as hl
+import hailtop.fs as hfs
+
+from v03_pipeline.lib.core import DatasetType, Env, ReferenceGenome
+from v03_pipeline.lib.logger import get_logger
+from v03_pipeline.lib.misc.delta_tables import delta_table_paths, next_delta_table_path
+from v03_pipeline.lib.misc.io import write
+from v03_pipeline.lib.paths import (
+    variant_annotations_table_deltas_dir,
+    variant_annotations_table_path,
+)
+
+logger = get_logger(__name__)
+
+
+def variant_annotations_table_delta_paths(
+    reference_genome: ReferenceGenome,
+    dataset_type: DatasetType,
+) -> list[str]:
+    return delta_table_paths(
+        variant_annotations_table_deltas_dir(reference_genome, dataset_type),
+    )
+
+
+def merge_variant_annotations_table_delta(
+    ht: hl.Table,
+    delta_ht: hl.Table,
+) -> hl.Table:
+    # Delta rows replace any existing row with the same key and
+    # delta globals replace the table globals.
+    ht = ht.anti_join(delta_ht).union(delta_ht, unify=True)
+    return ht.select_globals(**delta_ht.index_globals())
+
+
+def read_variant_annotations_table(
+    reference_genome: ReferenceGenome,
+    dataset_type: DatasetType,
+) -> hl.Table:
+    """
+    Reads the variant annotations table with any uncompacted deltas
+    merged on top of it.
+    """
+    ht = hl.read_table(variant_annotations_table_path(reference_genome, dataset_type))
+    delta_hts = [
+        hl.read_table(delta_path)
+        for delta_path in variant_annotations_table_delta_paths(
+            reference_genome,
+            dataset_type,
+        )
+    ]
+    if not delta_hts:
+        return ht
+    # The table and its deltas are unioned once and the row from the most
+    # recent of them kept per key, rather than an anti join and union per
+    # delta.  The union is grouped by its existing key, which Hail aggregates
+    # within partitions rather than shuffling.
+    hts = [t.annotate(_delta_i=i) for i, t in enumerate([ht, *delta_hts])]
+    ht = hts[0].union(*hts[1:], unify=True)
+    ht = ht.group_by(*ht.key).aggregate(
+        _latest=hl.agg.take(ht.row_value, 1, ordering=-ht['_delta_i'])[0],
+    )
+    ht = ht.select(**ht['_latest'].drop('_delta_i'))
+    return ht.select_globals(**delta_hts[-1].index_globals())
+
+
+def write_variant_annotations_table_delta(
+    reference_genome: ReferenceGenome,
+    dataset_type: DatasetType,
+    delta_ht: hl.Table,
+) -> str:
+    delta_paths = variant_annotations_table_delta_paths(reference_genome, dataset_type)
+    delta_path = next_delta_table_path(
+        variant_annotations_table_deltas_dir(reference_genome, dataset_type),
+        delta_paths,
+    )
+    write(delta_ht, delta_path)
+    logger.info(f'Wrote variant annotations table delta {delta_path}')
+    if len(delta_paths) + 1 >= Env.VARIANT_ANNOTATIONS_TABLE_MAX_DELTAS:
+        compact_variant_annotations_table(reference_genome, dataset_type)
+    return delta_path
+
+
+def write_variant_annotations_table(
+    reference_genome: ReferenceGenome,
+    dataset_type: DatasetType,
+    ht: hl.Table,
+) -> None:
+    # NB: `write` checkpoints before overwriting, so `ht` may be derived from
+    # the table being overwritten.  Deltas are removed only after the write
+    # succeeds; re-applying a delta to a table it was merged into is a no-op.
+    write(ht, variant_annotations_table_path(reference_genome, dataset_type))
+    for delta_path in variant_annotations_table_delta_paths(
+        reference_genome,
+        dataset_type,
+    ):
+        hfs.rmtree(delta_path)
+
+
+def compact_variant_annotations_table(
+    reference_genome: ReferenceGenome,
+    dataset_type: DatasetType,
+) -> None:
+    logger.info(
+        f'Compacting {reference_genome.value} {dataset_type.value} variant annotations table deltas',
+    )
+    write_variant_annotations_table(
+        reference_genome,
+        dataset_type,
+        read_variant_annotations_table(reference_genome, dataset_type),
+    )
@@ -0,0 +1,84 @@
+from unittest.mock import patch
+
+import hail as hl
+
+from v03_pipeline.lib.core import DatasetType, ReferenceGenome
+from v03_pipeline.lib.misc.annotations_table import (
+    read_variant_annotations_table,
+    variant_annotations_table_delta_paths,
+    write_variant_annotations_table,
+    write_variant_annotations_table_delta,
+)
+from v03_pipeline.lib.test.mocked_dataroot_testcase import MockedDatarootTestCase
+
+
+def annotations_ht(rows: list[tuple[int, str]], max_key_: int) -> hl.Table:
+    return hl.Table.parallelize(
+        [{'variant_id': v, 'key_': k, 'gt_stats': f'{v}_{k}'} for k, v in rows],
+        hl.tstruct(variant_id=hl.tstr, key_=hl.tint64, gt_stats=hl.tstr),
+        key='variant_id',
+        globals=hl.Struct(max_key_=max_key_),
+    )
+
+
+class AnnotationsTableTest(MockedDatarootTestCase):
+    @patch('v03_pipeline.lib.misc.annotations_table.Env')
+    def test_variant_annotations_table_deltas(self, mock_env) -> None:
+        mock_env.VARIANT_ANNOTATIONS_TABLE_MAX_DELTAS = 3
+        write_variant_annotations_table(
+            ReferenceGenome.GRCh38,
+            DatasetType.GCNV,
+            annotations_ht([(0, 'a'), (1, 'b')], 1),
+        )
+        # Updates an existing row and adds a new one.
+        write_variant_annotations_table_delta(
+            ReferenceGenome.GRCh38,
+            DatasetType.GCNV,
+            annotations_ht([(1, 'b'), (2, 'c')], 2).annotate(
+                gt_stats='updated',
+            ),
+        )
+        write_variant_annotations_table_delta(
+            ReferenceGenome.GRCh38,
+            DatasetType.GCNV,
+            # Updates the row added by the previous delta.
+            annotations_ht([(2, 'c'), (3, 'd')], 3),
+        )
+        self.assertEqual(
+            len(
+                variant_annotations_table_delta_paths(
+                    ReferenceGenome.GRCh38,
+                    DatasetType.GCNV,
+                ),
+            ),
+            2,
+        )
+        ht = read_variant_annotations_table(ReferenceGenome.GRCh38, DatasetType.GCNV)
+        expected_rows = [
+            hl.Struct(variant_id='a', key_=0, gt_stats='a_0'),
+            hl.Struct(variant_id='b', key_=1, gt_stats='updated'),
+            hl.Struct(variant_id='c', key_=2, gt_stats='c_2'),
+            hl.Struct(variant_id='d', key_=3, gt_stats='d_3'),
+        ]
+        self.assertEqual(ht.collect(), expected_rows)
+        self.assertEqual(hl.eval(ht.max_key_), 3)
+
+        # The third delta triggers compaction.
+        write_variant_annotations_table_delta(
+            ReferenceGenome.GRCh38,
+            DatasetType.GCNV,
+            annotations_ht([(4, 'e')], 4),
+        )
+        self.assertEqual(
+            variant_annotations_table_delta_paths(
+                ReferenceGenome.GRCh38,
+                DatasetType.GCNV,
+            ),
+            [],
+        )
+        ht = read_variant_annotations_table(ReferenceGenome.GRCh38, DatasetType.GCNV)
+        self.assertEqual(
+            ht.collect(),
+            [*expected_rows, hl.Struct(variant_id='e', key_=4, gt_stats='e_4')],
+        )
+        self.assertEqual(hl.eval(ht.max_key_), 4)
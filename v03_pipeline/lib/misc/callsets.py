@@ -1,9 +1,9 @@
-import functools
-
 import hail as hl
 import hailtop.fs as hfs
 
-from v03_pipeline.lib.core import DatasetType, ReferenceGenome
+from v03_pipeline.lib.core import DatasetType, Env, ReferenceGenome
+from v03_pipeline.lib.misc.annotations_table import read_variant_annotations_table
+from v03_pipeline.lib.misc.io import checkpoint
 from v03_pipeline.lib.paths import (
     remapped_and_subsetted_callset_path,
     variant_annotations_table_path,
@@ -27,23 +27,59 @@ def get_callset_ht(
         ).rows()
         for project_guid in project_guids
     ]
-    callset_ht = functools.reduce(
-        (lambda ht1, ht2: ht1.union(ht2)),
-        callset_hts,
-    )
+    callset_ht = union_hts(callset_hts)
     return callset_ht.distinct()
 
 
-def union_callset_mts(callset_mts):
-    return functools.reduce(
-        (
-            lambda mt1, mt2: mt1.union_cols(
-                mt2,
-                row_join_type='outer',
-                drop_right_row_fields=True,
-            )
-        ),
-        callset_mts,
+def union_hts(
+    hts: list[hl.Table],
+    checkpoint_interval: int | None = None,
+) -> hl.Table:
+    """
+    Unions the tables with a single n-ary union rather than a left-deep
+    chain of pairwise unions, optionally checkpointing every
+    `checkpoint_interval` inputs to keep the plan shallow.
+    """
+    if checkpoint_interval is None:
+        checkpoint_interval = Env.CALLSET_UNION_CHECKPOINT_INTERVAL
+    if checkpoint_interval > 1 and len(hts) > checkpoint_interval:
+        hts = [
+            checkpoint(union_hts(hts[i : i + checkpoint_interval], 0))[0]
+            for i in range(0, len(hts), checkpoint_interval)
+        ]
+        return union_hts(hts, checkpoint_interval)
+    if len(hts) == 1:
+        return hts[0]
+    return hts[0].union(*hts[1:])
+
+
+def union_callset_mts(
+    callset_mts: list[hl.MatrixTable],
+    checkpoint_interval: int | None = None,
+) -> hl.MatrixTable:
+    """
+    Unions the columns of the callsets as a balanced binary tree of
+    outer joins, optionally checkpointing every `checkpoint_interval`
+    inputs.  As with a left-to-right fold, row fields are taken from the
+    first callset.
+    """
+    if checkpoint_interval is None:
+        checkpoint_interval = Env.CALLSET_UNION_CHECKPOINT_INTERVAL
+    if checkpoint_interval > 1 and len(callset_mts) > checkpoint_interval:
+        callset_mts = [
+            checkpoint(
+                union_callset_mts(callset_mts[i : i + checkpoint_interval], 0),
+            )[0]
+            for i in range(0, len(callset_mts), checkpoint_interval)
+        ]
+        return union_callset_mts(callset_mts, checkpoint_interval)
+    if len(callset_mts) == 1:
+        return callset_mts[0]
+    mid = len(callset_mts) // 2
+    return union_callset_mts(callset_mts[:mid], 0).union_cols(
+        union_callset_mts(callset_mts[mid:], 0),
+        row_join_type='outer',
+        drop_right_row_fields=True,
     )
 
 
@@ -100,11 +136,9 @@ def get_additional_row_fields(
             )
             and hl.eval(
                 hl.len(
-                    hl.read_table(
-                        variant_annotations_table_path(
-                            reference_genome,
-                            dataset_type,
-                        ),
+                    read_variant_annotations_table(
+                        reference_genome,
+                        dataset_type,
                     ).globals.updates,
                 )
                 > 0,
@@ -1,8 +1,12 @@
+import functools
+import shutil
+import tempfile
 import unittest
+from unittest.mock import patch
 
 import hail as hl
 
-from v03_pipeline.lib.misc.callsets import union_callset_mts
+from v03_pipeline.lib.misc.callsets import union_callset_mts, union_hts
 
 
 class CallsetsTest(unittest.TestCase):
@@ -85,3 +89,48 @@ class CallsetsTest(unittest.TestCase):
                 ),
             ],
         )
+
+    def test_union_callset_mts_balanced(self) -> None:
+        mts = [
+            hl.utils.range_matrix_table(n_rows=i + 2, n_cols=1)
+            .annotate_rows(row_field=i)
+            .annotate_cols(s=f'sample_{i}')
+            .key_cols_by('s')
+            .drop('col_idx')
+            .annotate_entries(GT=hl.Call([0, i % 2]))
+            for i in range(5)
+        ]
+        expected = functools.reduce(
+            (
+                lambda mt1, mt2: mt1.union_cols(
+                    mt2,
+                    row_join_type='outer',
+                    drop_right_row_fields=True,
+                )
+            ),
+            mts,
+        ).entries()
+        self.assertEqual(
+            union_callset_mts(mts, checkpoint_interval=0).entries().collect(),
+            expected.collect(),
+        )
+        temp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, temp_dir)
+        with patch('v03_pipeline.lib.misc.io.Env') as mock_env:
+            mock_env.HAIL_TMP_DIR = temp_dir
+            self.assertEqual(
+                union_callset_mts(mts, checkpoint_interval=2).entries().collect(),
+                expected.collect(),
+            )
+
+    def test_union_hts(self) -> None:
+        hts = [hl.utils.range_table(i + 1).annotate(i=i) for i in range(7)]
+        temp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, temp_dir)
+        with patch('v03_pipeline.lib.misc.io.Env') as mock_env:
+            mock_env.HAIL_TMP_DIR = temp_dir
+            for checkpoint_interval in [0, 3]:
+                self.assertCountEqual(
+                    union_hts(hts, checkpoint_interval).collect(),
+                    [hl.Struct(idx=j, i=i) for i in range(7) for j in range(i + 1)],
+                )
@@ -0,0 +1,65 @@
+import os
+import re
+import time
+
+import hailtop.fs as hfs
+
+from v03_pipeline.lib.core import Env
+from v03_pipeline.lib.logger import get_logger
+from v03_pipeline.lib.paths import checkpoints_dir
+
+CHECKPOINT_REGEX = (
+    r'^[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}\.(ht|mt)$'
+)
+
+logger = get_logger(__name__)
+
+
+def delete_checkpoints(path: str) -> None:
+    if hfs.exists(path):
+        logger.info(f'Deleting checkpoints at {path}')
+        hfs.rmtree(path)
+
+
+def last_modified(path: str) -> float | None:
+    # Object stores don't report directory modification times, so the
+    # newest file within the directory is used instead.
+    modification_times = [
+        last_modified(entry.path) if entry.is_dir() else entry.modification_time
+        for entry in hfs.ls(path)
+    ]
+    return max(
+        (t for t in modification_times if t is not None),
+        default=None,
+    )
+
+
+def delete_stale_checkpoints(max_age_s: int) -> None:
+    """
+    Removes checkpoints under HAIL_TMP_DIR last modified more than max_age_s
+    ago.  Run scoped checkpoints are deleted as their tasks succeed, so this
+    only finds those orphaned by failed runs or written outside of a run.
+    """
+    if not hfs.exists(Env.HAIL_TMP_DIR):
+        return
+    now = time.time()
+    for entry in hfs.ls(Env.HAIL_TMP_DIR):
+        if not re.match(CHECKPOINT_REGEX, os.path.basename(entry.path.rstrip('/'))):
+            continue
+        # Checkpoints still being written have no _SUCCESS file and are left
+        # alone.
+        success_path = os.path.join(entry.path, '_SUCCESS')
+        if not hfs.exists(success_path):
+            continue
+        if now - hfs.stat(success_path).modification_time < max_age_s:
+            continue
+        logger.info(f'Deleting stale checkpoint {entry.path}')
+        hfs.rmtree(entry.path)
+    if not hfs.exists(checkpoints_dir()):
+        return
+    for entry in hfs.ls(checkpoints_dir()):
+        modification_time = last_modified(entry.path)
+        if modification_time is not None and now - modification_time < max_age_s:
+            continue
+        logger.info(f'Deleting stale run checkpoints {entry.path}')
+        hfs.rmtree(entry.path)
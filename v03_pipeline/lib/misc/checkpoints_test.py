@@ -0,0 +1,72 @@
+import os
+import shutil
+import tempfile
+import time
+import unittest
+from unittest import mock
+
+from v03_pipeline.lib.misc.checkpoints import delete_stale_checkpoints
+
+
+class CheckpointsTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.tmp_dir = tempfile.mkdtemp()
+
+    def tearDown(self) -> None:
+        shutil.rmtree(self.tmp_dir)
+
+    def _touch(self, path: str, age_s: int = 0) -> None:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w'):
+            pass
+        t = time.time() - age_s
+        os.utime(path, (t, t))
+
+    def test_delete_stale_checkpoints(self) -> None:
+        stale = os.path.join(
+            self.tmp_dir,
+            '0f8e1b1e-2a3c-4b5d-8e9f-0a1b2c3d4e5f.mt',
+        )
+        fresh = os.path.join(
+            self.tmp_dir,
+            '1f8e1b1e-2a3c-4b5d-8e9f-0a1b2c3d4e5f.ht',
+        )
+        in_progress = os.path.join(
+            self.tmp_dir,
+            '2f8e1b1e-2a3c-4b5d-8e9f-0a1b2c3d4e5f.ht',
+        )
+        other = os.path.join(self.tmp_dir, 'not_a_checkpoint.ht')
+        self._touch(os.path.join(stale, '_SUCCESS'), 60 * 60)
+        self._touch(os.path.join(fresh, '_SUCCESS'))
+        self._touch(os.path.join(in_progress, 'metadata.json.gz'), 60 * 60)
+        self._touch(os.path.join(other, '_SUCCESS'), 60 * 60)
+
+        checkpoints_dir = os.path.join(self.tmp_dir, 'checkpoints')
+        self._touch(
+            os.path.join(checkpoints_dir, 'stale_run', 'task_1', 'abc.ht', '_SUCCESS'),
+            60 * 60,
+        )
+        self._touch(
+            os.path.join(checkpoints_dir, 'active_run', 'task_1', 'abc.ht', '_SUCCESS'),
+            60 * 60,
+        )
+        self._touch(
+            os.path.join(checkpoints_dir, 'active_run', 'task_2', 'def.ht', 'part-0'),
+        )
+        with (
+            mock.patch('v03_pipeline.lib.misc.checkpoints.Env') as mock_env,
+            mock.patch(
+                'v03_pipeline.lib.misc.checkpoints.checkpoints_dir',
+                return_value=checkpoints_dir,
+            ),
+        ):
+            mock_env.HAIL_TMP_DIR = self.tmp_dir
+            delete_stale_checkpoints(60)
+        self.assertCountEqual(
+            os.listdir(self.tmp_dir),
+            [
+                os.path.basename(path)
+                for path in [fresh, in_progress, other, checkpoints_dir]
+            ],
+        )
+        self.assertEqual(os.listdir(checkpoints_dir), ['active_run'])
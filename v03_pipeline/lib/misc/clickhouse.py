@@ -3,17 +3,23 @@ import functools
 import hashlib
 import math
 import os
+import re
+import threading
 import time
+import uuid
 from collections.abc import Callable
+from concurrent.futures import FIRST_EXCEPTION, ThreadPoolExecutor, wait
 from dataclasses import dataclass
 from enum import StrEnum
 from string import Template
 
 from clickhouse_driver import Client
+from clickhouse_driver.errors import NetworkError, SocketTimeoutError
 
 from v03_pipeline.lib.core import DatasetType, ReferenceGenome
 from v03_pipeline.lib.core.environment import Env
 from v03_pipeline.lib.logger import get_logger
+from v03_pipeline.lib.misc.instrumentation import timed_operation
 from v03_pipeline.lib.misc.retry import retry
 from v03_pipeline.lib.paths import (
     new_entries_parquet_path,
@@ -29,6 +35,12 @@ OPTIMIZE_TABLE_TIMEOUT_S = 99999
 WAIT_VIEW_TIMEOUT_S = 900
 REDACTED = 'REDACTED'
 STAGING_CLICKHOUSE_DATABASE = 'staging'
+CLIENT_HEALTH_CHECK_INTERVAL_S = 60
+CONNECTION_ERRORS = (NetworkError, SocketTimeoutError, EOFError, ConnectionError)
+READ_ONLY_QUERY_REGEX = r'^\s*(SELECT|WITH|SHOW|EXISTS|DESCRIBE|DESC)\b'
+
+_CLIENT_POOL: dict[tuple, 'PooledClient'] = {}
+_CLIENT_POOL_LOCK = threading.Lock()
 
 
 class ClickHouseTable(StrEnum):
@@ -184,6 +196,22 @@ class ClickHouseMaterializedView(StrEnum):
 ClickHouseEntity = ClickHouseDictionary | ClickHouseTable | ClickHouseMaterializedView
 
 
+def run_id_hash(run_id: str) -> str:
+    # Note: encountered length issues with the default
+    # run ids generated by the pipeline.  ClickHouse performed
+    # well with staging Tables with the long run ids, but failed
+    # to recognized staging Dictionaries.
+    sha256 = hashlib.sha256()
+    sha256.update(run_id.encode())
+    return sha256.hexdigest()[:8]
+
+
+def staging_database(run_id: str) -> str:
+    # Each run stages into its own database so that concurrent runs
+    # never create or drop each other's staging tables.
+    return f'{STAGING_CLICKHOUSE_DATABASE}_{run_id_hash(run_id)}'
+
+
 @dataclass
 class TableNameBuilder:
     reference_genome: ReferenceGenome
@@ -192,13 +220,11 @@ class TableNameBuilder:
 
     @property
     def run_id_hash(self):
-        # Note: encountered length issues with the default
-        # run ids generated by the pipeline.  ClickHouse performed
-        # well with staging Tables with the long run ids, but failed
-        # to recognized staging Dictionaries.
-        sha256 = hashlib.sha256()
-        sha256.update(self.run_id.encode())
-        return sha256.hexdigest()[:8]
+        return run_id_hash(self.run_id)
+
+    @property
+    def staging_database(self):
+        return staging_database(self.run_id)
 
     @property
     def dst_prefix(self):
@@ -209,7 +235,7 @@ class TableNameBuilder:
 
     @property
     def staging_dst_prefix(self):
-        return f'{STAGING_CLICKHOUSE_DATABASE}.`{self.run_id_hash}/{self.reference_genome.value}/{self.dataset_type.value}'
+        return f'{self.staging_database}.`{self.run_id_hash}/{self.reference_genome.value}/{self.dataset_type.value}'
 
     def staging_dst_table(self, clickhouse_table: ClickHouseTable):
         return f'{self.staging_dst_prefix}/{clickhouse_table.value}`'
@@ -392,10 +418,10 @@ class ClickhouseReferenceDataset(StrEnum):
         )[0][0]
         if not exists_seqr_variants:
             return
-        drop_staging_db()
+        drop_staging_db(table_name_builder.run_id)
         logged_query(
             f"""
-            CREATE DATABASE {STAGING_CLICKHOUSE_DATABASE}
+            CREATE DATABASE {table_name_builder.staging_database}
             """,
         )
         logged_query(
@@ -462,19 +488,77 @@ class ClickhouseReferenceDataset(StrEnum):
 
 
 def logged_query(query, params=None, timeout: int | None = None):
-    client = get_clickhouse_client(timeout)
     sanitized_query = query
     if Env.CLICKHOUSE_WRITER_PASSWORD:
         sanitized_query = sanitized_query.replace(
             Env.CLICKHOUSE_WRITER_PASSWORD,
             REDACTED,
         )
-    logger.info(f'Executing query: {sanitized_query} | Params: {params}')
-    return client.execute(query, params)
+    query_id = str(uuid.uuid4())
+    logger.info(
+        f'Executing query {query_id}: {sanitized_query} | Params: {params}',
+    )
+    with timed_operation('clickhouse_query', query_id=query_id) as op:
+        pooled_client = get_pooled_clickhouse_client(timeout)
+        try:
+            # Connecting is separated from executing so that a dropped
+            # connection (restart, idle timeout, etc) found before anything is
+            # sent can always be re-established.
+            pooled_client.client.connection.force_connect()
+        except CONNECTION_ERRORS:
+            logger.exception('ClickHouse connection failed, reconnecting')
+            evict_pooled_clickhouse_client(timeout)
+            pooled_client = get_pooled_clickhouse_client(timeout)
+        try:
+            result = pooled_client.client.execute(query, params, query_id=query_id)
+        except CONNECTION_ERRORS:
+            evict_pooled_clickhouse_client(timeout)
+            # The server may have applied the query before the connection
+            # dropped, and INSERT ... SELECT, ATTACH PARTITION, EXCHANGE TABLES
+            # etc. aren't idempotent, so only reads are re-issued.
+            if not re.match(READ_ONLY_QUERY_REGEX, query, re.IGNORECASE):
+                raise
+            logger.exception('ClickHouse connection failed, re-issuing read')
+            pooled_client = get_pooled_clickhouse_client(timeout)
+            result = pooled_client.client.execute(query, params, query_id=query_id)
+        last_query = pooled_client.client.last_query
+        if last_query is not None:
+            op['read_rows'] = last_query.progress.rows
+            op['written_rows'] = last_query.progress.written_rows
+        return result
+
+
+def query_log_stats(query_ids: list[str]) -> dict[str, dict]:
+    """
+    Returns the rows read, memory used and duration of the finished queries,
+    from system.query_log.  NB: queried directly rather than through
+    logged_query, so that it is not itself recorded.
+    """
+    # NB: the query log is flushed periodically rather than forced here,
+    # so the most recent queries may be missing.  Their read and written
+    # rows are still recorded from the query's progress by logged_query.
+    rows = get_pooled_clickhouse_client().client.execute(
+        """
+        SELECT query_id, read_rows, written_rows, memory_usage, query_duration_ms
+        FROM system.query_log
+        WHERE type = 'QueryFinish' AND query_id IN %(query_ids)s
+        """,
+        # A tuple is rendered as a set, e.g. ('a', 'b'), rather than an array.
+        {'query_ids': tuple(query_ids)},
+    )
+    return {
+        query_id: {
+            'read_rows': read_rows,
+            'written_rows': written_rows,
+            'memory_usage': memory_usage,
+            'query_duration_ms': query_duration_ms,
+        }
+        for query_id, read_rows, written_rows, memory_usage, query_duration_ms in rows
+    }
 
 
-def drop_staging_db():
-    logged_query(f'DROP DATABASE IF EXISTS {STAGING_CLICKHOUSE_DATABASE};')
+def drop_staging_db(run_id: str):
+    logged_query(f'DROP DATABASE IF EXISTS {staging_database(run_id)};')
 
 
 def create_staging_tables(
@@ -483,7 +567,7 @@ def create_staging_tables(
 ) -> None:
     logged_query(
         f"""
-        CREATE DATABASE {STAGING_CLICKHOUSE_DATABASE}
+        CREATE DATABASE {table_name_builder.staging_database}
         """,
     )
     for clickhouse_table in clickhouse_tables:
@@ -548,7 +632,7 @@ def get_partitions_for_projects(
             AND multiSearchAny(partition, %(project_guids)s)
         """,
         {
-            'database': STAGING_CLICKHOUSE_DATABASE
+            'database': table_name_builder.staging_database
             if staging
             else Env.CLICKHOUSE_DATABASE,
             'table': (
@@ -564,6 +648,38 @@ def get_partitions_for_projects(
     return [normalize_partition(row[0]) for row in rows]
 
 
+def get_partition_ids_for_projects(
+    table_name_builder: TableNameBuilder,
+    clickhouse_table: ClickHouseTable,
+    project_guids: list[str],
+    staging=False,
+) -> list[str]:
+    rows = logged_query(
+        """
+        SELECT DISTINCT partition_id
+        FROM system.parts
+        WHERE
+            database = %(database)s
+            AND table = %(table)s
+            AND multiSearchAny(partition, %(project_guids)s)
+        """,
+        {
+            'database': table_name_builder.staging_database
+            if staging
+            else Env.CLICKHOUSE_DATABASE,
+            'table': (
+                table_name_builder.staging_dst_table(clickhouse_table)
+                if staging
+                else table_name_builder.dst_table(clickhouse_table)
+            )
+            .split('.')[1]
+            .replace('`', ''),
+            'project_guids': project_guids,
+        },
+    )
+    return [row[0] for row in rows]
+
+
 def create_staging_materialized_views(
     table_name_builder: TableNameBuilder,
     clickhouse_mvs: list[ClickHouseMaterializedView],
@@ -580,6 +696,46 @@ def create_staging_materialized_views(
         logged_query(create_table_statement)
 
 
+def run_partition_queries(
+    query: str,
+    partitions: list[tuple],
+) -> None:
+    # Partition-level ALTERs are independent of each other, so they are issued
+    # concurrently (each worker thread holds its own pooled connection).  All
+    # statements complete (or the first failure is raised) before returning,
+    # preserving ordering with respect to any subsequent steps of the flow.
+    # As in the sequential case, no statement is started after a failure.
+    thread_idents = set()
+
+    def run(partition: tuple) -> None:
+        thread_idents.add(threading.get_ident())
+        start_time = time.monotonic()
+        logged_query(query, {'partition': partition})
+        logger.info(
+            f'Partition {partition} completed in {time.monotonic() - start_time:.2f}s',
+        )
+
+    if Env.CLICKHOUSE_PARTITION_OPERATION_CONCURRENCY <= 1 or len(partitions) <= 1:
+        for partition in partitions:
+            run(partition)
+        return
+    with ThreadPoolExecutor(
+        max_workers=Env.CLICKHOUSE_PARTITION_OPERATION_CONCURRENCY,
+    ) as executor:
+        futures = [executor.submit(run, partition) for partition in partitions]
+        try:
+            _, not_done = wait(futures, return_when=FIRST_EXCEPTION)
+            for future in not_done:
+                future.cancel()
+            # Statements already running are waited on before raising.
+            wait(not_done)
+            for future in futures:
+                if future.done() and not future.cancelled() and future.exception():
+                    raise future.exception()
+        finally:
+            close_pooled_clickhouse_clients(thread_idents)
+
+
 # Note that this function is NOT idemptotent.  Clickhouse permits
 # attaching the same partition to a table multiple times.
 def stage_existing_project_partitions(
@@ -599,20 +755,19 @@ def stage_existing_project_partitions(
                 """,
             )
             continue
-        for partition in get_partitions_for_projects(
-            table_name_builder,
-            clickhouse_table,
-            project_guids,
-        ):
-            # Note that ClickHouse successfully handles the case where the project
-            # does not already exist in the dst table.  We simply attach an empty partition!
-            logged_query(
-                f"""
-                ALTER TABLE {table_name_builder.staging_dst_table(clickhouse_table)}
-                ATTACH PARTITION %(partition)s FROM {table_name_builder.dst_table(clickhouse_table)}
-                """,
-                {'partition': partition},
-            )
+        # Note that ClickHouse successfully handles the case where the project
+        # does not already exist in the dst table.  We simply attach an empty partition!
+        run_partition_queries(
+            f"""
+            ALTER TABLE {table_name_builder.staging_dst_table(clickhouse_table)}
+            ATTACH PARTITION %(partition)s FROM {table_name_builder.dst_table(clickhouse_table)}
+            """,
+            get_partitions_for_projects(
+                table_name_builder,
+                clickhouse_table,
+                project_guids,
+            ),
+        )
 
 
 def delete_existing_families_from_staging_entries(
@@ -677,64 +832,121 @@ def insert_new_entries(
     )
 
 
-@retry(tries=2)
+@dataclass
+class MergeProgress:
+    merges_running: int
+    min_progress: float
+    estimated_remaining_s: float
+
+
+def get_merge_progress(
+    table_name_builder: TableNameBuilder,
+    clickhouse_table: ClickHouseTable,
+    partition_ids: list[str],
+) -> MergeProgress:
+    return MergeProgress(
+        *logged_query(
+            """
+            SELECT
+                count(),
+                ifNull(min(progress), 1),
+                ifNull(max(if(progress > 0, elapsed * (1 - progress) / progress, 0)), 0)
+            FROM system.merges
+            WHERE database = %(database)s
+            AND table = %(table)s
+            AND has(%(partition_ids)s, partition_id)
+            """,
+            {
+                'database': table_name_builder.staging_database,
+                'table': table_name_builder.staging_dst_table(clickhouse_table)
+                .split('.')[1]
+                .replace('`', ''),
+                'partition_ids': partition_ids,
+            },
+        )[0],
+    )
+
+
+@retry(tries=2, no_retry=(TimeoutError,))
 def optimize_entries(
     table_name_builder: TableNameBuilder,
     project_guids: list[str],
+    deadline_s: int | None = None,
 ) -> None:
-    safely_optimized = False
-    while not safely_optimized:
+    # Waits for the collapsing merges of the targeted project partitions with an
+    # adaptive backoff: polling starts sub-second, doubles while nothing changes
+    # (capped at CLICKHOUSE_OPTIMIZE_TABLE_WAIT_S) and, while merges are running,
+    # sleeps roughly as long as system.merges estimates they have left.
+    table_name = table_name_builder.staging_dst_table(ClickHouseTable.ENTRIES)
+    deadline = time.monotonic() + (
+        deadline_s
+        if deadline_s is not None
+        else Env.CLICKHOUSE_OPTIMIZE_TABLE_DEADLINE_S
+    )
+    partition_ids = get_partition_ids_for_projects(
+        table_name_builder,
+        ClickHouseTable.ENTRIES,
+        project_guids,
+        staging=True,
+    )
+    if not partition_ids:
+        return
+    wait_s = Env.CLICKHOUSE_OPTIMIZE_TABLE_MIN_WAIT_S
+    while True:
         decrs_exist = logged_query(
             f"""
             SELECT EXISTS (
                 SELECT 1
-                FROM {table_name_builder.staging_dst_table(ClickHouseTable.ENTRIES)}
+                FROM {table_name}
                 WHERE sign = -1
+                AND has(%(partition_ids)s, _partition_id)
             );
             """,
+            {'partition_ids': partition_ids},
         )[0][0]
-        merges_running = logged_query(
-            """
-            SELECT EXISTS (
-                SELECT 1
-                FROM system.merges
-                WHERE database = %(database)s
-                AND table = %(table)s
-            );
-            """,
-            {
-                'database': STAGING_CLICKHOUSE_DATABASE,
-                'table': table_name_builder.staging_dst_table(ClickHouseTable.ENTRIES)
-                .split('.')[1]
-                .replace('`', ''),
-            },
-        )[0][0]
-        if decrs_exist:
-            if merges_running:
-                logger.info('Decrs exist and merges are running, so waiting')
-            else:
-                logger.info('Decrs exist and no merges are running, so optimizing')
-                partitions = get_partitions_for_projects(
-                    table_name_builder,
-                    ClickHouseTable.ENTRIES,
-                    project_guids,
-                    staging=True,
-                )
-                table_name = table_name_builder.staging_dst_table(
-                    ClickHouseTable.ENTRIES,
-                )
-                optimize_statements = [
-                    f'OPTIMIZE TABLE {table_name} PARTITION {partition} FINAL'
-                    for partition in partitions
-                ]
-                parallel_optimize_sql = '\nPARALLEL WITH\n'.join(optimize_statements)
-                logged_query(
-                    parallel_optimize_sql,
-                    timeout=OPTIMIZE_TABLE_TIMEOUT_S,
-                )
-            time.sleep(Env.CLICKHOUSE_OPTIMIZE_TABLE_WAIT_S)
+        if not decrs_exist:
+            return
+        merge_progress = get_merge_progress(
+            table_name_builder,
+            ClickHouseTable.ENTRIES,
+            partition_ids,
+        )
+        if merge_progress.merges_running:
+            logger.info(
+                f'Decrs exist and {merge_progress.merges_running} merges are running '
+                f'(min progress {merge_progress.min_progress:.2%}, '
+                f'~{merge_progress.estimated_remaining_s:.1f}s remaining), so waiting',
+            )
+            if merge_progress.estimated_remaining_s:
+                wait_s = merge_progress.estimated_remaining_s
         else:
-            safely_optimized = True
+            logger.info('Decrs exist and no merges are running, so optimizing')
+            partitions = get_partitions_for_projects(
+                table_name_builder,
+                ClickHouseTable.ENTRIES,
+                project_guids,
+                staging=True,
+            )
+            optimize_statements = [
+                f'OPTIMIZE TABLE {table_name} PARTITION {partition} FINAL'
+                for partition in partitions
+            ]
+            parallel_optimize_sql = '\nPARALLEL WITH\n'.join(optimize_statements)
+            logged_query(
+                parallel_optimize_sql,
+                timeout=OPTIMIZE_TABLE_TIMEOUT_S,
+            )
+            # OPTIMIZE ... FINAL is synchronous, so re-check promptly.
+            wait_s = Env.CLICKHOUSE_OPTIMIZE_TABLE_MIN_WAIT_S
+        wait_s = min(
+            max(wait_s, Env.CLICKHOUSE_OPTIMIZE_TABLE_MIN_WAIT_S),
+            Env.CLICKHOUSE_OPTIMIZE_TABLE_WAIT_S,
+        )
+        if time.monotonic() + wait_s > deadline:
+            msg = f'Timed out waiting for {table_name} partitions {partition_ids} to merge'
+            raise TimeoutError(msg)
+        time.sleep(wait_s)
+        wait_s *= 2
 
 
 @retry(tries=2)
@@ -820,19 +1032,18 @@ def replace_project_partitions(
     project_guids: list[str],
 ) -> None:
     for clickhouse_table in clickhouse_tables:
-        for partition in get_partitions_for_projects(
-            table_name_builder,
-            clickhouse_table,
-            project_guids,
-            staging=True,
-        ):
-            logged_query(
-                f"""
-                ALTER TABLE {table_name_builder.dst_table(clickhouse_table)}
-                REPLACE PARTITION %(partition)s FROM {table_name_builder.staging_dst_table(clickhouse_table)}
-                """,
-                {'partition': partition},
-            )
+        run_partition_queries(
+            f"""
+            ALTER TABLE {table_name_builder.dst_table(clickhouse_table)}
+            REPLACE PARTITION %(partition)s FROM {table_name_builder.staging_dst_table(clickhouse_table)}
+            """,
+            get_partitions_for_projects(
+                table_name_builder,
+                clickhouse_table,
+                project_guids,
+                staging=True,
+            ),
+        )
 
 
 # Note this is NOT idempotent, as running the swap twice will
@@ -855,10 +1066,10 @@ def direct_insert_annotations(
 ) -> None:
     dst_table = table_name_builder.dst_table(ClickHouseTable.ANNOTATIONS_MEMORY)
     src_table = table_name_builder.src_table(ClickHouseTable.ANNOTATIONS_MEMORY)
-    drop_staging_db()
+    drop_staging_db(table_name_builder.run_id)
     logged_query(
         f"""
-        CREATE DATABASE {STAGING_CLICKHOUSE_DATABASE}
+        CREATE DATABASE {table_name_builder.staging_database}
         """,
     )
     # NB: Unfortunately there's a bug(?) or inaccuracy if this is attempted without an intermediate
@@ -894,7 +1105,7 @@ def direct_insert_annotations(
         FROM {src_table} WHERE {ClickHouseTable.ANNOTATIONS_MEMORY.key_field} IN {table_name_builder.staging_dst_prefix}/_tmp_loadable_keys`
         """,
     )
-    drop_staging_db()
+    drop_staging_db(table_name_builder.run_id)
 
 
 def direct_insert_all_keys(
@@ -939,7 +1150,7 @@ def finalize_refresh_flow(
             dataset_type,
         ),
     )
-    drop_staging_db()
+    drop_staging_db(table_name_builder.run_id)
     reload_dictionaries(
         table_name_builder,
         ClickHouseDictionary.for_dataset_type(dataset_type),
@@ -953,7 +1164,7 @@ def atomic_insert_entries(
     **_,
 ) -> None:
     dataset_type = table_name_builder.dataset_type
-    drop_staging_db()
+    drop_staging_db(table_name_builder.run_id)
     create_staging_tables(
         table_name_builder,
         ClickHouseTable.for_dataset_type_atomic_entries_update(dataset_type),
@@ -1053,7 +1264,7 @@ def delete_family_guids(
         logger.info(msg)
         return
     project_guids = [project_guid]
-    drop_staging_db()
+    drop_staging_db(table_name_builder.run_id)
     create_staging_tables(
         table_name_builder,
         ClickHouseTable.for_dataset_type_atomic_entries_update(dataset_type),
@@ -1102,7 +1313,7 @@ def rebuild_gt_stats(
         dataset_type,
         run_id,
     )
-    drop_staging_db()
+    drop_staging_db(table_name_builder.run_id)
     create_staging_tables(
         table_name_builder,
         ClickHouseTable.for_dataset_type_atomic_entries_update(dataset_type),
@@ -1120,19 +1331,18 @@ def rebuild_gt_stats(
             dataset_type,
         ),
     )
-    for partition in get_partitions_for_projects(
-        table_name_builder,
-        ClickHouseTable.PROJECT_GT_STATS,
-        project_guids,
-        staging=True,
-    ):
-        logged_query(
-            f"""
-            ALTER TABLE {table_name_builder.staging_dst_table(ClickHouseTable.PROJECT_GT_STATS)}
-            DROP PARTITION %(partition)s
-            """,
-            {'partition': partition},
-        )
+    run_partition_queries(
+        f"""
+        ALTER TABLE {table_name_builder.staging_dst_table(ClickHouseTable.PROJECT_GT_STATS)}
+        DROP PARTITION %(partition)s
+        """,
+        get_partitions_for_projects(
+            table_name_builder,
+            ClickHouseTable.PROJECT_GT_STATS,
+            project_guids,
+            staging=True,
+        ),
+    )
     select_statement = get_create_mv_statements(
         table_name_builder,
         ClickHouseMaterializedView.ENTRIES_TO_PROJECT_GT_STATS_MV,
@@ -1208,3 +1418,63 @@ def get_clickhouse_client(
         if timeout
         else {},
     )
+
+
+@dataclass
+class PooledClient:
+    client: Client
+    last_checked: float
+
+
+def _client_pool_key(
+    timeout: int | None = None,
+    database: str | None = None,
+) -> tuple:
+    # clickhouse_driver clients are neither thread nor fork safe, so
+    # connections are never shared across threads or processes.
+    return (os.getpid(), threading.get_ident(), timeout, database)
+
+
+def get_pooled_clickhouse_client(
+    timeout: int | None = None,
+    database: str | None = None,
+) -> PooledClient:
+    key = _client_pool_key(timeout, database)
+    with _CLIENT_POOL_LOCK:
+        pooled_client = _CLIENT_POOL.get(key)
+        if pooled_client is None:
+            pooled_client = PooledClient(
+                get_clickhouse_client(timeout, database),
+                time.monotonic(),
+            )
+            _CLIENT_POOL[key] = pooled_client
+            return pooled_client
+    if time.monotonic() - pooled_client.last_checked > CLIENT_HEALTH_CHECK_INTERVAL_S:
+        connection = pooled_client.client.connection
+        if connection.connected and not connection.ping():
+            logger.info('Pooled ClickHouse connection failed health check')
+            connection.disconnect()
+        pooled_client.last_checked = time.monotonic()
+    return pooled_client
+
+
+def evict_pooled_clickhouse_client(
+    timeout: int | None = None,
+    database: str | None = None,
+) -> None:
+    with _CLIENT_POOL_LOCK:
+        pooled_client = _CLIENT_POOL.pop(_client_pool_key(timeout, database), None)
+    if pooled_client is not None:
+        pooled_client.client.disconnect()
+
+
+def close_pooled_clickhouse_clients(thread_idents: set[int] | None = None) -> None:
+    with _CLIENT_POOL_LOCK:
+        keys = [
+            key
+            for key in _CLIENT_POOL
+            if thread_idents is None or key[1] in thread_idents
+        ]
+        pooled_clients = [_CLIENT_POOL.pop(key) for key in keys]
+    for pooled_client in pooled_clients:
+        pooled_client.client.disconnect()
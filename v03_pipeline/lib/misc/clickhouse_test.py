@@ -1,19 +1,20 @@
 import os
-from unittest.mock import patch
+from unittest.mock import Mock, patch
 
 import pandas as pd
 import pyarrow as pa
 import pyarrow.parquet as pq
+from clickhouse_driver.errors import NetworkError
 
 from v03_pipeline.lib.core import DatasetType, ReferenceGenome
 from v03_pipeline.lib.core.environment import Env
 from v03_pipeline.lib.misc.clickhouse import (
-    STAGING_CLICKHOUSE_DATABASE,
     ClickHouseDictionary,
     ClickHouseMaterializedView,
     ClickhouseReferenceDataset,
     ClickHouseTable,
     TableNameBuilder,
+    close_pooled_clickhouse_clients,
     create_staging_materialized_views,
     create_staging_tables,
     delete_existing_families_from_staging_entries,
@@ -21,6 +22,7 @@ from v03_pipeline.lib.misc.clickhouse import (
     direct_insert_all_keys,
     exchange_tables,
     get_clickhouse_client,
+    get_pooled_clickhouse_client,
     insert_new_entries,
     load_complete_run,
     logged_query,
@@ -30,7 +32,9 @@ from v03_pipeline.lib.misc.clickhouse import (
     refresh_materialized_views,
     reload_dictionaries,
     replace_project_partitions,
+    run_partition_queries,
     stage_existing_project_partitions,
+    staging_database,
 )
 from v03_pipeline.lib.paths import (
     new_entries_parquet_path,
@@ -49,7 +53,7 @@ class ClickhouseTest(MockedDatarootTestCase):
         client = get_clickhouse_client()
         client.execute(
             f"""
-            DROP DATABASE IF EXISTS {STAGING_CLICKHOUSE_DATABASE};
+            DROP DATABASE IF EXISTS {staging_database(TEST_RUN_ID)};
             """,
         )
         client.execute(
@@ -473,7 +477,7 @@ class ClickhouseTest(MockedDatarootTestCase):
         )
         client.execute(
             f"""
-            DROP DATABASE IF EXISTS {STAGING_CLICKHOUSE_DATABASE};
+            DROP DATABASE IF EXISTS {staging_database(TEST_RUN_ID)};
             """,
         )
 
@@ -482,6 +486,116 @@ class ClickhouseTest(MockedDatarootTestCase):
         result = client.execute('SELECT 1')
         self.assertEqual(result[0][0], 1)
 
+    def test_pooled_clickhouse_client(self):
+        pooled_client = get_pooled_clickhouse_client()
+        self.assertIs(get_pooled_clickhouse_client(), pooled_client)
+        self.assertIsNot(get_pooled_clickhouse_client(timeout=10), pooled_client)
+        self.assertEqual(logged_query('SELECT 1')[0][0], 1)
+
+        # A dropped connection is transparently re-established.
+        pooled_client.client.disconnect()
+        self.assertEqual(logged_query('SELECT 1')[0][0], 1)
+        pooled_client.client.connection.socket.close()
+        self.assertEqual(logged_query('SELECT 1')[0][0], 1)
+
+        close_pooled_clickhouse_clients()
+        self.assertIsNot(get_pooled_clickhouse_client(), pooled_client)
+
+    def test_logged_query_connection_dropped_mid_query(self):
+        pooled_client = Mock()
+        pooled_client.client.execute.side_effect = [
+            NetworkError('Connection reset'),
+            [(1,)],
+        ]
+        with patch(
+            'v03_pipeline.lib.misc.clickhouse.get_pooled_clickhouse_client',
+            return_value=pooled_client,
+        ):
+            self.assertEqual(logged_query('SELECT 1')[0][0], 1)
+            # Writes may have been applied by the server, so aren't re-issued.
+            pooled_client.client.execute.side_effect = [
+                NetworkError('Connection reset'),
+                None,
+            ]
+            with self.assertRaises(NetworkError):
+                logged_query('INSERT INTO t SELECT * FROM s')
+        self.assertEqual(pooled_client.client.execute.call_count, 3)
+
+    def test_run_partition_queries(self):
+        partitions = [(f'project_{i}', i) for i in range(10)]
+        for concurrency in [1, 4]:
+            with (
+                patch.object(
+                    Env,
+                    'CLICKHOUSE_PARTITION_OPERATION_CONCURRENCY',
+                    concurrency,
+                ),
+                patch(
+                    'v03_pipeline.lib.misc.clickhouse.logged_query',
+                ) as mock_logged_query,
+            ):
+                run_partition_queries('SELECT %(partition)s', partitions)
+                self.assertCountEqual(
+                    [c.args[1]['partition'] for c in mock_logged_query.call_args_list],
+                    partitions,
+                )
+
+        with (
+            patch(
+                'v03_pipeline.lib.misc.clickhouse.logged_query',
+                side_effect=[None, ValueError('failed partition'), None],
+            ),
+            self.assertRaises(ValueError),
+        ):
+            run_partition_queries('SELECT %(partition)s', partitions[:3])
+
+        # Partitions not yet started when a statement fails are never run.
+        with (
+            patch.object(Env, 'CLICKHOUSE_PARTITION_OPERATION_CONCURRENCY', 2),
+            patch(
+                'v03_pipeline.lib.misc.clickhouse.logged_query',
+                side_effect=ValueError('failed partition'),
+            ) as mock_logged_query,
+            self.assertRaises(ValueError),
+        ):
+            run_partition_queries('SELECT %(partition)s', partitions)
+        self.assertLess(mock_logged_query.call_count, len(partitions))
+
+    def test_optimize_entries_deadline(self):
+        def mock_logged_query(query, *_, **__):
+            if 'system.parts' in query:
+                return [('project_a',)]
+            if 'system.merges' in query:
+                return [(1, 0.25, 30.0)]
+            return [(True,)]
+
+        with (
+            patch(
+                'v03_pipeline.lib.misc.clickhouse.logged_query',
+                side_effect=mock_logged_query,
+            ) as mock_query,
+            patch('v03_pipeline.lib.misc.clickhouse.time.sleep'),
+            self.assertRaises(TimeoutError),
+        ):
+            optimize_entries(
+                TableNameBuilder(
+                    ReferenceGenome.GRCh38,
+                    DatasetType.SNV_INDEL,
+                    TEST_RUN_ID,
+                ),
+                ['project_a'],
+                deadline_s=0,
+            )
+        # Merges were running, so the table was never optimized.
+        self.assertFalse(
+            any('OPTIMIZE' in c.args[0] for c in mock_query.call_args_list),
+        )
+        # The deadline isn't extended by a retry.
+        self.assertEqual(
+            sum('EXISTS' in c.args[0] for c in mock_query.call_args_list),
+            1,
+        )
+
     def test_normalize_partition(self):
         self.assertEqual(normalize_partition('project_d'), ('project_d',))
         self.assertEqual(
@@ -495,6 +609,20 @@ class ClickhouseTest(MockedDatarootTestCase):
             DatasetType.SNV_INDEL,
             TEST_RUN_ID,
         )
+        self.assertEqual(
+            table_name_builder.staging_dst_table(
+                ClickHouseTable.ENTRIES,
+            ),
+            f'staging_{table_name_builder.run_id_hash}.`{table_name_builder.run_id_hash}/GRCh38/SNV_INDEL/entries`',
+        )
+        self.assertNotEqual(
+            table_name_builder.staging_database,
+            TableNameBuilder(
+                ReferenceGenome.GRCh38,
+                DatasetType.SNV_INDEL,
+                'another_run_id',
+            ).staging_database,
+        )
         self.assertEqual(
             table_name_builder.dst_table(
                 ClickHouseTable.ENTRIES,
@@ -615,7 +743,7 @@ class ClickhouseTest(MockedDatarootTestCase):
         )
         staged_projects = client.execute(
             f"""
-            SELECT DISTINCT project_guid FROM {STAGING_CLICKHOUSE_DATABASE}.`{table_name_builder.run_id_hash}/GRCh38/SNV_INDEL/entries`
+            SELECT DISTINCT project_guid FROM {table_name_builder.staging_database}.`{table_name_builder.run_id_hash}/GRCh38/SNV_INDEL/entries`
             """,
         )
         self.assertCountEqual(
@@ -626,7 +754,7 @@ class ClickhouseTest(MockedDatarootTestCase):
             f"""
             SELECT project_guid, key, sample_type, sum(het_samples), sum(hom_samples)
             FROM
-            {STAGING_CLICKHOUSE_DATABASE}.`{table_name_builder.run_id_hash}/GRCh38/SNV_INDEL/project_gt_stats`
+            {table_name_builder.staging_database}.`{table_name_builder.run_id_hash}/GRCh38/SNV_INDEL/project_gt_stats`
             GROUP BY project_guid, key, sample_type
             """,
         )
@@ -655,7 +783,7 @@ class ClickhouseTest(MockedDatarootTestCase):
             f"""
             SELECT project_guid, key, sample_type, sum(het_samples), sum(hom_samples)
             FROM
-            {STAGING_CLICKHOUSE_DATABASE}.`{table_name_builder.run_id_hash}/GRCh38/SNV_INDEL/project_gt_stats`
+            {table_name_builder.staging_database}.`{table_name_builder.run_id_hash}/GRCh38/SNV_INDEL/project_gt_stats`
             GROUP BY project_guid, key, sample_type
             """,
         )
@@ -683,7 +811,7 @@ class ClickhouseTest(MockedDatarootTestCase):
             f"""
             SELECT project_guid, key, sample_type, sum(het_samples), sum(hom_samples)
             FROM
-            {STAGING_CLICKHOUSE_DATABASE}.`{table_name_builder.run_id_hash}/GRCh38/SNV_INDEL/project_gt_stats`
+            {table_name_builder.staging_database}.`{table_name_builder.run_id_hash}/GRCh38/SNV_INDEL/project_gt_stats`
             GROUP BY project_guid, key, sample_type
             """,
         )
@@ -0,0 +1,77 @@
+import os
+import re
+
+import hail as hl
+import hailtop.fs as hfs
+
+from v03_pipeline.lib.logger import get_logger
+from v03_pipeline.lib.misc.io import write
+
+logger = get_logger(__name__)
+
+DELTA_REGEX = re.compile(r'delta_(\d+)\.ht$')
+
+
+def delta_table_paths(deltas_dir: str) -> list[str]:
+    if not hfs.exists(deltas_dir):
+        return []
+    # NB: deltas are named in the order they were written.  Deltas without
+    # a _SUCCESS file were not fully written and are ignored.
+    return sorted(
+        f.path.rstrip('/')
+        for f in hfs.ls(deltas_dir)
+        if DELTA_REGEX.search(f.path.rstrip('/'))
+        and hfs.exists(os.path.join(f.path, '_SUCCESS'))
+    )
+
+
+def next_delta_table_path(deltas_dir: str, delta_paths: list[str]) -> str:
+    delta_i = (
+        int(DELTA_REGEX.search(delta_paths[-1]).group(1)) + 1 if delta_paths else 0
+    )
+    return os.path.join(deltas_dir, f'delta_{delta_i:05d}.ht')
+
+
+def _read_cache_table(path: str, delta_paths: list[str]) -> hl.Table | None:
+    tables = [hl.read_table(path)] if hfs.exists(path) else []
+    tables.extend(hl.read_table(delta_path) for delta_path in delta_paths)
+    if not tables:
+        return None
+    return tables[0].union(*tables[1:])
+
+
+def read_cache_table(path: str, deltas_dir: str) -> hl.Table | None:
+    """
+    Reads a cache table with its uncompacted deltas appended, or None if
+    nothing has been cached.  Cached rows are never updated, so a key
+    appearing in more than one delta maps to the same row each time.
+    """
+    return _read_cache_table(path, delta_table_paths(deltas_dir))
+
+
+def write_cache_table_delta(delta_ht: hl.Table, deltas_dir: str) -> str:
+    """
+    Appends the rows of delta_ht to the cache without rewriting the rows
+    already cached.
+    """
+    delta_path = next_delta_table_path(deltas_dir, delta_table_paths(deltas_dir))
+    write(delta_ht, delta_path)
+    logger.info(f'Wrote cache table delta {delta_path}')
+    return delta_path
+
+
+def compact_cache_table(path: str, deltas_dir: str, max_deltas: int) -> None:
+    """
+    Folds the cache's deltas into the cache table once there are max_deltas
+    of them.  Deltas are deleted, so this must not run while a table derived
+    from them is still to be evaluated.
+    """
+    delta_paths = delta_table_paths(deltas_dir)
+    if not delta_paths or len(delta_paths) < max_deltas:
+        return
+    logger.info(f'Compacting cache table deltas into {path}')
+    # NB: `write` checkpoints before overwriting, so the table may be derived
+    # from itself.  Deltas are removed only after the write succeeds.
+    write(_read_cache_table(path, delta_paths).distinct(), path)
+    for delta_path in delta_paths:
+        hfs.rmtree(delta_path)
@@ -0,0 +1,53 @@
+import os
+import tempfile
+import unittest
+
+import hail as hl
+
+from v03_pipeline.lib.misc.delta_tables import (
+    compact_cache_table,
+    delta_table_paths,
+    read_cache_table,
+    write_cache_table_delta,
+)
+
+
+def caids_ht(rows: list[tuple[int, str]]) -> hl.Table:
+    return hl.Table.parallelize(
+        [{'position': p, 'CAID': c} for p, c in rows],
+        hl.tstruct(position=hl.tint32, CAID=hl.tstr),
+        key='position',
+    )
+
+
+class DeltaTablesTest(unittest.TestCase):
+    def test_cache_table_deltas(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, 'caids.ht')
+            deltas_dir = os.path.join(tmp_dir, 'caids_deltas')
+            self.assertIsNone(read_cache_table(path, deltas_dir))
+            write_cache_table_delta(caids_ht([(1, 'CA1'), (2, 'CA2')]), deltas_dir)
+            write_cache_table_delta(caids_ht([(2, 'CA2'), (3, 'CA3')]), deltas_dir)
+            self.assertEqual(len(delta_table_paths(deltas_dir)), 2)
+            expected_rows = [
+                hl.Struct(position=1, CAID='CA1'),
+                hl.Struct(position=2, CAID='CA2'),
+                hl.Struct(position=3, CAID='CA3'),
+            ]
+            self.assertEqual(
+                read_cache_table(path, deltas_dir).distinct().collect(),
+                expected_rows,
+            )
+
+            # Fewer than max_deltas deltas are left alone.
+            compact_cache_table(path, deltas_dir, 3)
+            self.assertEqual(len(delta_table_paths(deltas_dir)), 2)
+            compact_cache_table(path, deltas_dir, 2)
+            self.assertEqual(delta_table_paths(deltas_dir), [])
+            self.assertEqual(hl.read_table(path).collect(), expected_rows)
+
+            write_cache_table_delta(caids_ht([(4, 'CA4')]), deltas_dir)
+            self.assertEqual(
+                read_cache_table(path, deltas_dir).collect(),
+                [*expected_rows, hl.Struct(position=4, CAID='CA4')],
+            )
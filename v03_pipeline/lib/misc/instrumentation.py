@@ -0,0 +1,154 @@
+import contextlib
+import dataclasses
+import datetime
+import json
+import os
+import threading
+import time
+from collections.abc import Iterator
+
+import hailtop.fs as hfs
+import pyspark
+
+PROMETHEUS_METRIC_PREFIX = 'seqr_pipeline_task'
+
+_LOCK = threading.Lock()
+_CURRENT_STAGE: 'StageTimings | None' = None
+
+
+@dataclasses.dataclass
+class StageTimings:
+    """
+    Timings and resource usage of a single task's run, with one entry in
+    operations per checkpoint, write or ClickHouse query it issued.
+    """
+
+    task: str
+    task_id: str
+    start: str
+    status: str | None = None
+    wall_time_s: float | None = None
+    hail_stages: int | None = None
+    operations: list[dict] = dataclasses.field(default_factory=list)
+    _start_monotonic: float = dataclasses.field(default_factory=time.monotonic)
+    _spark_job_ids: set[int] = dataclasses.field(default_factory=set)
+
+    def to_json(self) -> dict:
+        return {
+            k: v for k, v in dataclasses.asdict(self).items() if not k.startswith('_')
+        }
+
+    def totals(self) -> dict[str, float]:
+        return {
+            'wall_time_s': self.wall_time_s or 0,
+            'hail_stages': self.hail_stages or 0,
+            'bytes_written': sum(op.get('bytes', 0) for op in self.operations),
+            'rows_written': sum(op.get('rows', 0) for op in self.operations),
+            'clickhouse_queries': sum(
+                op['operation'] == 'clickhouse_query' for op in self.operations
+            ),
+            'clickhouse_read_rows': sum(
+                op.get('read_rows', 0) for op in self.operations
+            ),
+        }
+
+
+def _spark_job_ids() -> set[int]:
+    # NB: the active context is checked rather than calling hl.spark_context(),
+    # which would initialize hail in tasks that never use it.
+    sc = pyspark.SparkContext._active_spark_context  # noqa: SLF001
+    if sc is None:
+        return set()
+    return set(sc.statusTracker().getJobIdsForGroup())
+
+
+def _spark_stage_count(job_ids: set[int]) -> int:
+    sc = pyspark.SparkContext._active_spark_context  # noqa: SLF001
+    if sc is None:
+        return 0
+    status_tracker = sc.statusTracker()
+    return sum(
+        len(job_info.stageIds)
+        for job_info in (status_tracker.getJobInfo(job_id) for job_id in job_ids)
+        if job_info is not None
+    )
+
+
+def start_stage(task: str, task_id: str) -> None:
+    global _CURRENT_STAGE  # noqa: PLW0603
+    with _LOCK:
+        _CURRENT_STAGE = StageTimings(
+            task=task,
+            task_id=task_id,
+            start=datetime.datetime.now(datetime.UTC).isoformat(),
+            _spark_job_ids=_spark_job_ids(),
+        )
+
+
+def finish_stage(status: str) -> StageTimings | None:
+    global _CURRENT_STAGE
+    with _LOCK:
+        stage, _CURRENT_STAGE = _CURRENT_STAGE, None
+    if stage is None:
+        return None
+    stage.status = status
+    stage.wall_time_s = time.monotonic() - stage._start_monotonic  # noqa: SLF001
+    stage.hail_stages = _spark_stage_count(
+        _spark_job_ids() - stage._spark_job_ids,  # noqa: SLF001
+    )
+    return stage
+
+
+def is_recording() -> bool:
+    return _CURRENT_STAGE is not None
+
+
+@contextlib.contextmanager
+def timed_operation(operation: str, **fields) -> Iterator[dict]:
+    """
+    Times the enclosed block, recording it against the running task along
+    with any fields the caller adds to the yielded dict.
+    """
+    op = {'operation': operation, **fields}
+    start = time.monotonic()
+    try:
+        yield op
+    finally:
+        op['wall_time_s'] = time.monotonic() - start
+        with _LOCK:
+            if _CURRENT_STAGE is not None:
+                _CURRENT_STAGE.operations.append(op)
+
+
+def write_stage_timings(path: str, stage: StageTimings) -> None:
+    with hfs.open(path, 'w') as f:
+        json.dump(stage.to_json(), f)
+
+
+def prometheus_metrics(stage: StageTimings, **labels: str) -> str:
+    labels = {'task': stage.task, 'status': stage.status, **labels}
+    formatted_labels = ','.join(f'{k}="{v}"' for k, v in sorted(labels.items()))
+    return ''.join(
+        f'{PROMETHEUS_METRIC_PREFIX}_{metric}{{{formatted_labels}}} {value}\n'
+        for metric, value in stage.totals().items()
+    )
+
+
+def write_prometheus_textfile(
+    textfile_dir: str,
+    stage: StageTimings,
+    **labels: str,
+) -> None:
+    """
+    Writes the task's metrics in the Prometheus text format, for collection
+    by e.g. node_exporter's textfile collector.  The file is written
+    atomically, so the collector never reads a partial file.  Files are
+    named by task_id and label values, as concurrent workers may run the same
+    task family for different reference genomes, dataset types or projects.
+    """
+    os.makedirs(textfile_dir, exist_ok=True)
+    filename = '_'.join([stage.task_id, *(labels[k] for k in sorted(labels))])
+    path = os.path.join(textfile_dir, f'{filename}.prom')
+    with open(f'{path}.{os.getpid()}', 'w') as f:
+        f.write(prometheus_metrics(stage, **labels))
+    os.replace(f'{path}.{os.getpid()}', path)
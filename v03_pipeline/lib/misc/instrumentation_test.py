@@ -0,0 +1,79 @@
+import json
+import os
+import tempfile
+import unittest
+
+from v03_pipeline.lib.misc.instrumentation import (
+    finish_stage,
+    is_recording,
+    prometheus_metrics,
+    start_stage,
+    timed_operation,
+    write_prometheus_textfile,
+    write_stage_timings,
+)
+
+
+class InstrumentationTest(unittest.TestCase):
+    def test_timed_operations(self) -> None:
+        # Operations outside of a task are not recorded.
+        with timed_operation('write', path='a.ht'):
+            pass
+        self.assertIsNone(finish_stage('success'))
+
+        start_stage('WriteNewVariantsTableTask', 'WriteNewVariantsTableTask_abc')
+        self.assertTrue(is_recording())
+        with timed_operation('write', path='a.ht') as op:
+            op['bytes'] = 100
+            op['rows'] = 10
+        with timed_operation('clickhouse_query', query_id='1'):
+            pass
+        with self.assertRaises(ValueError), timed_operation('checkpoint'):
+            raise ValueError
+        stage = finish_stage('success')
+        self.assertFalse(is_recording())
+        self.assertEqual(stage.status, 'success')
+        self.assertEqual(stage.hail_stages, 0)
+        self.assertListEqual(
+            [op['operation'] for op in stage.operations],
+            ['write', 'clickhouse_query', 'checkpoint'],
+        )
+        self.assertTrue(all(op['wall_time_s'] >= 0 for op in stage.operations))
+        totals = stage.totals()
+        self.assertEqual(totals['bytes_written'], 100)
+        self.assertEqual(totals['rows_written'], 10)
+        self.assertEqual(totals['clickhouse_queries'], 1)
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, 'stage_timings', 'task.json')
+            write_stage_timings(path, stage)
+            with open(path) as f:
+                stage_json = json.load(f)
+            self.assertEqual(stage_json['task'], 'WriteNewVariantsTableTask')
+            self.assertNotIn('_start_monotonic', stage_json)
+            self.assertEqual(len(stage_json['operations']), 3)
+
+            write_prometheus_textfile(tmp_dir, stage, dataset_type='SNV_INDEL')
+            write_prometheus_textfile(tmp_dir, stage, dataset_type='MITO')
+            with open(
+                os.path.join(tmp_dir, f'{stage.task_id}_SNV_INDEL.prom'),
+            ) as f:
+                self.assertEqual(
+                    f.read(),
+                    prometheus_metrics(stage, dataset_type='SNV_INDEL'),
+                )
+            self.assertTrue(
+                os.path.exists(os.path.join(tmp_dir, f'{stage.task_id}_MITO.prom')),
+            )
+
+    def test_prometheus_metrics(self) -> None:
+        start_stage('WriteNewVariantsTableTask', 'WriteNewVariantsTableTask_abc')
+        with timed_operation('write') as op:
+            op['bytes'] = 100
+        stage = finish_stage('failure')
+        lines = prometheus_metrics(stage, dataset_type='SNV_INDEL').splitlines()
+        self.assertIn(
+            'seqr_pipeline_task_bytes_written{dataset_type="SNV_INDEL",status="failure",task="WriteNewVariantsTableTask"} 100',
+            lines,
+        )
+        self.assertEqual(len(lines), 6)
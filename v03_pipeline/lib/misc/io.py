@@ -1,16 +1,24 @@
+import contextlib
+import functools
+import gzip
 import hashlib
+import json
 import math
 import os
 import re
 import uuid
-from collections.abc import Callable
+from collections.abc import Callable, Iterator
+from contextvars import ContextVar
 from string import Template
 
 import hail as hl
 import hailtop.fs as hfs
+import pyspark.sql
 
 from v03_pipeline.lib.core import DatasetType, Env, ReferenceGenome, Sex
+from v03_pipeline.lib.logger import get_logger
 from v03_pipeline.lib.misc.gcnv import parse_gcnv_genes
+from v03_pipeline.lib.misc.instrumentation import is_recording, timed_operation
 from v03_pipeline.lib.misc.nested_field import parse_nested_field
 from v03_pipeline.lib.misc.validation import SeqrValidationError
 
@@ -18,26 +26,54 @@ BIALLELIC = 2
 B_PER_MB = 1 << 20  # 1024 * 1024
 MB_PER_PARTITION = 32
 MAX_SAMPLES_SPLIT_MULTI_SHUFFLE = 100
+BGZF_HEADER = b'\x1f\x8b\x08\x04'
+BGZF_HEADER_LENGTH = 18
+
+logger = get_logger(__name__)
+
+# Set to the running task's checkpoint directory by BaseHailTableTask,
+# checkpoints written outside of a task go directly under HAIL_TMP_DIR.
+CHECKPOINT_DIR: ContextVar[str | None] = ContextVar('CHECKPOINT_DIR', default=None)
+
+
+@contextlib.contextmanager
+def mapped_validation_errors(*fns: Callable) -> Iterator[None]:
+    """
+    Re-raises Hail errors matching the regex_to_msg of any of the given
+    validated_hl_functions as a SeqrValidationError.
+    """
+    try:
+        yield
+    except SeqrValidationError:
+        raise
+    except Exception as e:
+        for fn in fns:
+            for regex, msg in fn.regex_to_msg.items():
+                match = re.search(regex, str(e))
+                if match and isinstance(msg, Template):
+                    msg = msg.substitute(match=match.group(1))  # noqa: PLW2901
+                if match:
+                    raise SeqrValidationError(msg) from e
+        raise
 
 
 def validated_hl_function(
     regex_to_msg: dict[str, str | Template],
 ) -> Callable[[Callable], Callable]:
     def decorator(fn: Callable) -> Callable:
+        @functools.wraps(fn)
         def wrapper(*args, **kwargs) -> hl.Table | hl.MatrixTable:
-            try:
-                t, _ = checkpoint(fn(*args, **kwargs))
-            except Exception as e:
-                for regex, msg in regex_to_msg.items():
-                    match = re.search(regex, str(e))
-                    if match and isinstance(msg, Template):
-                        msg = msg.substitute(match=match.group(1))  # noqa: PLW2901
-                    if match:
-                        raise SeqrValidationError(msg) from e
-                raise
-            else:
-                return t
-
+            with mapped_validation_errors(wrapper):
+                t = fn(*args, **kwargs)
+                # Checkpointing surfaces errors eagerly at the cost of a full
+                # write.  Stages that aren't checkpointed fail lazily, wherever
+                # the table is next materialized, which is expected to map its
+                # errors through mapped_validation_errors.
+                if fn.__name__ in Env.VALIDATION_CHECKPOINT_STAGES:
+                    t, _ = checkpoint(t)
+            return t
+
+        wrapper.regex_to_msg = regex_to_msg
         return wrapper
 
     return decorator
@@ -69,6 +105,16 @@ def file_size_bytes(path: str) -> int:
     return size_bytes
 
 
+def is_block_gzipped(path: str) -> bool:
+    # Globbed paths are checked against their first matching file.
+    if any(c in path for c in '*?['):
+        path = hl.hadoop_ls(path)[0]['path']
+    with hfs.open(path, 'rb') as f:
+        header = f.read(BGZF_HEADER_LENGTH)
+    # A bgzip header is a gzip header with a "BC" extra subfield.
+    return header.startswith(BGZF_HEADER) and header[12:14] == b'BC'
+
+
 def compute_hail_n_partitions(file_size_b: int) -> int:
     return math.ceil(file_size_b / B_PER_MB / MB_PER_PARTITION)
 
@@ -166,26 +212,27 @@ def import_vcf(
         'array_elements_required': False,
         'call_fields': [],  # PGT is unused downstream, but is occasionally present in old VCFs!
     }
+    # Handle callsets provided as gz but not bgz
+    # Note that this is handled separately from other VCF validation
+    # as it's an exceptional case that we can handle internally.
     try:
-        mt, _ = checkpoint(
-            hl.import_vcf(
-                callset_path,
-                force_bgz=True,
-                **args,
-            ),
+        force_bgz = not callset_path.endswith('.gz') or is_block_gzipped(
+            callset_path,
         )
-    except Exception as e:
-        # Handle callsets provided as gz but not bgz
-        # Note that this is handled separately from other VCF validation
-        # as it's an exceptional case that we can handle internally.
-        if 'File does not conform to block gzip format' not in str(e):
-            raise
-        mt = hl.import_vcf(
+    except (OSError, IndexError, hl.utils.java.FatalError):
+        # Inaccessible files are reported by import_vcf itself.
+        force_bgz = True
+    if force_bgz:
+        return hl.import_vcf(
             callset_path,
-            force=True,
+            force_bgz=True,
             **args,
         )
-    return mt
+    return hl.import_vcf(
+        callset_path,
+        force=True,
+        **args,
+    )
 
 
 def import_callset(
@@ -298,12 +345,81 @@ def import_pedigree(pedigree_path: str) -> hl.Table:
     )
 
 
-def remap_pedigree_hash(pedigree_path: str) -> hl.Int32Expression:
+@functools.cache
+def _pedigree_hash(
+    pedigree_path: str,
+    modification_time: float,  # noqa: ARG001
+    size: int,  # noqa: ARG001
+) -> int:
     sha256 = hashlib.sha256()
     with hfs.open(pedigree_path) as f2:
         sha256.update(f2.read().encode('utf8'))
     # maximum 4 byte int
-    return hl.int32(int(sha256.hexdigest()[:8], 16))
+    return int(sha256.hexdigest()[:8], 16)
+
+
+def remap_pedigree_hash(pedigree_path: str) -> hl.Int32Expression:
+    # Every project's pedigree is hashed by several tasks' complete() checks,
+    # so the hash is cached until the file is modified.
+    file_info = hfs.stat(pedigree_path)
+    return hl.int32(
+        _pedigree_hash(pedigree_path, file_info.modification_time, file_info.size),
+    )
+
+
+def rendered_ir(t: hl.Table | hl.MatrixTable) -> str:
+    return str(t._mir if isinstance(t, hl.MatrixTable) else t._tir)  # noqa: SLF001
+
+
+def _read_paths(t: hl.Table | hl.MatrixTable) -> list[str]:
+    ir = t._mir if isinstance(t, hl.MatrixTable) else t._tir  # noqa: SLF001
+    paths = []
+    for node in ir.base_search(
+        lambda node: isinstance(node, hl.ir.TableRead | hl.ir.MatrixRead),
+    ):
+        # Native and VCF readers store their paths as `path`, text
+        # readers (e.g. import_table) as `files` in their config.
+        node_paths = getattr(node.reader, 'path', None) or getattr(
+            node.reader,
+            'config',
+            {},
+        ).get('files', [])
+        paths.extend([node_paths] if isinstance(node_paths, str) else node_paths)
+    return sorted(set(paths))
+
+
+def _read_paths_fingerprint(t: hl.Table | hl.MatrixTable) -> str:
+    # The IR names the files it reads but not their contents, so the
+    # modification time and size of each is added to the key, as is done
+    # when hashing pedigrees.  Rewriting a table updates its top level
+    # metadata, so listing one level deep suffices.
+    return ','.join(
+        f'{f["path"]}:{f["modification_time"]}:{f["size_bytes"]}'
+        for path in _read_paths(t)
+        for f in sorted(hl.hadoop_ls(path), key=lambda f: f['path'])
+    )
+
+
+def checkpoint_ir_hash(t: hl.Table | hl.MatrixTable) -> str:
+    sha256 = hashlib.sha256()
+    sha256.update(rendered_ir(t).encode('utf8'))
+    sha256.update(_read_paths_fingerprint(t).encode('utf8'))
+    return sha256.hexdigest()[:32]
+
+
+def written_row_count(path: str) -> int:
+    # Hail stores the row count of each partition in the metadata of the
+    # tables and matrix tables it writes.
+    with hfs.open(os.path.join(path, 'metadata.json.gz'), 'rb') as f:
+        metadata = json.loads(gzip.decompress(f.read()))
+    return sum(metadata['components']['partition_counts']['counts'])
+
+
+def _record_written(op: dict, path: str) -> None:
+    if not is_recording():
+        return
+    op['bytes'] = file_size_bytes(path)
+    op['rows'] = written_row_count(path)
 
 
 def checkpoint(
@@ -311,14 +427,48 @@ def checkpoint(
 ) -> tuple[hl.Table | hl.MatrixTable, str]:
     suffix = 'mt' if isinstance(t, hl.MatrixTable) else 'ht'
     read_fn = hl.read_matrix_table if isinstance(t, hl.MatrixTable) else hl.read_table
-    checkpoint_path = os.path.join(
-        Env.HAIL_TMP_DIR,
-        f'{uuid.uuid4()}.{suffix}',
-    )
-    t.write(checkpoint_path)
+    checkpoint_dir = CHECKPOINT_DIR.get()
+    if checkpoint_dir is None:
+        checkpoint_path = os.path.join(
+            Env.HAIL_TMP_DIR,
+            f'{uuid.uuid4()}.{suffix}',
+        )
+        with timed_operation('checkpoint', path=checkpoint_path) as op:
+            t.write(checkpoint_path)
+            _record_written(op, checkpoint_path)
+        return read_fn(checkpoint_path), checkpoint_path
+    # Within a task, checkpoints are named by the expression they
+    # materialize and the state of the files it reads, so that a retry of
+    # a failed task re-reads the checkpoints it had already written rather
+    # than recomputing them, but not once an input has been rewritten.
+    checkpoint_path = os.path.join(checkpoint_dir, f'{checkpoint_ir_hash(t)}.{suffix}')
+    if hfs.exists(os.path.join(checkpoint_path, '_SUCCESS')):
+        logger.info(f'Reusing checkpoint {checkpoint_path}')
+    else:
+        with timed_operation('checkpoint', path=checkpoint_path) as op:
+            t.write(checkpoint_path, overwrite=True)
+            _record_written(op, checkpoint_path)
     return read_fn(checkpoint_path), checkpoint_path
 
 
+def copartitioned_read_tables(
+    ht: hl.Table,
+    paths: list[str],
+) -> tuple[hl.Table, list[hl.Table]]:
+    """
+    Checkpoints ht and reads it back alongside the tables at paths, all
+    partitioned on the same key intervals.  Rows of the tables outside of
+    ht's key range are never read, and keyed lookups between them need no
+    shuffle.
+    """
+    ht, checkpoint_path = checkpoint(ht)
+    intervals = ht._calculate_new_partitions(ht.n_partitions())  # noqa: SLF001
+    return (
+        hl.read_table(checkpoint_path, _intervals=intervals),
+        [hl.read_table(path, _intervals=intervals) for path in paths],
+    )
+
+
 def write(
     t: hl.Table | hl.MatrixTable,
     destination_path: str,
@@ -330,4 +480,34 @@ def write(
             compute_hail_n_partitions(file_size_bytes(path)),
             shuffle=False,
         )
-    return t.write(destination_path, overwrite=True)
+    with timed_operation('write', path=destination_path) as op:
+        t.write(destination_path, overwrite=True)
+        _record_written(op, destination_path)
+
+
+def write_tuned_parquet(
+    df: pyspark.sql.DataFrame,
+    path: str,
+    dictionary_encoded_columns: tuple[str, ...] | None = None,
+    n_files: int | None = None,
+    row_group_size_bytes: int | None = None,
+) -> None:
+    """
+    Writes a parquet export laid out for ClickHouse ingestion: zstd
+    compressed, with explicitly sized row groups, and range partitioned and
+    sorted on key so that each file holds a contiguous run of keys.
+
+    If dictionary_encoded_columns is given, only those (low cardinality)
+    columns are dictionary encoded.
+    """
+    n_files = n_files or Env.PARQUET_EXPORT_N_FILES or df.rdd.getNumPartitions()
+    df = df.repartitionByRange(n_files, 'key').sortWithinPartitions('key')
+    writer = df.write.option('compression', 'zstd').option(
+        'parquet.block.size',
+        row_group_size_bytes or Env.PARQUET_EXPORT_ROW_GROUP_SIZE_BYTES,
+    )
+    if dictionary_encoded_columns is not None:
+        writer = writer.option('parquet.enable.dictionary', 'false')
+        for column in dictionary_encoded_columns:
+            writer = writer.option(f'parquet.enable.dictionary#{column}', 'true')
+    writer.parquet(path, mode='overwrite')
@@ -1,17 +1,29 @@
+import glob
+import os
+import shutil
+import tempfile
 import unittest
 from unittest import mock
 
 import hail as hl
+import hailtop.fs as hfs
+import pyarrow.parquet as pq
 
 from v03_pipeline.lib.core import DatasetType, ReferenceGenome
 from v03_pipeline.lib.misc.io import (
+    checkpoint_ir_hash,
     compute_hail_n_partitions,
+    copartitioned_read_tables,
     file_size_bytes,
     import_imputed_sex,
     import_vcf,
+    is_block_gzipped,
+    mapped_validation_errors,
     remap_pedigree_hash,
     select_relevant_fields,
     split_multi_hts,
+    write_tuned_parquet,
+    written_row_count,
 )
 from v03_pipeline.lib.misc.validation import SeqrValidationError
 
@@ -36,6 +48,13 @@ class IOTest(unittest.TestCase):
         self.assertEqual(compute_hail_n_partitions(191310), 1)
         self.assertEqual(compute_hail_n_partitions(1913100000), 58)
 
+    def test_written_row_count(self) -> None:
+        self.assertEqual(written_row_count(TEST_MITO_MT), 5)
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = os.path.join(temp_dir, 'test.ht')
+            hl.utils.range_table(100, n_partitions=3).write(path)
+            self.assertEqual(written_row_count(path), 100)
+
     def test_import_imputed_sex(self) -> None:
         ht = import_imputed_sex(TEST_IMPUTED_SEX)
         self.assertListEqual(
@@ -57,6 +76,52 @@ class IOTest(unittest.TestCase):
             ht.collect,
         )
 
+    def test_copartitioned_read_tables(self) -> None:
+        ht = hl.utils.range_table(100, n_partitions=4)
+        ht = ht.filter(ht.idx % 10 == 0)
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            ref_ht = hl.utils.range_table(1000, n_partitions=7)
+            ref_ht = ref_ht.annotate(squared=ref_ht.idx * ref_ht.idx)
+            ref_ht.write(f'{tmp_dir}/ref.ht')
+            ht, [ref_ht] = copartitioned_read_tables(ht, [f'{tmp_dir}/ref.ht'])
+            # Reference rows outside of the key range of ht are never read.
+            self.assertLess(ref_ht.count(), 100)
+            ht = ht.annotate(ref=ref_ht[ht.key])
+            self.assertListEqual(
+                ht.ref.squared.collect(),
+                [i * i for i in range(0, 100, 10)],
+            )
+
+    def test_write_tuned_parquet(self) -> None:
+        ht = hl.utils.range_table(100, n_partitions=4)
+        ht = ht.annotate(key_=99 - ht.idx, project_guid='R0001_project')
+        df = ht.to_spark(flatten=False).withColumnRenamed('key_', 'key')
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            write_tuned_parquet(df, tmp_dir, ('project_guid',), n_files=2)
+            paths = sorted(glob.glob(f'{tmp_dir}/*.parquet'))
+            self.assertEqual(len(paths), 2)
+            # Files are range partitioned and sorted on key.
+            self.assertListEqual(
+                [
+                    key
+                    for path in paths
+                    for key in pq.read_table(path).column('key').to_pylist()
+                ],
+                list(range(100)),
+            )
+            row_group = pq.ParquetFile(paths[0]).metadata.row_group(0)
+            columns = {
+                row_group.column(i).path_in_schema: row_group.column(i)
+                for i in range(row_group.num_columns)
+            }
+            self.assertEqual(columns['key'].compression, 'ZSTD')
+            self.assertTrue(
+                any('DICTIONARY' in e for e in columns['project_guid'].encodings),
+            )
+            self.assertFalse(
+                any('DICTIONARY' in e for e in columns['key'].encodings),
+            )
+
     def test_remap_pedigree_hash(self) -> None:
         self.assertEqual(
             hl.eval(
@@ -67,6 +132,36 @@ class IOTest(unittest.TestCase):
             573002191,
         )
 
+    def test_remap_pedigree_hash_cached_until_modified(self) -> None:
+        with tempfile.TemporaryDirectory() as temp_dir:
+            pedigree_path = os.path.join(temp_dir, 'pedigree.tsv')
+            shutil.copy(TEST_PEDIGREE_3_REMAP, pedigree_path)
+            with mock.patch(
+                'v03_pipeline.lib.misc.io.hfs.open',
+                wraps=hfs.open,
+            ) as mock_open:
+                self.assertEqual(hl.eval(remap_pedigree_hash(pedigree_path)), 573002191)
+                self.assertEqual(hl.eval(remap_pedigree_hash(pedigree_path)), 573002191)
+                self.assertEqual(mock_open.call_count, 1)
+            with open(pedigree_path, 'a') as f:
+                f.write('\n')
+            os.utime(pedigree_path, (0, 0))
+            self.assertNotEqual(
+                hl.eval(remap_pedigree_hash(pedigree_path)),
+                573002191,
+            )
+
+    def test_checkpoint_ir_hash_changes_when_input_rewritten(self) -> None:
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = os.path.join(temp_dir, 'test.ht')
+            hl.utils.range_table(10).write(path)
+            ht = hl.read_table(path)
+            ir_hash = checkpoint_ir_hash(ht.annotate(x=ht.idx * 2))
+            self.assertEqual(checkpoint_ir_hash(ht.annotate(x=ht.idx * 2)), ir_hash)
+            hl.utils.range_table(20).write(path, overwrite=True)
+            ht = hl.read_table(path)
+            self.assertNotEqual(checkpoint_ir_hash(ht.annotate(x=ht.idx * 2)), ir_hash)
+
     def test_import_vcf(self) -> None:
         self.assertRaisesRegex(
             TypeError,
@@ -114,6 +209,31 @@ class IOTest(unittest.TestCase):
             ReferenceGenome.GRCh38,
         )
 
+    def test_import_vcf_lazy_validation(self) -> None:
+        with mock.patch('v03_pipeline.lib.misc.io.Env') as mock_env:
+            mock_env.VALIDATION_CHECKPOINT_STAGES = ()
+            mt = import_vcf(CORRUPTED_VCF, ReferenceGenome.GRCh38)
+            with (
+                self.assertRaisesRegex(
+                    SeqrValidationError,
+                    'Gzip-compressed data is corrupt',
+                ),
+                mapped_validation_errors(import_vcf),
+            ):
+                mt.count()
+
+    def test_is_block_gzipped(self) -> None:
+        self.assertFalse(is_block_gzipped(CORRUPTED_VCF))
+        with tempfile.NamedTemporaryFile(suffix='.vcf.gz') as f:
+            # An empty bgzip EOF block.
+            f.write(
+                bytes.fromhex(
+                    '1f8b08040000000000ff0600424302001b0003000000000000000000',
+                ),
+            )
+            f.flush()
+            self.assertTrue(is_block_gzipped(f.name))
+
     def test_select_missing_field(self) -> None:
         self.assertRaisesRegex(
             SeqrValidationError,
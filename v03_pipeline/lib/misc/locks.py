@@ -0,0 +1,68 @@
+import contextlib
+import fcntl
+import os
+from collections.abc import Iterator
+
+from v03_pipeline.lib.core import DatasetType, ReferenceGenome
+from v03_pipeline.lib.paths import loading_pipeline_locks_dir
+
+
+def resource_lock_path(
+    reference_genome: ReferenceGenome,
+    dataset_type: DatasetType,
+) -> str:
+    return os.path.join(
+        loading_pipeline_locks_dir(),
+        f'{reference_genome.value}_{dataset_type.value}.lock',
+    )
+
+
+def queue_lock_path() -> str:
+    return os.path.join(loading_pipeline_locks_dir(), 'queue.lock')
+
+
+@contextlib.contextmanager
+def queue_lock() -> Iterator[None]:
+    """
+    Blocks until holding an exclusive lock on the request queue, so that
+    checking for and queueing a request is atomic across API processes.
+    """
+    os.makedirs(loading_pipeline_locks_dir(), exist_ok=True)
+    fd = os.open(queue_lock_path(), os.O_RDWR | os.O_CREAT)
+    try:
+        fcntl.flock(fd, fcntl.LOCK_EX)
+        yield
+    finally:
+        release_resource_locks([fd])
+
+
+def try_acquire_resource_locks(
+    resources: set[tuple[ReferenceGenome, DatasetType]],
+) -> list[int] | None:
+    """
+    Attempts to take an exclusive, non-blocking lock on every resource.
+    Returns the held lock file descriptors, or None (holding nothing) if any
+    resource is already locked by another worker.
+    """
+    os.makedirs(loading_pipeline_locks_dir(), exist_ok=True)
+    fds = []
+    # Locks are always taken in a stable order to avoid lock-order inversions.
+    for reference_genome, dataset_type in sorted(resources):
+        fd = os.open(
+            resource_lock_path(reference_genome, dataset_type),
+            os.O_RDWR | os.O_CREAT,
+        )
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            os.close(fd)
+            release_resource_locks(fds)
+            return None
+        fds.append(fd)
+    return fds
+
+
+def release_resource_locks(fds: list[int]) -> None:
+    for fd in fds:
+        fcntl.flock(fd, fcntl.LOCK_UN)
+        os.close(fd)
@@ -0,0 +1,45 @@
+import fcntl
+import os
+
+from v03_pipeline.lib.core import DatasetType, ReferenceGenome
+from v03_pipeline.lib.misc.locks import (
+    queue_lock,
+    queue_lock_path,
+    release_resource_locks,
+    try_acquire_resource_locks,
+)
+from v03_pipeline.lib.test.mocked_dataroot_testcase import MockedDatarootTestCase
+
+
+class LocksTest(MockedDatarootTestCase):
+    def test_resource_locks(self) -> None:
+        grch38_snv_indel = (ReferenceGenome.GRCh38, DatasetType.SNV_INDEL)
+        grch38_mito = (ReferenceGenome.GRCh38, DatasetType.MITO)
+        grch37_snv_indel = (ReferenceGenome.GRCh37, DatasetType.SNV_INDEL)
+
+        fds = try_acquire_resource_locks({grch38_snv_indel})
+        self.assertEqual(len(fds), 1)
+
+        # Overlapping resource sets are refused and hold nothing.
+        self.assertIsNone(
+            try_acquire_resource_locks({grch38_mito, grch38_snv_indel}),
+        )
+        mito_fds = try_acquire_resource_locks({grch38_mito, grch37_snv_indel})
+        self.assertEqual(len(mito_fds), 2)
+
+        release_resource_locks(fds)
+        self.assertIsNone(try_acquire_resource_locks({grch38_mito}))
+        release_resource_locks(mito_fds)
+        fds = try_acquire_resource_locks(
+            {grch38_mito, grch38_snv_indel, grch37_snv_indel},
+        )
+        self.assertEqual(len(fds), 3)
+        release_resource_locks(fds)
+
+    def test_queue_lock(self) -> None:
+        with queue_lock():
+            fd = os.open(queue_lock_path(), os.O_RDWR)
+            with self.assertRaises(BlockingIOError):
+                fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        release_resource_locks([fd])
@@ -6,7 +6,9 @@ from v03_pipeline.lib.logger import get_logger
 logger = get_logger(__name__)
 
 
-def retry(tries=3, delay=30, backoff=3):
+def retry(tries=3, delay=30, backoff=3, no_retry=()):
+    # Exceptions in no_retry are raised immediately, e.g. deadlines that a
+    # retry would only extend.
     def decorator(func):
         @functools.wraps(func)
         def wrapper(*args, **kwargs):
@@ -24,6 +26,8 @@ def retry(tries=3, delay=30, backoff=3):
                     logger.info(
                         f'{func.__name__} args:{args_str} kwargs:{kwargs_str} succeeded on attempt {attempt} in {duration:.2f}s',
                     )
+                except no_retry:
+                    raise
                 except Exception:
                     duration = time.time() - start_time
                     logger.exception(
@@ -67,3 +67,17 @@ class TestRetryDecorator(unittest.TestCase):
             'func args: kwargs:d=SNV_INDEL failed on attempt 1 after 0.00s, retrying in 1 seconds.',
             mock_log.call_args[0][0],
         )
+
+    @patch('time.sleep', return_value=None)
+    @patch('v03_pipeline.lib.misc.retry.logger')
+    def test_no_retry(self, mock_logger, mock_sleep):
+        mock_func = Mock(side_effect=[TimeoutError('deadline'), 'success'])
+
+        @retry(tries=3, delay=1, backoff=2, no_retry=(TimeoutError,))
+        def func():
+            return mock_func()
+
+        with self.assertRaises(TimeoutError):
+            func()
+        self.assertEqual(mock_func.call_count, 1)
+        mock_sleep.assert_not_called()
@@ -1,16 +1,18 @@
 import datetime
+import json
 import os
 from collections import defaultdict
 
 import hailtop.fs as hfs
 
 from v03_pipeline.lib.core.dataset_type import DatasetType
-from v03_pipeline.lib.core.environment import Env
+from v03_pipeline.lib.core.definitions import ReferenceGenome
 from v03_pipeline.lib.misc.retry import retry
 from v03_pipeline.lib.paths import (
     clickhouse_load_fail_file_path,
     clickhouse_load_success_file_path,
     loading_pipeline_queue_dir,
+    metadata_for_run_path,
     pipeline_run_success_file_path,
 )
 
@@ -21,26 +23,34 @@ def new_run_id():
     )
 
 
-def get_oldest_queue_path() -> str | None:
+def get_queue_paths() -> list[str]:
     """
-    Returns the path of the oldest loading pipeline request file in the queue directory.
-    If the directory is empty, returns None.
+    Returns the paths of all loading pipeline request files in the queue directory,
+    oldest first.
     """
     queue_dir = loading_pipeline_queue_dir()
-    queue_files = os.listdir(queue_dir)
+    queue_files = [
+        os.path.join(queue_dir, queue_file) for queue_file in os.listdir(queue_dir)
+    ]
+    return sorted(queue_files, key=os.path.getctime)
 
-    if len(queue_files) == 0:
-        return None
-    queue_files = [os.path.join(queue_dir, queue_file) for queue_file in queue_files]
-    return min(queue_files, key=os.path.getctime)
 
-
-def is_queue_full() -> bool:
+def update_metadata_for_run(
+    reference_genome: ReferenceGenome,
+    dataset_type: DatasetType,
+    run_id: str,
+    **fields,
+) -> None:
     """
-    Checks if the loading pipeline queue directory is full.
-    Returns True if the number of files exceeds a predefined limit, otherwise False.
+    Adds fields, e.g. metrics recorded while the run's tasks execute, to
+    the run's metadata json.
     """
-    return len(os.listdir(loading_pipeline_queue_dir())) >= Env.LOADING_QUEUE_LIMIT
+    path = metadata_for_run_path(reference_genome, dataset_type, run_id)
+    with hfs.open(path) as f:
+        metadata_json = json.load(f)
+    metadata_json.update(fields)
+    with hfs.open(path, 'w') as f:
+        json.dump(metadata_json, f)
 
 
 @retry()
@@ -38,15 +38,17 @@ def validate_allele_type(
         ),
     )
     if ht.count() > 0:
-        collected_alleles = sorted(
-            [tuple(x) for x in ht.aggregate(hl.agg.collect_as_set(ht.alleles))],
-        )
-        # Handle case where all invalid alleles are NON_REF, indicating a gvcf:
-        if all('<NON_REF>' in alleles for alleles in collected_alleles):
-            msg = 'Alleles with invalid allele <NON_REF> are present in the callset.  This appears to be a GVCF containing records for sites with no variants.'
-            raise SeqrValidationError(msg)
-        msg = f'Alleles with invalid AlleleType are present in the callset: {collected_alleles[:10]}'
+        _raise_invalid_allele_types(ht.aggregate(hl.agg.collect_as_set(ht.alleles)))
+
+
+def _raise_invalid_allele_types(invalid_alleles: set[list[str]]) -> None:
+    collected_alleles = sorted([tuple(x) for x in invalid_alleles])
+    # Handle case where all invalid alleles are NON_REF, indicating a gvcf:
+    if all('<NON_REF>' in alleles for alleles in collected_alleles):
+        msg = 'Alleles with invalid allele <NON_REF> are present in the callset.  This appears to be a GVCF containing records for sites with no variants.'
         raise SeqrValidationError(msg)
+    msg = f'Alleles with invalid AlleleType are present in the callset: {collected_alleles[:10]}'
+    raise SeqrValidationError(msg)
 
 
 def validate_allele_depth_length(
@@ -64,9 +66,21 @@ def validate_allele_depth_length(
         hl.len(ht.found_ad_lengths) > 1,
     )
     if ht.count() > 0:
-        variant_format = dataset_type.table_key_format_fn(reference_genome)
-        msg = f'Found variants with unequal Allele Depth array lengths over samples (first 10, if applicable): { ({variant_format(v): v.found_ad_lengths for v in ht.take(10)}) }'
-        raise SeqrValidationError(msg)
+        _raise_unequal_allele_depth_lengths(
+            ht.take(10),
+            reference_genome,
+            dataset_type,
+        )
+
+
+def _raise_unequal_allele_depth_lengths(
+    variants: list[hl.Struct],
+    reference_genome: ReferenceGenome,
+    dataset_type: DatasetType,
+) -> None:
+    variant_format = dataset_type.table_key_format_fn(reference_genome)
+    msg = f'Found variants with unequal Allele Depth array lengths over samples (first 10, if applicable): { ({variant_format(v): v.found_ad_lengths for v in variants}) }'
+    raise SeqrValidationError(msg)
 
 
 def validate_no_duplicate_variants(
@@ -80,9 +94,17 @@ def validate_no_duplicate_variants(
     ht = ht.filter(ht.n > 1)
     ht = ht.select()
     if ht.count() > 0:
-        variant_format = dataset_type.table_key_format_fn(reference_genome)
-        msg = f'Variants are present multiple times in the callset: {[variant_format(v) for v in ht.take(10)]}'
-        raise SeqrValidationError(msg)
+        _raise_duplicate_variants(ht.take(10), reference_genome, dataset_type)
+
+
+def _raise_duplicate_variants(
+    variants: list[hl.Struct],
+    reference_genome: ReferenceGenome,
+    dataset_type: DatasetType,
+) -> None:
+    variant_format = dataset_type.table_key_format_fn(reference_genome)
+    msg = f'Variants are present multiple times in the callset: {[variant_format(v) for v in variants]}'
+    raise SeqrValidationError(msg)
 
 
 def validate_expected_contig_frequency(
@@ -91,7 +113,18 @@ def validate_expected_contig_frequency(
     min_rows_per_contig: int = MIN_ROWS_PER_CONTIG,
     **_: Any,
 ) -> None:
-    rows_per_contig = mt.aggregate_rows(hl.agg.counter(mt.locus.contig))
+    _check_rows_per_contig(
+        mt.aggregate_rows(hl.agg.counter(mt.locus.contig)),
+        reference_genome,
+        min_rows_per_contig,
+    )
+
+
+def _check_rows_per_contig(
+    rows_per_contig: dict[str, int],
+    reference_genome: ReferenceGenome,
+    min_rows_per_contig: int,
+) -> None:
     missing_contigs = (
         reference_genome.standard_contigs
         - reference_genome.optional_contigs
@@ -151,6 +184,30 @@ def validate_imported_field_types(
         raise SeqrValidationError(msg)
 
 
+def _sample_type_validation_excluded(project_guids: list[str]) -> bool:
+    return all(
+        project_guid in Env.SAMPLE_TYPE_VALIDATION_EXCLUDED_PROJECTS
+        for project_guid in project_guids
+    )
+
+
+def coding_and_noncoding_totals(
+    coding_and_noncoding_variants_ht: hl.Table,
+) -> hl.Struct:
+    # A table pruned to the loci of the callset carries the totals of the
+    # full table as globals, as they are the denominators of the sample type
+    # match fractions.
+    if 'totals' in coding_and_noncoding_variants_ht.globals.dtype.fields:
+        return hl.eval(coding_and_noncoding_variants_ht.totals)
+    ht = coding_and_noncoding_variants_ht
+    return ht.aggregate(
+        hl.struct(
+            coding=hl.agg.count_where(ht.coding),
+            noncoding=hl.agg.count_where(ht.noncoding),
+        ),
+    )
+
+
 def validate_sample_type(
     mt: hl.MatrixTable,
     reference_genome: ReferenceGenome,
@@ -160,26 +217,32 @@ def validate_sample_type(
     sample_type_match_threshold: float = SAMPLE_TYPE_MATCH_THRESHOLD,
     **_: Any,
 ) -> None:
-    if all(
-        project_guid in Env.SAMPLE_TYPE_VALIDATION_EXCLUDED_PROJECTS
-        for project_guid in project_guids
-    ):
+    if _sample_type_validation_excluded(project_guids):
         return
+    totals = coding_and_noncoding_totals(coding_and_noncoding_variants_ht)
     coding_variants_ht = coding_and_noncoding_variants_ht.filter(
         coding_and_noncoding_variants_ht.coding,
     )
     has_coding = (
-        mt.semi_join_rows(coding_variants_ht).count_rows() / coding_variants_ht.count()
+        mt.semi_join_rows(coding_variants_ht).count_rows() / totals.coding
         >= sample_type_match_threshold
     )
     noncoding_variants_ht = coding_and_noncoding_variants_ht.filter(
         coding_and_noncoding_variants_ht.noncoding,
     )
     has_noncoding = (
-        mt.semi_join_rows(noncoding_variants_ht).count_rows()
-        / noncoding_variants_ht.count()
+        mt.semi_join_rows(noncoding_variants_ht).count_rows() / totals.noncoding
         >= sample_type_match_threshold
     )
+    _check_sample_type(has_coding, has_noncoding, reference_genome, sample_type)
+
+
+def _check_sample_type(
+    has_coding: bool,
+    has_noncoding: bool,
+    reference_genome: ReferenceGenome,
+    sample_type: SampleType,
+) -> None:
     if not has_coding and not has_noncoding:
         msg = f"Genome version validation error: dataset specified as {reference_genome.value} but doesn't contain the expected number of common {reference_genome.value} variants"
         raise SeqrValidationError(msg)
@@ -201,3 +264,172 @@ SKIPPABLE_VALIDATIONS = [
     validate_no_duplicate_variants,
     validate_sample_type,
 ]
+
+
+def _previous_row_keys(mt: hl.MatrixTable) -> hl.StructExpression:
+    # Tracks the keys of the previous two rows, so that in a key-sorted
+    # callset a duplicate is found by comparing against its neighbour and a
+    # key present more than twice is reported once.
+    key_type = mt.row_key.dtype
+    return hl.scan.fold(
+        hl.struct(k1=hl.missing(key_type), k2=hl.missing(key_type)),
+        lambda acc: hl.struct(k1=mt.row_key, k2=acc.k1),
+        lambda left, right: hl.if_else(
+            hl.is_missing(right.k1),
+            left,
+            hl.if_else(
+                hl.is_missing(right.k2),
+                hl.struct(k1=right.k1, k2=left.k1),
+                right,
+            ),
+        ),
+    )
+
+
+def _fused_validation_aggregations(
+    mt: hl.MatrixTable,
+    validation_names: set[str],
+    dataset_type: DatasetType,
+    coding_and_noncoding_variants_ht: hl.Table | None,
+) -> hl.StructExpression:
+    mt = mt.annotate_rows(
+        **(
+            {
+                'found_ad_lengths': hl.agg.collect_as_set(hl.len(mt.AD)).remove(
+                    hl.missing(hl.tint32),
+                ),
+            }
+            if validate_allele_depth_length.__name__ in validation_names
+            else {}
+        ),
+        **(
+            {'prev_keys': _previous_row_keys(mt)}
+            if validate_no_duplicate_variants.__name__ in validation_names
+            else {}
+        ),
+        **(
+            {'coding_and_noncoding': coding_and_noncoding_variants_ht[mt.locus]}
+            if validate_sample_type.__name__ in validation_names
+            else {}
+        ),
+    )
+    aggregations = {
+        validate_allele_depth_length.__name__: lambda: hl.agg.filter(
+            hl.len(mt.found_ad_lengths) > 1,
+            hl.agg.take(
+                hl.struct(**mt.row_key, found_ad_lengths=mt.found_ad_lengths),
+                10,
+                ordering=mt.row_key,
+            ),
+        ),
+        validate_allele_type.__name__: lambda: hl.agg.filter(
+            dataset_type.invalid_allele_types.contains(
+                hl.numeric_allele_type(mt.alleles[0], mt.alleles[1]),
+            ),
+            hl.agg.collect_as_set(mt.alleles),
+        ),
+        validate_expected_contig_frequency.__name__: lambda: hl.agg.counter(
+            mt.locus.contig,
+        ),
+        validate_no_duplicate_variants.__name__: lambda: hl.agg.filter(
+            hl.or_else(mt.row_key == mt.prev_keys.k1, False)
+            & hl.or_else(mt.row_key != mt.prev_keys.k2, True),
+            hl.agg.take(mt.row_key, 10, ordering=mt.row_key),
+        ),
+        validate_sample_type.__name__: lambda: hl.struct(
+            coding=hl.agg.count_where(
+                hl.or_else(mt.coding_and_noncoding.coding, False),
+            ),
+            noncoding=hl.agg.count_where(
+                hl.or_else(mt.coding_and_noncoding.noncoding, False),
+            ),
+        ),
+    }
+    return mt.aggregate_rows(
+        hl.struct(
+            **{
+                name: aggregation()
+                for name, aggregation in aggregations.items()
+                if name in validation_names
+            },
+        ),
+    )
+
+
+def _raise_fused_validation_error(
+    validation_name: str,
+    result: Any,
+    reference_genome: ReferenceGenome,
+    dataset_type: DatasetType,
+    sample_type: SampleType,
+    **kwargs: Any,
+) -> None:
+    if validation_name == validate_allele_depth_length.__name__ and result:
+        _raise_unequal_allele_depth_lengths(result, reference_genome, dataset_type)
+    if validation_name == validate_allele_type.__name__ and result:
+        _raise_invalid_allele_types(result)
+    if validation_name == validate_expected_contig_frequency.__name__:
+        _check_rows_per_contig(
+            result,
+            reference_genome,
+            kwargs.get('min_rows_per_contig', MIN_ROWS_PER_CONTIG),
+        )
+    if validation_name == validate_no_duplicate_variants.__name__ and result:
+        _raise_duplicate_variants(result, reference_genome, dataset_type)
+    if validation_name == validate_sample_type.__name__:
+        threshold = kwargs.get(
+            'sample_type_match_threshold',
+            SAMPLE_TYPE_MATCH_THRESHOLD,
+        )
+        totals = coding_and_noncoding_totals(
+            kwargs['coding_and_noncoding_variants_ht'],
+        )
+        _check_sample_type(
+            result.coding / totals.coding >= threshold,
+            result.noncoding / totals.noncoding >= threshold,
+            reference_genome,
+            sample_type,
+        )
+
+
+def fused_validation_errors(
+    mt: hl.MatrixTable,
+    validations_to_skip: list[str],
+    dataset_type: DatasetType,
+    project_guids: list[str],
+    coding_and_noncoding_variants_ht: hl.Table | None = None,
+    **kwargs: Any,
+) -> list[SeqrValidationError]:
+    """
+    Runs the SKIPPABLE_VALIDATIONS as a single aggregation over the callset
+    rather than one Hail job per validation, returning the same errors, in
+    the same order, as running them one at a time.
+    """
+    validation_names = {
+        validation_f.__name__
+        for validation_f in SKIPPABLE_VALIDATIONS
+        if validation_f.__name__ not in validations_to_skip
+    }
+    if _sample_type_validation_excluded(project_guids):
+        validation_names.discard(validate_sample_type.__name__)
+    results = _fused_validation_aggregations(
+        mt,
+        validation_names,
+        dataset_type,
+        coding_and_noncoding_variants_ht,
+    )
+    errors = []
+    for validation_f in SKIPPABLE_VALIDATIONS:
+        if validation_f.__name__ not in validation_names:
+            continue
+        try:
+            _raise_fused_validation_error(
+                validation_f.__name__,
+                results[validation_f.__name__],
+                dataset_type=dataset_type,
+                coding_and_noncoding_variants_ht=coding_and_noncoding_variants_ht,
+                **kwargs,
+            )
+        except SeqrValidationError as e:
+            errors.append(e)
+    return errors
@@ -5,7 +5,9 @@ import hail as hl
 
 from v03_pipeline.lib.core import DatasetType, ReferenceGenome, SampleType
 from v03_pipeline.lib.misc.validation import (
+    SKIPPABLE_VALIDATIONS,
     SeqrValidationError,
+    fused_validation_errors,
     validate_allele_depth_length,
     validate_allele_type,
     validate_expected_contig_frequency,
@@ -462,3 +464,91 @@ class ValidationTest(unittest.TestCase):
                     coding_and_noncoding_variants_ht,
                 ),
             )
+
+    def test_fused_validation_errors(self) -> None:
+        mt = (
+            hl.MatrixTable.from_parts(
+                rows={
+                    'locus': [
+                        hl.Locus(
+                            contig='chr1',
+                            position=position,
+                            reference_genome='GRCh38',
+                        )
+                        for position in [1, 2, 2, 2, 3, 4, 4]
+                    ],
+                    'alleles': [
+                        ['A', 'C'],
+                        ['A', 'C'],
+                        ['A', 'C'],
+                        ['A', 'C'],
+                        ['A', '<NON_REF>'],
+                        ['A', 'T'],
+                        ['A', 'T'],
+                    ],
+                },
+                cols={'s': ['sample_1', 'sample_2']},
+                entries={
+                    'AD': [
+                        [[1, 0], [1, 0]],
+                        [[1, 0], [1, 0, 1]],
+                        [[1, 0], [1, 0]],
+                        [[1, 0], [1, 0]],
+                        [[1, 0], [1]],
+                        [[1, 0], [1, 0]],
+                        [[1, 0], [1, 0]],
+                    ],
+                },
+            )
+            .key_rows_by('locus', 'alleles')
+            .key_cols_by('s')
+        )
+        coding_and_noncoding_variants_ht = hl.Table.parallelize(
+            [
+                {
+                    'locus': hl.Locus(
+                        contig='chr1',
+                        position=position,
+                        reference_genome='GRCh38',
+                    ),
+                    'coding': coding,
+                    'noncoding': not coding,
+                }
+                for position, coding in [(1, True), (5, True), (6, False)]
+            ],
+            hl.tstruct(
+                locus=hl.tlocus('GRCh38'),
+                coding=hl.tbool,
+                noncoding=hl.tbool,
+            ),
+            key='locus',
+        )
+        kwargs = {
+            'reference_genome': ReferenceGenome.GRCh38,
+            'dataset_type': DatasetType.SNV_INDEL,
+            'sample_type': SampleType.WES,
+            'project_guids': ['project_a'],
+            'coding_and_noncoding_variants_ht': coding_and_noncoding_variants_ht,
+        }
+        expected_messages = []
+        for validation_f in SKIPPABLE_VALIDATIONS:
+            try:
+                validation_f(mt, **kwargs)
+            except SeqrValidationError as e:
+                expected_messages.append(e.msg)
+        self.assertEqual(len(expected_messages), 4)
+        self.assertEqual(
+            [e.msg for e in fused_validation_errors(mt, [], **kwargs)],
+            expected_messages,
+        )
+        self.assertEqual(
+            [
+                e.msg
+                for e in fused_validation_errors(
+                    mt,
+                    ['validate_allele_type', 'validate_sample_type'],
+                    **kwargs,
+                )
+            ],
+            [expected_messages[0], expected_messages[2], expected_messages[3]],
+        )
@@ -154,6 +154,23 @@ def metadata_for_run_path(
     )
 
 
+def stage_timings_path(
+    reference_genome: ReferenceGenome,
+    dataset_type: DatasetType,
+    run_id: str,
+    task_id: str,
+) -> str:
+    return os.path.join(
+        runs_path(
+            reference_genome,
+            dataset_type,
+        ),
+        run_id,
+        'stage_timings',
+        f'{task_id}.json',
+    )
+
+
 def project_table_path(
     reference_genome: ReferenceGenome,
     dataset_type: DatasetType,
@@ -309,6 +326,98 @@ def variant_annotations_table_path(
     )
 
 
+def caids_cache_table_path(
+    reference_genome: ReferenceGenome,
+    dataset_type: DatasetType,
+) -> str:
+    return os.path.join(
+        pipeline_prefix(
+            Env.PIPELINE_DATA_DIR,
+            reference_genome,
+            dataset_type,
+        ),
+        'caids.ht',
+    )
+
+
+def caids_cache_deltas_dir(
+    reference_genome: ReferenceGenome,
+    dataset_type: DatasetType,
+) -> str:
+    return os.path.join(
+        pipeline_prefix(
+            Env.PIPELINE_DATA_DIR,
+            reference_genome,
+            dataset_type,
+        ),
+        'caids_deltas',
+    )
+
+
+def vep_cache_dir(
+    reference_genome: ReferenceGenome,
+    dataset_type: DatasetType,
+) -> str:
+    return os.path.join(
+        pipeline_prefix(
+            Env.PIPELINE_DATA_DIR,
+            reference_genome,
+            dataset_type,
+        ),
+        'vep_cache',
+    )
+
+
+def vep_cache_table_path(
+    reference_genome: ReferenceGenome,
+    dataset_type: DatasetType,
+    vep_config_hash: str,
+) -> str:
+    return os.path.join(
+        vep_cache_dir(reference_genome, dataset_type),
+        f'{vep_config_hash}.ht',
+    )
+
+
+def vep_cache_deltas_dir(
+    reference_genome: ReferenceGenome,
+    dataset_type: DatasetType,
+    vep_config_hash: str,
+) -> str:
+    return os.path.join(
+        vep_cache_dir(reference_genome, dataset_type),
+        f'{vep_config_hash}_deltas',
+    )
+
+
+def vep_throughput_path(
+    reference_genome: ReferenceGenome,
+    dataset_type: DatasetType,
+) -> str:
+    return os.path.join(
+        pipeline_prefix(
+            Env.PIPELINE_DATA_DIR,
+            reference_genome,
+            dataset_type,
+        ),
+        'vep_throughput.json',
+    )
+
+
+def variant_annotations_table_deltas_dir(
+    reference_genome: ReferenceGenome,
+    dataset_type: DatasetType,
+) -> str:
+    return os.path.join(
+        pipeline_prefix(
+            Env.PIPELINE_DATA_DIR,
+            reference_genome,
+            dataset_type,
+        ),
+        'annotations_deltas',
+    )
+
+
 def variant_annotations_vcf_path(
     reference_genome: ReferenceGenome,
     dataset_type: DatasetType,
@@ -383,6 +492,31 @@ def new_variants_table_path(
     )
 
 
+def checkpoints_dir() -> str:
+    return os.path.join(Env.HAIL_TMP_DIR, 'checkpoints')
+
+
+def run_checkpoints_dir(run_id: str) -> str:
+    return os.path.join(checkpoints_dir(), run_id)
+
+
+def task_checkpoints_dir(run_id: str, task_id: str) -> str:
+    return os.path.join(run_checkpoints_dir(run_id), task_id)
+
+
+def allele_registry_checkpoint_dir(
+    reference_genome: ReferenceGenome,
+    dataset_type: DatasetType,
+    run_id: str,
+) -> str:
+    return os.path.join(
+        run_checkpoints_dir(run_id),
+        'allele_registry',
+        reference_genome.value,
+        dataset_type.value,
+    )
+
+
 def project_pedigree_path(
     reference_genome: ReferenceGenome,
     dataset_type: DatasetType,
@@ -401,6 +535,18 @@ def project_pedigree_path(
     )
 
 
+def gencode_mapping_cache_path(mapping_name: str, gencode_release: int) -> str:
+    """
+    Returns the path of the local cache of a parsed GENCODE mapping.
+    """
+    return os.path.join(
+        Env.LOCAL_DISK_MOUNT_DIR,
+        'gencode',
+        f'v{gencode_release}',
+        f'{mapping_name}.pickle',
+    )
+
+
 def loading_pipeline_queue_dir() -> str:
     """
     Returns the directory where loading pipeline requests are queued.
@@ -419,6 +565,37 @@ def loading_pipeline_deadletter_queue_dir() -> str:
     )
 
 
+def loading_pipeline_running_dir() -> str:
+    """
+    Returns the directory holding markers for queued requests that are being processed.
+    """
+    return os.path.join(
+        Env.LOCAL_DISK_MOUNT_DIR,
+        'loading_pipeline_running',
+    )
+
+
+def loading_pipeline_queue_db_path() -> str:
+    """
+    Returns the path of the SQLite database used by the sqlite queue backend.
+    """
+    return os.path.join(
+        Env.LOCAL_DISK_MOUNT_DIR,
+        'loading_pipeline_queue.db',
+    )
+
+
+def loading_pipeline_locks_dir() -> str:
+    """
+    Returns the directory holding the per-(reference_genome, dataset_type)
+    lock files used to serialize conflicting pipeline requests.
+    """
+    return os.path.join(
+        Env.LOCAL_DISK_MOUNT_DIR,
+        'loading_pipeline_locks',
+    )
+
+
 def loading_pipeline_queue_path(run_id: str) -> str:
     """
     Returns a new path for a loading pipeline queue request file.
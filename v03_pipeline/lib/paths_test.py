@@ -9,6 +9,9 @@ from v03_pipeline.lib.core import (
     SampleType,
 )
 from v03_pipeline.lib.paths import (
+    allele_registry_checkpoint_dir,
+    caids_cache_deltas_dir,
+    caids_cache_table_path,
     imported_callset_path,
     metadata_for_run_path,
     new_variants_table_path,
@@ -17,9 +20,13 @@ from v03_pipeline.lib.paths import (
     relatedness_check_table_path,
     remapped_and_subsetted_callset_path,
     sex_check_table_path,
+    stage_timings_path,
     tdr_metrics_path,
     validation_errors_for_run_path,
     variant_annotations_table_path,
+    vep_cache_deltas_dir,
+    vep_cache_table_path,
+    vep_throughput_path,
 )
 
 TEST_VCF = 'v03_pipeline/var/test/callsets/1kg_30varia*.vcf'
@@ -90,6 +97,17 @@ class TestPaths(unittest.TestCase):
             '/var/seqr/pipeline-data/GRCh38/SNV_INDEL/runs/manual__2023-06-26T18:30:09.349671+00:00/metadata.json',
         )
 
+    def test_stage_timings_path(self) -> None:
+        self.assertEqual(
+            stage_timings_path(
+                ReferenceGenome.GRCh38,
+                DatasetType.SNV_INDEL,
+                'manual__2023-06-26T18:30:09.349671+00:00',
+                'WriteNewVariantsTableTask_abc',
+            ),
+            '/var/seqr/pipeline-data/GRCh38/SNV_INDEL/runs/manual__2023-06-26T18:30:09.349671+00:00/stage_timings/WriteNewVariantsTableTask_abc.json',
+        )
+
     def test_variant_annotations_table_path(self) -> None:
         self.assertEqual(
             variant_annotations_table_path(
@@ -99,6 +117,56 @@ class TestPaths(unittest.TestCase):
             '/var/seqr/pipeline-data/GRCh38/GCNV/annotations.ht',
         )
 
+    def test_caids_cache_table_path(self) -> None:
+        self.assertEqual(
+            caids_cache_table_path(
+                ReferenceGenome.GRCh38,
+                DatasetType.SNV_INDEL,
+            ),
+            '/var/seqr/pipeline-data/GRCh38/SNV_INDEL/caids.ht',
+        )
+        self.assertEqual(
+            caids_cache_deltas_dir(
+                ReferenceGenome.GRCh38,
+                DatasetType.SNV_INDEL,
+            ),
+            '/var/seqr/pipeline-data/GRCh38/SNV_INDEL/caids_deltas',
+        )
+
+    def test_vep_cache_table_path(self) -> None:
+        self.assertEqual(
+            vep_cache_table_path(
+                ReferenceGenome.GRCh38,
+                DatasetType.SNV_INDEL,
+                'abc',
+            ),
+            '/var/seqr/pipeline-data/GRCh38/SNV_INDEL/vep_cache/abc.ht',
+        )
+        self.assertEqual(
+            vep_cache_deltas_dir(
+                ReferenceGenome.GRCh38,
+                DatasetType.SNV_INDEL,
+                'abc',
+            ),
+            '/var/seqr/pipeline-data/GRCh38/SNV_INDEL/vep_cache/abc_deltas',
+        )
+        self.assertEqual(
+            vep_throughput_path(ReferenceGenome.GRCh38, DatasetType.SNV_INDEL),
+            '/var/seqr/pipeline-data/GRCh38/SNV_INDEL/vep_throughput.json',
+        )
+
+    def test_allele_registry_checkpoint_dir(self) -> None:
+        with patch('v03_pipeline.lib.paths.Env') as mock_env:
+            mock_env.HAIL_TMP_DIR = 'gs://seqr-scratch-temp'
+            self.assertEqual(
+                allele_registry_checkpoint_dir(
+                    ReferenceGenome.GRCh38,
+                    DatasetType.SNV_INDEL,
+                    'manual__2023-06-26T18:30:09.349671',
+                ),
+                'gs://seqr-scratch-temp/checkpoints/manual__2023-06-26T18:30:09.349671/allele_registry/GRCh38/SNV_INDEL',
+            )
+
     def test_remapped_and_subsetted_callset_path(self) -> None:
         self.assertEqual(
             remapped_and_subsetted_callset_path(
@@ -1,8 +1,16 @@
+import contextlib
+import functools
 import gzip
 import logging
+import os
+import pickle
+from collections.abc import Callable
 
+import hail as hl
 import requests
 
+from v03_pipeline.lib.paths import gencode_mapping_cache_path
+
 logger = logging.getLogger(__name__)
 
 # Mirror of 'http://ftp.ebi.ac.uk/pub/databases/gencode/Gencode_human/release_{gencode_release}/gencode.v{gencode_release}.annotation.gtf.gz'
@@ -23,6 +31,8 @@ GENCODE_FILE_HEADER = [
     'info',
 ]
 EXPECTED_ENSEMBLE_TO_REFSEQ_FIELDS = 3
+# Bump when the format of the cached mappings changes.
+GENCODE_MAPPING_CACHE_VERSION = 1
 
 
 def load_gencode_gene_symbol_to_gene_id(gencode_release: int) -> dict[str, str]:
@@ -62,3 +72,61 @@ def load_gencode_ensembl_to_refseq_id(gencode_release: int):
             raise ValueError(msg)
         ensembl_to_refseq_ids[fields[0].split('.')[0]] = fields[1]
     return ensembl_to_refseq_ids
+
+
+def load_cached_gencode_mapping(
+    load_fn: Callable[[int], dict[str, str]],
+    gencode_release: int,
+) -> dict[str, str]:
+    """
+    Loads a parsed GENCODE mapping from the local cache, parsing and caching
+    it on a miss.  The cache is pickled, so it loads in milliseconds rather
+    than re-downloading and re-parsing the GTF.
+    """
+    path = gencode_mapping_cache_path(load_fn.__name__, gencode_release)
+    with (
+        contextlib.suppress(OSError, EOFError, pickle.UnpicklingError),
+        open(path, 'rb') as f,
+    ):
+        version, mapping = pickle.load(f)  # noqa: S301
+        if version == GENCODE_MAPPING_CACHE_VERSION:
+            return mapping
+    mapping = load_fn(gencode_release)
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Written to a temporary file first so that concurrent readers never
+        # see a partially written cache.
+        with open(f'{path}.{os.getpid()}', 'wb') as f:
+            pickle.dump(
+                (GENCODE_MAPPING_CACHE_VERSION, mapping),
+                f,
+                protocol=pickle.HIGHEST_PROTOCOL,
+            )
+        os.replace(f'{path}.{os.getpid()}', path)
+    except OSError:
+        logger.warning(f'Unable to cache GENCODE mapping at {path}')
+    return mapping
+
+
+@functools.cache
+def gencode_gene_symbol_to_gene_id_mapping(gencode_release: int) -> hl.DictExpression:
+    # NB: the dtype is passed explicitly to skip type imputation over every
+    # entry of the mapping.
+    return hl.literal(
+        load_cached_gencode_mapping(
+            load_gencode_gene_symbol_to_gene_id,
+            gencode_release,
+        ),
+        dtype=hl.tdict(hl.tstr, hl.tstr),
+    )
+
+
+@functools.cache
+def gencode_ensembl_to_refseq_id_mapping(gencode_release: int) -> hl.DictExpression:
+    return hl.literal(
+        load_cached_gencode_mapping(
+            load_gencode_ensembl_to_refseq_id,
+            gencode_release,
+        ),
+        dtype=hl.tdict(hl.tstr, hl.tstr),
+    )
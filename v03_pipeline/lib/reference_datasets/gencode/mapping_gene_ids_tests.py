@@ -1,14 +1,19 @@
 import gzip
-import unittest
+import os
+import pickle
 
 import responses
 
+from v03_pipeline.lib.paths import gencode_mapping_cache_path
 from v03_pipeline.lib.reference_datasets.gencode.mapping_gene_ids import (
     GENCODE_ENSEMBL_TO_REFSEQ_URL,
     GENCODE_GTF_URL,
+    GENCODE_MAPPING_CACHE_VERSION,
+    load_cached_gencode_mapping,
     load_gencode_ensembl_to_refseq_id,
     load_gencode_gene_symbol_to_gene_id,
 )
+from v03_pipeline.lib.test.mocked_dataroot_testcase import MockedDatarootTestCase
 
 GTF_DATA = [
     '#description: evidence-based annotation of the human genome, version 31 (Ensembl 97), mapped to GRCh37 with gencode-backmap',
@@ -29,7 +34,7 @@ ENST00000270722.10\tNM_022114.4\tNP_071397.3
 ENST00000288774.8\tNM_001374425.1\tNP_001361354.1"""
 
 
-class LoadGencodeTestCase(unittest.TestCase):
+class LoadGencodeTestCase(MockedDatarootTestCase):
     @responses.activate
     def test_load_gencode_gene_symbol_to_gene_id(self):
         url = GENCODE_GTF_URL.format(gencode_release=12)
@@ -62,3 +67,37 @@ class LoadGencodeTestCase(unittest.TestCase):
                 'ENST00000288774': 'NM_001374425.1',
             },
         )
+
+    @responses.activate
+    def test_load_cached_gencode_mapping(self):
+        url = GENCODE_GTF_URL.format(gencode_release=12)
+        responses.add(
+            responses.GET,
+            url,
+            body=gzip.compress(('\n'.join(GTF_DATA)).encode()),
+        )
+        mapping = load_cached_gencode_mapping(
+            load_gencode_gene_symbol_to_gene_id,
+            12,
+        )
+        self.assertDictEqual(mapping, GENE_ID_MAPPING)
+        path = gencode_mapping_cache_path('load_gencode_gene_symbol_to_gene_id', 12)
+        self.assertTrue(os.path.exists(path))
+
+        # A second load is served from the cache.
+        mapping = load_cached_gencode_mapping(
+            load_gencode_gene_symbol_to_gene_id,
+            12,
+        )
+        self.assertDictEqual(mapping, GENE_ID_MAPPING)
+        self.assertEqual(len(responses.calls), 1)
+
+        # A cache written in an older format is rebuilt.
+        with open(path, 'wb') as f:
+            pickle.dump((GENCODE_MAPPING_CACHE_VERSION - 1, {}), f)
+        mapping = load_cached_gencode_mapping(
+            load_gencode_gene_symbol_to_gene_id,
+            12,
+        )
+        self.assertDictEqual(mapping, GENE_ID_MAPPING)
+        self.assertEqual(len(responses.calls), 2)
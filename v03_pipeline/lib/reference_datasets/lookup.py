@@ -0,0 +1,133 @@
+import os
+
+import hail as hl
+
+from v03_pipeline.lib.core import Env, ReferenceGenome
+from v03_pipeline.lib.logger import get_logger
+from v03_pipeline.lib.misc.io import file_size_bytes
+from v03_pipeline.lib.paths import valid_reference_dataset_path
+from v03_pipeline.lib.reference_datasets.reference_dataset import ReferenceDataset
+
+logger = get_logger(__name__)
+
+
+def is_locus_keyed(ht: hl.Table) -> bool:
+    return len(ht.key) > 0 and isinstance(ht.key[0].dtype, hl.tlocus)
+
+
+def locus_windows(
+    locus: hl.LocusExpression,
+    window_size: int | None = None,
+) -> hl.SetExpression:
+    """
+    Aggregates the windows of window_size bases containing the loci.
+    """
+    window_size = window_size or Env.REFERENCE_DATASET_LOOKUP_WINDOW_SIZE
+    return hl.agg.collect_as_set(
+        hl.struct(contig=locus.contig, window=locus.position // window_size),
+    )
+
+
+def locus_window_intervals(
+    windows: set[hl.Struct],
+    reference_genome: ReferenceGenome,
+    window_size: int | None = None,
+) -> list[hl.Interval]:
+    window_size = window_size or Env.REFERENCE_DATASET_LOOKUP_WINDOW_SIZE
+    rg = hl.get_reference(reference_genome.value)
+    contig_index = {contig: i for i, contig in enumerate(rg.contigs)}
+    intervals = []
+    # Adjacent windows are merged into a single interval.
+    for contig, window in sorted(
+        ((w.contig, w.window) for w in windows),
+        key=lambda w: (contig_index[w[0]], w[1]),
+    ):
+        if intervals and intervals[-1][0] == contig and intervals[-1][2] == window - 1:
+            intervals[-1][2] = window
+        else:
+            intervals.append([contig, window, window])
+    return [
+        hl.Interval(
+            hl.Locus(
+                contig,
+                max(start * window_size, 1),
+                reference_genome=reference_genome.value,
+            ),
+            hl.Locus(
+                contig,
+                min((end + 1) * window_size - 1, rg.lengths[contig]),
+                reference_genome=reference_genome.value,
+            ),
+            includes_start=True,
+            includes_end=True,
+        )
+        for contig, start, end in intervals
+    ]
+
+
+def variant_key_intervals(
+    ht: hl.Table,
+    reference_genome: ReferenceGenome,
+) -> list[hl.Interval] | None:
+    """
+    Returns intervals covering the loci of a locus keyed table, or None if
+    the table isn't keyed by locus.
+    """
+    if not is_locus_keyed(ht):
+        return None
+    return locus_window_intervals(
+        ht.aggregate(locus_windows(ht.key[0])),
+        reference_genome,
+    )
+
+
+def prune_to_intervals(
+    ht: hl.Table,
+    intervals: list[hl.Interval] | None,
+) -> hl.Table:
+    # Interval and variant_id keyed reference datasets are read in full.
+    if intervals is None or not is_locus_keyed(ht):
+        return ht
+    return hl.filter_intervals(ht, intervals)
+
+
+def read_reference_dataset(
+    reference_genome: ReferenceGenome,
+    reference_dataset: ReferenceDataset,
+    intervals: list[hl.Interval] | None = None,
+) -> hl.Table:
+    """
+    Reads the reference dataset, skipping the partitions that don't overlap
+    the intervals.
+    """
+    return prune_to_intervals(
+        hl.read_table(
+            valid_reference_dataset_path(reference_genome, reference_dataset),
+        ),
+        intervals,
+    )
+
+
+def reference_dataset_read_stats(
+    reference_genome: ReferenceGenome,
+    reference_dataset: ReferenceDataset,
+    intervals: list[hl.Interval] | None,
+) -> dict[str, int]:
+    path = valid_reference_dataset_path(reference_genome, reference_dataset)
+    n_partitions = hl.read_table(path).n_partitions()
+    n_partitions_read = read_reference_dataset(
+        reference_genome,
+        reference_dataset,
+        intervals,
+    ).n_partitions()
+    # Partition sizes aren't recorded in the table metadata, so the bytes read
+    # are estimated from the average partition size.
+    n_bytes = file_size_bytes(os.path.join(path, 'rows', 'parts'))
+    stats = {
+        'partitions': n_partitions,
+        'partitions_read': n_partitions_read,
+        'bytes': n_bytes,
+        'bytes_read': round(n_bytes * n_partitions_read / max(n_partitions, 1)),
+    }
+    logger.info(f'Reading {reference_dataset.value}: {stats}')
+    return stats
@@ -0,0 +1,68 @@
+import unittest
+
+import hail as hl
+
+from v03_pipeline.lib.core.definitions import ReferenceGenome
+from v03_pipeline.lib.reference_datasets.lookup import (
+    locus_window_intervals,
+    prune_to_intervals,
+    variant_key_intervals,
+)
+
+
+class LookupTest(unittest.TestCase):
+    def test_locus_window_intervals(self):
+        self.assertListEqual(
+            locus_window_intervals(
+                {
+                    hl.Struct(contig='chr2', window=5),
+                    hl.Struct(contig='chr1', window=1),
+                    hl.Struct(contig='chr1', window=0),
+                    hl.Struct(contig='chr1', window=2489),
+                },
+                ReferenceGenome.GRCh38,
+                100000,
+            ),
+            [
+                hl.Interval(
+                    hl.Locus('chr1', 1, reference_genome='GRCh38'),
+                    hl.Locus('chr1', 199999, reference_genome='GRCh38'),
+                    includes_end=True,
+                ),
+                hl.Interval(
+                    hl.Locus('chr1', 248900000, reference_genome='GRCh38'),
+                    hl.Locus('chr1', 248956422, reference_genome='GRCh38'),
+                    includes_end=True,
+                ),
+                hl.Interval(
+                    hl.Locus('chr2', 500000, reference_genome='GRCh38'),
+                    hl.Locus('chr2', 599999, reference_genome='GRCh38'),
+                    includes_end=True,
+                ),
+            ],
+        )
+
+    def test_prune_to_intervals(self):
+        ht = hl.Table.parallelize(
+            [
+                {
+                    'locus': hl.Locus('chr1', position, reference_genome='GRCh38'),
+                    'alleles': ['A', 'C'],
+                }
+                for position in [10, 150000, 250000, 1000000]
+            ],
+            hl.tstruct(
+                locus=hl.tlocus('GRCh38'),
+                alleles=hl.tarray(hl.tstr),
+            ),
+            key=('locus', 'alleles'),
+        )
+        intervals = variant_key_intervals(
+            ht.filter(ht.locus.position < 200000),  # noqa: PLR2004
+            ReferenceGenome.GRCh38,
+        )
+        self.assertListEqual(
+            prune_to_intervals(ht, intervals).locus.position.collect(),
+            [10, 150000],
+        )
+        self.assertEqual(prune_to_intervals(ht, None).count(), 4)
@@ -4,6 +4,16 @@ import luigi
 from v03_pipeline.lib.annotations.liftover import remove_liftover
 from v03_pipeline.lib.core import Env
 from v03_pipeline.lib.logger import get_logger
+from v03_pipeline.lib.misc.checkpoints import delete_checkpoints
+from v03_pipeline.lib.misc.clickhouse import query_log_stats
+from v03_pipeline.lib.misc.instrumentation import (
+    finish_stage,
+    start_stage,
+    write_prometheus_textfile,
+    write_stage_timings,
+)
+from v03_pipeline.lib.misc.io import CHECKPOINT_DIR
+from v03_pipeline.lib.paths import stage_timings_path, task_checkpoints_dir
 from v03_pipeline.lib.tasks.base.base_loading_pipeline_params import (
     BaseLoadingPipelineParams,
 )
@@ -36,6 +46,31 @@ class BaseHailTableTask(luigi.Task):
         # run this method in the "after".
         remove_liftover()
 
+    @property
+    def checkpoints_dir(self) -> str | None:
+        # Only tasks belonging to a run have their checkpoints scoped.
+        if not getattr(self, 'run_id', None):
+            return None
+        return task_checkpoints_dir(self.run_id, self.task_id)
+
+
+@BaseHailTableTask.event_handler(luigi.Event.START)
+def start_checkpoints(task: BaseHailTableTask):
+    CHECKPOINT_DIR.set(task.checkpoints_dir)
+
+
+@BaseHailTableTask.event_handler(luigi.Event.FAILURE)
+def keep_checkpoints(*_):
+    # Left in place for a retry of the task to reuse.
+    CHECKPOINT_DIR.set(None)
+
+
+@BaseHailTableTask.event_handler(luigi.Event.SUCCESS)
+def delete_task_checkpoints(task: BaseHailTableTask):
+    CHECKPOINT_DIR.set(None)
+    if task.checkpoints_dir:
+        delete_checkpoints(task.checkpoints_dir)
+
 
 # NB: these are defined over luigi.Task instead of the BaseHailTableTask so that
 # they work on file dependencies.
@@ -59,13 +94,55 @@ def dependency_present(task):
 @luigi.Task.event_handler(luigi.Event.START)
 def start(task):
     logger.info(f'{task} start')
+    start_stage(task.task_family, task.task_id)
 
 
 @luigi.Task.event_handler(luigi.Event.FAILURE)
 def failure(task, _):
     logger.exception(f'{task} failure')
+    emit_stage_timings(task, 'failure')
 
 
 @luigi.Task.event_handler(luigi.Event.SUCCESS)
 def success(task):
     logger.info(f'{task} success')
+    emit_stage_timings(task, 'success')
+
+
+def emit_stage_timings(task: luigi.Task, status: str) -> None:
+    stage = finish_stage(status)
+    if stage is None:
+        return
+    clickhouse_queries = {
+        op['query_id']: op
+        for op in stage.operations
+        if op['operation'] == 'clickhouse_query'
+    }
+    if clickhouse_queries:
+        try:
+            for query_id, stats in query_log_stats(list(clickhouse_queries)).items():
+                clickhouse_queries[query_id].update(stats)
+        except Exception:
+            logger.exception('Unable to read the ClickHouse query log')
+    logger.info(f'{task} stage timings: {stage.totals()}')
+    reference_genome = getattr(task, 'reference_genome', None)
+    dataset_type = getattr(task, 'dataset_type', None)
+    run_id = getattr(task, 'run_id', None)
+    if reference_genome and dataset_type and run_id:
+        write_stage_timings(
+            stage_timings_path(reference_genome, dataset_type, run_id, task.task_id),
+            stage,
+        )
+    if Env.PROMETHEUS_TEXTFILE_DIR:
+        write_prometheus_textfile(
+            Env.PROMETHEUS_TEXTFILE_DIR,
+            stage,
+            **(
+                {
+                    'reference_genome': reference_genome.value,
+                    'dataset_type': dataset_type.value,
+                }
+                if reference_genome and dataset_type
+                else {}
+            ),
+        )
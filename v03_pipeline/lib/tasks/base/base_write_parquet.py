@@ -1,18 +1,51 @@
 import luigi
+from pyspark import StorageLevel
 
-from v03_pipeline.lib.misc.io import checkpoint
+from v03_pipeline.lib.core import Env, FeatureFlag
+from v03_pipeline.lib.logger import get_logger
+from v03_pipeline.lib.misc.io import checkpoint, rendered_ir, write_tuned_parquet
 from v03_pipeline.lib.tasks.files import GCSorLocalFolderTarget
 
+logger = get_logger(__name__)
+
 
 class BaseWriteParquetTask(luigi.Task):
+    # Low cardinality columns to dictionary encode in tuned exports.  When
+    # None, parquet's default of dictionary encoding every column is kept.
+    dictionary_encoded_columns: tuple[str, ...] | None = None
+
     def complete(self) -> luigi.Target:
         return GCSorLocalFolderTarget(self.output().path).exists()
 
     def run(self) -> None:
         ht = self.create_table()
-        ht, _ = checkpoint(ht)
+        # The table is streamed partition by partition into parquet rather
+        # than first being written out in native format, unless its IR is
+        # deep enough that compiling it in one piece is a problem.
+        checkpointed = bool(Env.PARQUET_EXPORT_CHECKPOINT_MIN_IR_LENGTH) and (
+            len(rendered_ir(ht)) > Env.PARQUET_EXPORT_CHECKPOINT_MIN_IR_LENGTH
+        )
+        if checkpointed:
+            logger.info('Checkpointing before parquet export')
+            ht, _ = checkpoint(ht)
         df = ht.to_spark(flatten=False)
         df = df.withColumnRenamed('key_', 'key')
+        if FeatureFlag.WRITE_TUNED_PARQUET_EXPORTS:
+            # The tuned layout samples keys before writing, so an uncheckpointed
+            # table is spilled to executor disk rather than computed twice.
+            if not checkpointed:
+                df = df.persist(StorageLevel.DISK_ONLY)
+            try:
+                write_tuned_parquet(
+                    df,
+                    self.output().path,
+                    self.dictionary_encoded_columns,
+                )
+            finally:
+                # NB: the worker's JVM outlives the task, so spilled blocks
+                # are released even if the write fails.
+                df.unpersist()
+            return
         df.write.parquet(
             self.output().path,
             mode='overwrite',
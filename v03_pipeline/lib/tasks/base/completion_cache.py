@@ -0,0 +1,68 @@
+import contextlib
+import functools
+import threading
+from collections.abc import Callable, Iterator
+
+import luigi
+
+_LOCK = threading.Lock()
+# Results of memoized complete() checks, keyed by task_id and method, or None
+# outside of a completion_cache block.
+_CACHE: dict[tuple[str, str], bool] | None = None
+
+
+@contextlib.contextmanager
+def completion_cache() -> Iterator[None]:
+    """
+    Memoizes the complete() checks of tasks decorated with memoized_complete
+    for the duration of a build.  Luigi re-checks a task whenever a task
+    depending on it is scheduled or run, and the checks of tasks shared by
+    every project of a request otherwise repeat once per project.
+    """
+    global _CACHE  # noqa: PLW0603
+    with _LOCK:
+        _CACHE = {}
+    try:
+        yield
+    finally:
+        with _LOCK:
+            _CACHE = None
+
+
+def memoized_complete(complete: Callable[[luigi.Task], bool]):
+    @functools.wraps(complete)
+    def wrapper(task: luigi.Task) -> bool:
+        # NB: keyed on the method as well, so that memoized overrides calling
+        # super().complete() don't read each other's results.
+        key = (task.task_id, complete.__qualname__)
+        with _LOCK:
+            if _CACHE is not None and key in _CACHE:
+                return _CACHE[key]
+        is_complete = complete(task)
+        with _LOCK:
+            if _CACHE is not None:
+                _CACHE[key] = is_complete
+        return is_complete
+
+    return wrapper
+
+
+@luigi.Task.event_handler(luigi.Event.SUCCESS)
+def invalidate_completion_cache(task: luigi.Task) -> None:
+    # A task may share its output with others (e.g. the imported callset is
+    # rewritten by its validation), so its success may complete any task
+    # cached as incomplete.  Completed tasks stay complete.
+    with _LOCK:
+        if _CACHE is None:
+            return
+        for key, is_complete in list(_CACHE.items()):
+            if not is_complete or key[0] == task.task_id:
+                del _CACHE[key]
+
+
+@luigi.Task.event_handler(luigi.Event.FAILURE)
+def clear_completion_cache(*_) -> None:
+    # A failed task may have left a shared output partially rewritten.
+    with _LOCK:
+        if _CACHE is not None:
+            _CACHE.clear()
@@ -0,0 +1,70 @@
+import unittest
+
+import luigi
+import luigi.worker
+
+from v03_pipeline.lib.tasks.base.completion_cache import (
+    completion_cache,
+    memoized_complete,
+)
+
+
+class CountedTask(luigi.Task):
+    name = luigi.Parameter()
+    n_complete_checks = 0
+    ran: set[str] = set()  # noqa: RUF012
+
+    @memoized_complete
+    def complete(self) -> bool:
+        CountedTask.n_complete_checks += 1
+        return self.name in CountedTask.ran
+
+    def run(self) -> None:
+        CountedTask.ran.add(self.name)
+
+
+class DependentTask(luigi.Task):
+    i = luigi.IntParameter()
+
+    def requires(self) -> luigi.Task:
+        return CountedTask('shared')
+
+    def complete(self) -> bool:
+        return False
+
+    def run(self) -> None:
+        pass
+
+
+class CompletionCacheTest(unittest.TestCase):
+    def setUp(self) -> None:
+        CountedTask.n_complete_checks = 0
+        CountedTask.ran = set()
+
+    def test_memoized_complete(self) -> None:
+        task = CountedTask('a')
+        with completion_cache():
+            self.assertFalse(task.complete())
+            self.assertFalse(task.complete())
+            self.assertEqual(CountedTask.n_complete_checks, 1)
+            CountedTask.ran.add('a')
+            # Another task's success invalidates incomplete results.
+            luigi.Task.trigger_event(CountedTask('b'), luigi.Event.SUCCESS, task)
+            self.assertTrue(task.complete())
+            self.assertTrue(task.complete())
+            self.assertEqual(CountedTask.n_complete_checks, 2)
+        # Nothing is memoized outside of a build.
+        self.assertTrue(task.complete())
+        self.assertTrue(task.complete())
+        self.assertEqual(CountedTask.n_complete_checks, 4)
+
+    def test_completion_cache_build(self) -> None:
+        with completion_cache():
+            worker = luigi.worker.Worker()
+            for i in range(5):
+                worker.add(DependentTask(i))
+            worker.run()
+        self.assertEqual(CountedTask.ran, {'shared'})
+        # Checked once while scheduling and once more after running, rather
+        # than again by each of the dependent tasks.
+        self.assertEqual(CountedTask.n_complete_checks, 2)
@@ -23,7 +23,10 @@ from v03_pipeline.lib.tasks.clickhouse_migration.migrate_project_variants_to_cli
     MigrateProjectVariantsToClickHouseTask,
     WriteProjectSubsettedVariantsTask,
 )
-from v03_pipeline.lib.tasks.exports.fields import get_entries_export_fields
+from v03_pipeline.lib.tasks.exports.fields import (
+    get_entries_export_annotation_fields,
+    get_entries_export_fields,
+)
 from v03_pipeline.lib.tasks.files import GCSorLocalTarget, HailTableTask
 
 PROJECT_SUBSETTED_ANNOTATIONS_TABLE_TASK = 'project_subsetted_annotations_table_task'
@@ -69,6 +72,9 @@ class WriteProjectEntriesParquetTask(BaseWriteParquetTask):
         annotations_ht = hl.read_table(
             self.input()[PROJECT_SUBSETTED_ANNOTATIONS_TABLE_TASK].path,
         )
+        annotations_ht = annotations_ht.select(
+            **get_entries_export_annotation_fields(annotations_ht, self.dataset_type),
+        )
         ht = ht.join(annotations_ht)
         ht = ht.explode(ht.family_entries)
         ht = ht.filter(hl.is_defined(ht.family_entries))
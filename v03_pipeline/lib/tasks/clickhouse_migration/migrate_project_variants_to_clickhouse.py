@@ -3,6 +3,7 @@ import luigi
 import luigi.util
 
 from v03_pipeline.lib.core import SampleType
+from v03_pipeline.lib.misc.annotations_table import read_variant_annotations_table
 from v03_pipeline.lib.paths import (
     new_variants_table_path,
     project_table_path,
@@ -56,7 +57,7 @@ class WriteProjectSubsettedVariantsTask(BaseWriteTask):
         ]
 
     def create_table(self) -> hl.Table:
-        ht = hl.read_table(self.input()[0].path)
+        ht = read_variant_annotations_table(self.reference_genome, self.dataset_type)
         if not hasattr(ht, 'key_'):
             ht = ht.add_index(name='key_')
         if self.dataset_type.filter_invalid_sites:
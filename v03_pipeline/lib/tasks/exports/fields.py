@@ -127,11 +127,69 @@ def get_calls_export_fields(
     }[dataset_type](fe)
 
 
+# The annotations table fields read by get_entries_export_fields and
+# get_calls_export_fields, mapped to the nested fields they use (an empty
+# tuple keeps the whole field).  Only these are carried through the join
+# of the annotations table with the entries.
+ENTRIES_EXPORT_ANNOTATION_FIELDS = {
+    DatasetType.SNV_INDEL: {
+        'key_': (),
+        'xpos': (),
+        'gnomad_genomes': ('AF_POPMAX_OR_GLOBAL',),
+        'sorted_transcript_consequences': ('gene_id',),
+    },
+    DatasetType.MITO: {
+        'key_': (),
+        'xpos': (),
+    },
+    DatasetType.SV: {
+        'key_': (),
+        'xpos': (),
+        'sorted_gene_consequences': ('gene_id',),
+    },
+    DatasetType.GCNV: {
+        'key_': (),
+        'xpos': (),
+        'sorted_gene_consequences': ('gene_id',),
+        'start_locus': (),
+        'end_locus': (),
+        'num_exon': (),
+    },
+}
+
+
+def select_annotation_fields(
+    ht: hl.Table,
+    fields: dict[str, tuple[str, ...]],
+) -> dict[str, hl.Expression]:
+    projected = {}
+    for field, subfields in fields.items():
+        if not subfields:
+            projected[field] = ht[field]
+        elif isinstance(ht[field], hl.expr.ArrayExpression):
+            projected[field] = ht[field].map(
+                lambda c, subfields=subfields: c.select(*subfields),
+            )
+        else:
+            projected[field] = ht[field].select(*subfields)
+    return projected
+
+
+def get_entries_export_annotation_fields(
+    ht: hl.Table,
+    dataset_type: DatasetType,
+):
+    return select_annotation_fields(
+        ht,
+        ENTRIES_EXPORT_ANNOTATION_FIELDS[dataset_type],
+    )
+
+
 def get_entries_export_fields(
     ht: hl.Table,
     dataset_type: DatasetType,
     sample_type: SampleType,
-    project_guid: str,
+    project_guid: str | hl.StringExpression,
 ):
     return {
         'key_': ht.key_,
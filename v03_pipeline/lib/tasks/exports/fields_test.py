@@ -0,0 +1,109 @@
+import unittest
+
+import hail as hl
+
+from v03_pipeline.lib.core import DatasetType, SampleType
+from v03_pipeline.lib.tasks.exports.fields import (
+    ENTRIES_EXPORT_ANNOTATION_FIELDS,
+    get_entries_export_annotation_fields,
+    get_entries_export_fields,
+    select_annotation_fields,
+)
+
+TEST_ANNOTATIONS = 'v03_pipeline/var/test/exports/GRCh38/{dataset_type}/annotations.ht'
+TEST_SNV_INDEL_ANNOTATIONS = TEST_ANNOTATIONS.format(dataset_type='SNV_INDEL')
+TEST_GCNV_ANNOTATIONS = TEST_ANNOTATIONS.format(dataset_type='GCNV')
+
+# Every entry field read by get_calls_export_fields, across dataset types.
+TEST_FAMILY_ENTRY_TYPE = hl.tstruct(
+    s=hl.tstr,
+    family_guid=hl.tstr,
+    GT=hl.tcall,
+    GQ=hl.tint32,
+    AB=hl.tfloat64,
+    DP=hl.tint32,
+    HL=hl.tfloat64,
+    mito_cn=hl.tint32,
+    contamination=hl.tfloat64,
+    CN=hl.tint32,
+    QS=hl.tint32,
+    defragged=hl.tbool,
+    sample_start=hl.tint32,
+    sample_end=hl.tint32,
+    sample_num_exon=hl.tint32,
+    sample_gene_ids=hl.tset(hl.tstr),
+    concordance=hl.tstruct(
+        new_call=hl.tbool,
+        prev_call=hl.tbool,
+        prev_num_alt=hl.tint32,
+        prev_overlap=hl.tbool,
+    ),
+)
+
+
+def export_entries(
+    ht: hl.Table,
+    dataset_type: DatasetType,
+    fields: dict[str, tuple[str, ...]],
+) -> hl.Table:
+    ht = ht.select(
+        **select_annotation_fields(ht, fields),
+        filters=hl.empty_set(hl.tstr),
+        family_entries=hl.empty_array(TEST_FAMILY_ENTRY_TYPE),
+    )
+    ht = ht.key_by()
+    return ht.select(
+        **get_entries_export_fields(
+            ht,
+            dataset_type,
+            SampleType.WGS,
+            'R0113_test_project',
+        ),
+    )
+
+
+class FieldsTest(unittest.TestCase):
+    def test_get_entries_export_annotation_fields(self) -> None:
+        ht = hl.read_table(TEST_SNV_INDEL_ANNOTATIONS)
+        ht = ht.select(
+            **get_entries_export_annotation_fields(ht, DatasetType.SNV_INDEL),
+        )
+        self.assertListEqual(
+            list(ht.row_value),
+            ['key_', 'xpos', 'gnomad_genomes', 'sorted_transcript_consequences'],
+        )
+        self.assertListEqual(list(ht.gnomad_genomes), ['AF_POPMAX_OR_GLOBAL'])
+        self.assertListEqual(
+            list(ht.sorted_transcript_consequences.dtype.element_type),
+            ['gene_id'],
+        )
+        ht = hl.read_table(TEST_GCNV_ANNOTATIONS)
+        ht = ht.select(**get_entries_export_annotation_fields(ht, DatasetType.GCNV))
+        self.assertListEqual(
+            list(ht.row_value),
+            [
+                'key_',
+                'xpos',
+                'sorted_gene_consequences',
+                'start_locus',
+                'end_locus',
+                'num_exon',
+            ],
+        )
+
+    def test_entries_export_annotation_fields_match_export_fields(self) -> None:
+        for dataset_type, fields in ENTRIES_EXPORT_ANNOTATION_FIELDS.items():
+            with self.subTest(dataset_type=dataset_type):
+                ht = hl.read_table(
+                    TEST_ANNOTATIONS.format(dataset_type=dataset_type.value),
+                )
+                # Every annotation read by the export is declared...
+                export_entries(ht, dataset_type, fields)
+                # ...and every declared annotation is read by the export.
+                for field in fields:
+                    with self.assertRaises(AttributeError):
+                        export_entries(
+                            ht,
+                            dataset_type,
+                            {k: v for k, v in fields.items() if k != field},
+                        )
@@ -3,6 +3,9 @@ import luigi
 import luigi.util
 
 from v03_pipeline.lib.annotations.fields import get_fields
+from v03_pipeline.lib.core import FeatureFlag
+from v03_pipeline.lib.misc.annotations_table import read_variant_annotations_table
+from v03_pipeline.lib.misc.callsets import union_hts
 from v03_pipeline.lib.misc.family_entries import (
     compute_callset_family_entries_ht,
     deduplicate_by_most_non_ref_calls,
@@ -10,13 +13,15 @@ from v03_pipeline.lib.misc.family_entries import (
 )
 from v03_pipeline.lib.paths import (
     new_entries_parquet_path,
-    variant_annotations_table_path,
 )
 from v03_pipeline.lib.tasks.base.base_loading_run_params import (
     BaseLoadingRunParams,
 )
 from v03_pipeline.lib.tasks.base.base_write_parquet import BaseWriteParquetTask
-from v03_pipeline.lib.tasks.exports.fields import get_entries_export_fields
+from v03_pipeline.lib.tasks.exports.fields import (
+    get_entries_export_annotation_fields,
+    get_entries_export_fields,
+)
 from v03_pipeline.lib.tasks.files import GCSorLocalTarget
 from v03_pipeline.lib.tasks.update_variant_annotations_table_with_new_samples import (
     UpdateVariantAnnotationsTableWithNewSamplesTask,
@@ -31,6 +36,8 @@ REMAPPED_AND_SUBSETTED_CALLSET_TASKS = 'remapped_and_subsetted_callset_tasks'
 
 @luigi.util.inherits(BaseLoadingRunParams)
 class WriteNewEntriesParquetTask(BaseWriteParquetTask):
+    dictionary_encoded_columns = ('project_guid', 'family_guid', 'sample_type')
+
     def output(self) -> luigi.Target:
         return GCSorLocalTarget(
             new_entries_parquet_path(
@@ -54,8 +61,38 @@ class WriteNewEntriesParquetTask(BaseWriteParquetTask):
             ],
         }
 
+    def export_entries(
+        self,
+        ht: hl.Table,
+        project_guid: str | None = None,
+    ) -> hl.Table:
+        annotations_ht = read_variant_annotations_table(
+            self.reference_genome,
+            self.dataset_type,
+        )
+        annotations_ht = annotations_ht.select(
+            **get_entries_export_annotation_fields(annotations_ht, self.dataset_type),
+        )
+        ht = ht.join(annotations_ht)
+
+        # the family entries ht will contain rows
+        # where at least one family is defined... after explosion,
+        # rows where a family is not defined should be removed.
+        ht = ht.explode(ht.family_entries)
+        ht = ht.filter(hl.is_defined(ht.family_entries))
+        ht = ht.key_by()
+        ht = ht.select_globals()
+        return ht.select(
+            **get_entries_export_fields(
+                ht,
+                self.dataset_type,
+                self.sample_type,
+                ht.project_guid if project_guid is None else project_guid,
+            ),
+        )
+
     def create_table(self) -> None:
-        unioned_ht = None
+        hts = []
         for project_guid, remapped_and_subsetted_callset_task in zip(
             self.project_guids,
             self.input()[REMAPPED_AND_SUBSETTED_CALLSET_TASKS],
@@ -73,28 +110,13 @@ class WriteNewEntriesParquetTask(BaseWriteParquetTask):
             )
             ht = deglobalize_ids(ht)
             ht = deduplicate_by_most_non_ref_calls(ht)
-            annotations_ht = hl.read_table(
-                variant_annotations_table_path(
-                    self.reference_genome,
-                    self.dataset_type,
-                ),
-            )
-            ht = ht.join(annotations_ht)
-
-            # the family entries ht will contain rows
-            # where at least one family is defined... after explosion,
-            # rows where a family is not defined should be removed.
-            ht = ht.explode(ht.family_entries)
-            ht = ht.filter(hl.is_defined(ht.family_entries))
-            ht = ht.key_by()
-            ht = ht.select_globals()
-            ht = ht.select(
-                **get_entries_export_fields(
-                    ht,
-                    self.dataset_type,
-                    self.sample_type,
-                    project_guid,
-                ),
-            )
-            unioned_ht = unioned_ht.union(ht) if unioned_ht else ht
-        return unioned_ht
+            if FeatureFlag.EXPORT_ENTRIES_WITH_SINGLE_JOIN:
+                hts.append(ht.select_globals().annotate(project_guid=project_guid))
+                continue
+            hts.append(self.export_entries(ht, project_guid))
+        if FeatureFlag.EXPORT_ENTRIES_WITH_SINGLE_JOIN:
+            # The projects' family entries are unioned, tagged with their
+            # project, so that the annotations table is joined once rather
+            # than once per project.
+            return self.export_entries(union_hts(hts))
+        return union_hts(hts)
@@ -1,3 +1,5 @@
+from unittest.mock import Mock, patch
+
 import hail as hl
 import luigi.worker
 import pandas as pd
@@ -7,6 +9,7 @@ from v03_pipeline.lib.core import (
     ReferenceGenome,
     SampleType,
 )
+from v03_pipeline.lib.misc.io import checkpoint
 from v03_pipeline.lib.misc.validation import ALL_VALIDATIONS
 from v03_pipeline.lib.paths import (
     new_entries_parquet_path,
@@ -82,6 +85,91 @@ class WriteNewEntriesParquetTest(MockedDatarootTestCase):
             ),
         )
 
+    @patch(
+        'v03_pipeline.lib.tasks.base.base_write_parquet.checkpoint',
+        wraps=checkpoint,
+    )
+    @patch('v03_pipeline.lib.tasks.base.base_write_parquet.Env')
+    def test_write_new_entries_parquet_checkpoint_fallback(
+        self,
+        mock_env: Mock,
+        mock_checkpoint: Mock,
+    ):
+        copy_project_pedigree_to_mocked_dir(
+            TEST_PEDIGREE_3_REMAP,
+            ReferenceGenome.GRCh38,
+            DatasetType.SNV_INDEL,
+            SampleType.WGS,
+            'R0113_test_project',
+        )
+        task = WriteNewEntriesParquetTask(
+            reference_genome=ReferenceGenome.GRCh38,
+            dataset_type=DatasetType.SNV_INDEL,
+            sample_type=SampleType.WGS,
+            callset_path=TEST_SNV_INDEL_VCF,
+            project_guids=['R0113_test_project'],
+            validations_to_skip=[ALL_VALIDATIONS],
+            run_id=TEST_RUN_ID,
+        )
+        mock_env.PARQUET_EXPORT_CHECKPOINT_MIN_IR_LENGTH = 0
+        worker = luigi.worker.Worker()
+        worker.add(task)
+        worker.run()
+        self.assertTrue(task.complete())
+        mock_checkpoint.assert_not_called()
+        df = pd.read_parquet(task.output().path)
+
+        # With the fallback enabled, the export is checkpointed first and
+        # is otherwise unchanged.
+        mock_env.PARQUET_EXPORT_CHECKPOINT_MIN_IR_LENGTH = 1
+        task.run()
+        mock_checkpoint.assert_called_once()
+        pd.testing.assert_frame_equal(pd.read_parquet(task.output().path), df)
+
+    @patch('v03_pipeline.lib.tasks.exports.write_new_entries_parquet.FeatureFlag')
+    def test_write_new_entries_parquet_single_join(self, mock_ff: Mock):
+        copy_project_pedigree_to_mocked_dir(
+            TEST_PEDIGREE_3_REMAP,
+            ReferenceGenome.GRCh38,
+            DatasetType.SNV_INDEL,
+            SampleType.WGS,
+            'R0113_test_project',
+        )
+        copy_project_pedigree_to_mocked_dir(
+            TEST_PEDIGREE_4_REMAP,
+            ReferenceGenome.GRCh38,
+            DatasetType.SNV_INDEL,
+            SampleType.WGS,
+            'R0114_project4',
+        )
+        mock_ff.EXPORT_ENTRIES_WITH_SINGLE_JOIN = False
+        task = WriteNewEntriesParquetTask(
+            reference_genome=ReferenceGenome.GRCh38,
+            dataset_type=DatasetType.SNV_INDEL,
+            sample_type=SampleType.WGS,
+            callset_path=TEST_SNV_INDEL_VCF,
+            project_guids=['R0113_test_project', 'R0114_project4'],
+            validations_to_skip=[ALL_VALIDATIONS],
+            run_id=TEST_RUN_ID,
+        )
+        worker = luigi.worker.Worker()
+        worker.add(task)
+        worker.run()
+        self.assertTrue(task.complete())
+        df = pd.read_parquet(task.output().path)
+
+        # Joining every project's entries at once exports the same rows.
+        mock_ff.EXPORT_ENTRIES_WITH_SINGLE_JOIN = True
+        task.run()
+        single_join_df = pd.read_parquet(task.output().path)
+        sort_by = ['key', 'project_guid', 'family_guid']
+        self.assertListEqual(
+            convert_ndarray_to_list(
+                single_join_df.sort_values(sort_by).to_dict('records'),
+            ),
+            convert_ndarray_to_list(df.sort_values(sort_by).to_dict('records')),
+        )
+
     def test_write_new_entries_parquet(self):
         copy_project_pedigree_to_mocked_dir(
             TEST_PEDIGREE_3_REMAP,
@@ -2,11 +2,11 @@ import hail as hl
 import luigi
 import luigi.util
 
+from v03_pipeline.lib.misc.annotations_table import read_variant_annotations_table
 from v03_pipeline.lib.misc.callsets import get_callset_ht
 from v03_pipeline.lib.paths import (
     new_variants_parquet_path,
     new_variants_table_path,
-    variant_annotations_table_path,
 )
 from v03_pipeline.lib.tasks.base.base_loading_run_params import (
     BaseLoadingRunParams,
@@ -62,11 +62,9 @@ class WriteNewVariantsParquetTask(BaseWriteParquetTask):
             # that lives at the new variants table path.
             and len(self.project_guids) > 0
         ):
-            ht = hl.read_table(
-                variant_annotations_table_path(
-                    self.reference_genome,
-                    self.dataset_type,
-                ),
+            ht = read_variant_annotations_table(
+                self.reference_genome,
+                self.dataset_type,
             )
             callset_ht = get_callset_ht(
                 self.reference_genome,
@@ -1,3 +1,5 @@
+import os
+
 import hail as hl
 import luigi
 import luigi.util
@@ -5,9 +7,19 @@ import luigi.util
 from v03_pipeline.lib.core import (
     Env,
 )
+from v03_pipeline.lib.logger import get_logger
 from v03_pipeline.lib.misc.allele_registry import register_alleles_in_chunks
+from v03_pipeline.lib.misc.delta_tables import (
+    compact_cache_table,
+    read_cache_table,
+    write_cache_table_delta,
+)
 from v03_pipeline.lib.misc.io import checkpoint
+from v03_pipeline.lib.misc.runs import update_metadata_for_run
 from v03_pipeline.lib.paths import (
+    allele_registry_checkpoint_dir,
+    caids_cache_deltas_dir,
+    caids_cache_table_path,
     new_variants_table_path,
 )
 from v03_pipeline.lib.tasks.base.base_loading_run_params import (
@@ -17,6 +29,8 @@ from v03_pipeline.lib.tasks.base.base_update import BaseUpdateTask
 from v03_pipeline.lib.tasks.files import GCSorLocalTarget
 from v03_pipeline.lib.tasks.write_new_variants_table import WriteNewVariantsTableTask
 
+logger = get_logger(__name__)
+
 
 @luigi.util.inherits(BaseLoadingRunParams)
 class UpdateNewVariantsWithCAIDsTask(BaseUpdateTask):
@@ -37,6 +51,17 @@ class UpdateNewVariantsWithCAIDsTask(BaseUpdateTask):
     def complete(self) -> bool:
         return super().complete() and hasattr(hl.read_table(self.output().path), 'CAID')
 
+    def empty_caids_table(self) -> hl.Table:
+        return hl.Table.parallelize(
+            [],
+            hl.tstruct(
+                locus=hl.tlocus(self.reference_genome.value),
+                alleles=hl.tarray(hl.tstr),
+                CAID=hl.tstr,
+            ),
+            key=('locus', 'alleles'),
+        )
+
     def update_table(self, ht: hl.Table) -> hl.Table:
         # Register the new variant alleles to the Clingen Allele Registry
         # and annotate new_variants table with CAID.
@@ -44,20 +69,71 @@ class UpdateNewVariantsWithCAIDsTask(BaseUpdateTask):
             Env.CLINGEN_ALLELE_REGISTRY_LOGIN and Env.CLINGEN_ALLELE_REGISTRY_PASSWORD
         ):
             return ht.annotate(CAID=hl.missing(hl.tstr))
-        ar_ht = hl.Table.parallelize(
-            [],
-            hl.tstruct(
-                locus=hl.tlocus(self.reference_genome.value),
-                alleles=hl.tarray(hl.tstr),
-                CAID=hl.tstr,
+
+        # Variants that have been registered before (e.g. on a previous load
+        # of the same callset) are read from the cache rather than re-registered.
+        caids_cache_ht = read_cache_table(
+            caids_cache_table_path(self.reference_genome, self.dataset_type),
+            caids_cache_deltas_dir(self.reference_genome, self.dataset_type),
+        )
+        if caids_cache_ht is None:
+            caids_cache_ht = self.empty_caids_table()
+        uncached_ht = ht.anti_join(caids_cache_ht)
+        # The misses are fingerprinted in the same pass as they are counted,
+        # so that registration checkpoints written for other misses (e.g. by
+        # an attempt that failed after caching its CAIDs) are never reused.
+        num_misses, misses_fingerprint = uncached_ht.aggregate(
+            (
+                hl.agg.count(),
+                hl.agg.sum(hl.int64(hl.hash(uncached_ht.key))),
             ),
-            key=('locus', 'alleles'),
         )
-        for ar_ht_chunk in register_alleles_in_chunks(
-            ht,
+        num_hits = ht.count() - num_misses
+        logger.info(f'CAIDs cache hits: {num_hits}, misses: {num_misses}')
+        update_metadata_for_run(
             self.reference_genome,
-        ):
-            ar_ht = ar_ht.union(ar_ht_chunk)
-            ar_ht, _ = checkpoint(ar_ht)
-        ht = ht.join(ar_ht, 'left')
+            self.dataset_type,
+            self.run_id,
+            caids_cache={'hits': num_hits, 'misses': num_misses},
+        )
+
+        if num_misses == 0:
+            return ht.join(caids_cache_ht, 'left').distinct()
+
+        ar_ht_chunks = list(
+            register_alleles_in_chunks(
+                uncached_ht,
+                self.reference_genome,
+                checkpoint_dir=os.path.join(
+                    allele_registry_checkpoint_dir(
+                        self.reference_genome,
+                        self.dataset_type,
+                        self.run_id,
+                    ),
+                    f'{num_misses}_{misses_fingerprint}',
+                ),
+            ),
+        )
+        if ar_ht_chunks:
+            # The newly registered CAIDs are appended to the cache as a delta,
+            # rather than rewriting the CAIDs already cached.
+            ar_ht, _ = checkpoint(
+                ar_ht_chunks[0].union(*ar_ht_chunks[1:]).select_globals(),
+            )
+            write_cache_table_delta(
+                ar_ht,
+                caids_cache_deltas_dir(self.reference_genome, self.dataset_type),
+            )
+            caids_cache_ht = caids_cache_ht.union(ar_ht)
+        ht = ht.join(caids_cache_ht, 'left')
         return ht.distinct()
+
+    def run(self) -> None:
+        super().run()
+        # Compacted only once the new variants table is written, as it is
+        # computed from the deltas removed by compaction.
+        compact_cache_table(
+            caids_cache_table_path(self.reference_genome, self.dataset_type),
+            caids_cache_deltas_dir(self.reference_genome, self.dataset_type),
+            Env.CACHE_TABLE_MAX_DELTAS,
+        )
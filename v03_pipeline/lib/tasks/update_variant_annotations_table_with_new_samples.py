@@ -3,6 +3,13 @@ import luigi
 import luigi.util
 
 from v03_pipeline.lib.annotations.fields import get_fields
+from v03_pipeline.lib.core import FeatureFlag
+from v03_pipeline.lib.misc.annotations_table import (
+    merge_variant_annotations_table_delta,
+    read_variant_annotations_table,
+    write_variant_annotations_table,
+    write_variant_annotations_table_delta,
+)
 from v03_pipeline.lib.misc.callsets import get_callset_ht
 from v03_pipeline.lib.misc.io import remap_pedigree_hash
 from v03_pipeline.lib.paths import (
@@ -16,6 +23,7 @@ from v03_pipeline.lib.tasks.base.base_loading_run_params import (
 from v03_pipeline.lib.tasks.base.base_update import (
     BaseUpdateTask,
 )
+from v03_pipeline.lib.tasks.base.completion_cache import memoized_complete
 from v03_pipeline.lib.tasks.files import GCSorLocalTarget
 from v03_pipeline.lib.tasks.update_new_variants_with_caids import (
     UpdateNewVariantsWithCAIDsTask,
@@ -43,6 +51,7 @@ class UpdateVariantAnnotationsTableWithNewSamplesTask(
             else self.clone(WriteNewVariantsTableTask),
         ]
 
+    @memoized_complete
     def complete(self) -> bool:
         return super().complete() and hl.eval(
             hl.bind(
@@ -65,7 +74,10 @@ class UpdateVariantAnnotationsTableWithNewSamplesTask(
                         for project_guid in self.project_guids
                     ],
                 ),
-                hl.read_table(self.output().path).updates,
+                read_variant_annotations_table(
+                    self.reference_genome,
+                    self.dataset_type,
+                ).updates,
             ),
         )
 
@@ -90,13 +102,45 @@ class UpdateVariantAnnotationsTableWithNewSamplesTask(
             ),
         )
 
-    def update_table(self, ht: hl.Table) -> hl.Table:
+    def run(self) -> None:
+        self.init_hail()
+        if not self.output().exists():
+            ht = self.update_table(self.initialize_table())
+            write_variant_annotations_table(
+                self.reference_genome,
+                self.dataset_type,
+                ht,
+            )
+            return
+        ht = read_variant_annotations_table(self.reference_genome, self.dataset_type)
+        if not FeatureFlag.WRITE_VARIANT_ANNOTATIONS_TABLE_DELTAS:
+            write_variant_annotations_table(
+                self.reference_genome,
+                self.dataset_type,
+                self.update_table(ht),
+            )
+            return
+        # Only the new and updated rows are written, they're merged
+        # with the table on read and periodically compacted into it.
+        write_variant_annotations_table_delta(
+            self.reference_genome,
+            self.dataset_type,
+            self.delta_table(self.with_key_(ht)),
+        )
+
+    def with_key_(self, ht: hl.Table) -> hl.Table:
         # Gracefully handle case for on-premises uses
         # where key_ field is not present and migration was not run.
         if not hasattr(ht, 'key_'):
             ht = ht.add_index(name='key_')
             ht = ht.annotate_globals(max_key_=(ht.count() - 1))
+        return ht
 
+    def delta_table(self, ht: hl.Table) -> hl.Table:
+        """
+        Returns the rows of the annotations table that are new or
+        changed by this run, with the updated globals.
+        """
         new_variants_ht = hl.read_table(
             new_variants_table_path(
                 self.reference_genome,
@@ -104,10 +148,7 @@ class UpdateVariantAnnotationsTableWithNewSamplesTask(
                 self.run_id,
             ),
         )
-
-        # Union with the new variants table and annotate with the lookup table.
-        ht = ht.union(new_variants_ht, unify=True)
-
+        delta_ht = new_variants_ht
         if self.dataset_type.variant_frequency_annotation_fns:
             # new_variants_ht consists of variants present in the new callset, fully annotated,
             # but NOT present in the existing annotations table.
@@ -119,9 +160,10 @@ class UpdateVariantAnnotationsTableWithNewSamplesTask(
                 self.callset_path,
                 self.project_guids,
             )
-            callset_variants_ht = ht.semi_join(callset_ht)
-            non_callset_variants_ht = ht.anti_join(callset_ht)
-            callset_variants_ht = callset_variants_ht.annotate(
+            callset_variants_ht = ht.union(new_variants_ht, unify=True).semi_join(
+                callset_ht,
+            )
+            delta_ht = callset_variants_ht.annotate(
                 **get_fields(
                     callset_variants_ht,
                     self.dataset_type.variant_frequency_annotation_fns,
@@ -129,13 +171,22 @@ class UpdateVariantAnnotationsTableWithNewSamplesTask(
                     **self.param_kwargs,
                 ),
             )
-            ht = non_callset_variants_ht.union(callset_variants_ht, unify=True)
 
+        ht_globals = ht.index_globals()
         new_variants_ht_globals = new_variants_ht.index_globals()
-        return ht.select_globals(
+        delta_max_key_ = delta_ht.aggregate(hl.agg.max(delta_ht.key_))
+        return delta_ht.select_globals(
             versions=new_variants_ht_globals.versions,
             enums=new_variants_ht_globals.enums,
-            updates=ht.updates.union(new_variants_ht_globals.updates),
-            migrations=ht.migrations,
-            max_key_=ht.aggregate(hl.agg.max(ht.key_)),
+            updates=ht_globals.updates.union(new_variants_ht_globals.updates),
+            migrations=ht_globals.migrations,
+            max_key_=(
+                ht_globals.max_key_
+                if delta_max_key_ is None
+                else hl.max(ht_globals.max_key_, delta_max_key_)
+            ),
         )
+
+    def update_table(self, ht: hl.Table) -> hl.Table:
+        ht = self.with_key_(ht)
+        return merge_variant_annotations_table_delta(ht, self.delta_table(ht))
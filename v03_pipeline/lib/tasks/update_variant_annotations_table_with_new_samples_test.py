@@ -1,8 +1,10 @@
 import functools
+import json
 import shutil
 from unittest.mock import Mock, PropertyMock, patch
 
 import hail as hl
+import hailtop.fs as hfs
 import luigi.worker
 
 from v03_pipeline.lib.annotations.enums import (
@@ -23,6 +25,7 @@ from v03_pipeline.lib.core import (
     ReferenceGenome,
     SampleType,
 )
+from v03_pipeline.lib.misc.delta_tables import read_cache_table
 from v03_pipeline.lib.misc.io import remap_pedigree_hash
 from v03_pipeline.lib.misc.validation import (
     ALL_VALIDATIONS,
@@ -30,6 +33,9 @@ from v03_pipeline.lib.misc.validation import (
     validate_expected_contig_frequency,
 )
 from v03_pipeline.lib.paths import (
+    caids_cache_deltas_dir,
+    caids_cache_table_path,
+    metadata_for_run_path,
     valid_reference_dataset_path,
 )
 from v03_pipeline.lib.reference_datasets.reference_dataset import ReferenceDataset
@@ -150,9 +156,10 @@ class UpdateVariantAnnotationsTableWithNewSamplesTaskTest(
         ],
     )
     @patch.object(ReferenceGenome, 'standard_contigs', new_callable=PropertyMock)
+    @patch('v03_pipeline.lib.vep.vep_config_hash', new=Mock(return_value='test'))
     @patch('v03_pipeline.lib.vep.hl.vep')
     @patch(
-        'v03_pipeline.lib.tasks.write_new_variants_table.load_gencode_ensembl_to_refseq_id',
+        'v03_pipeline.lib.tasks.write_new_variants_table.gencode_ensembl_to_refseq_id_mapping',
     )
     def test_multiple_update_vat(
         self,
@@ -331,6 +338,39 @@ class UpdateVariantAnnotationsTableWithNewSamplesTaskTest(
             hl.eval(ht.globals.max_key_),
             29,
         )
+        with hfs.open(
+            metadata_for_run_path(
+                ReferenceGenome.GRCh38,
+                DatasetType.SNV_INDEL,
+                TEST_RUN_ID,
+            ),
+        ) as f:
+            self.assertEqual(
+                json.load(f)['caids_cache'],
+                {'hits': 0, 'misses': 30},
+            )
+        # Registered CAIDs are appended to the cache as a delta.
+        self.assertFalse(
+            hfs.exists(
+                caids_cache_table_path(
+                    ReferenceGenome.GRCh38,
+                    DatasetType.SNV_INDEL,
+                ),
+            ),
+        )
+        self.assertEqual(
+            read_cache_table(
+                caids_cache_table_path(
+                    ReferenceGenome.GRCh38,
+                    DatasetType.SNV_INDEL,
+                ),
+                caids_cache_deltas_dir(
+                    ReferenceGenome.GRCh38,
+                    DatasetType.SNV_INDEL,
+                ),
+            ).CAID.collect(),
+            ['CA1', 'CA2', 'CA3', 'CA4'],
+        )
 
         copy_project_pedigree_to_mocked_dir(
             TEST_PEDIGREE_4_REMAP,
@@ -522,6 +562,7 @@ class UpdateVariantAnnotationsTableWithNewSamplesTaskTest(
     @patch(
         'v03_pipeline.lib.tasks.update_new_variants_with_caids.register_alleles_in_chunks',
     )
+    @patch('v03_pipeline.lib.vep.vep_config_hash', new=Mock(return_value='test'))
     @patch('v03_pipeline.lib.vep.hl.vep')
     def test_update_vat_grch37(
         self,
@@ -663,9 +704,10 @@ class UpdateVariantAnnotationsTableWithNewSamplesTaskTest(
         'v03_pipeline.lib.tasks.update_new_variants_with_caids.register_alleles_in_chunks',
     )
     @patch('v03_pipeline.lib.reference_datasets.reference_dataset.FeatureFlag')
+    @patch('v03_pipeline.lib.vep.vep_config_hash', new=Mock(return_value='test'))
     @patch('v03_pipeline.lib.vep.hl.vep')
     @patch(
-        'v03_pipeline.lib.tasks.write_new_variants_table.load_gencode_ensembl_to_refseq_id',
+        'v03_pipeline.lib.tasks.write_new_variants_table.gencode_ensembl_to_refseq_id_mapping',
     )
     def test_update_vat_without_accessing_private_datasets(
         self,
@@ -829,13 +871,13 @@ class UpdateVariantAnnotationsTableWithNewSamplesTaskTest(
         )
 
     @patch(
-        'v03_pipeline.lib.tasks.write_new_variants_table.load_gencode_gene_symbol_to_gene_id',
+        'v03_pipeline.lib.tasks.write_new_variants_table.gencode_gene_symbol_to_gene_id_mapping',
     )
     def test_sv_multiple_vcf_update_vat(
         self,
         mock_load_gencode: Mock,
     ) -> None:
-        mock_load_gencode.return_value = GENE_ID_MAPPING
+        mock_load_gencode.return_value = hl.dict(GENE_ID_MAPPING)
         copy_project_pedigree_to_mocked_dir(
             TEST_PEDIGREE_5,
             ReferenceGenome.GRCh38,
@@ -1402,13 +1444,13 @@ class UpdateVariantAnnotationsTableWithNewSamplesTaskTest(
         )
 
     @patch(
-        'v03_pipeline.lib.tasks.write_new_variants_table.load_gencode_gene_symbol_to_gene_id',
+        'v03_pipeline.lib.tasks.write_new_variants_table.gencode_gene_symbol_to_gene_id_mapping',
     )
     def test_sv_multiple_project_single_vcf(
         self,
         mock_load_gencode: Mock,
     ) -> None:
-        mock_load_gencode.return_value = GENE_ID_MAPPING
+        mock_load_gencode.return_value = hl.dict(GENE_ID_MAPPING)
         copy_project_pedigree_to_mocked_dir(
             TEST_PEDIGREE_10,
             ReferenceGenome.GRCh38,
@@ -2,18 +2,26 @@ import hail as hl
 import luigi
 import luigi.util
 
+from v03_pipeline.lib.core import FeatureFlag
 from v03_pipeline.lib.misc.validation import (
     ALL_VALIDATIONS,
     SKIPPABLE_VALIDATIONS,
     SeqrValidationError,
+    coding_and_noncoding_totals,
+    fused_validation_errors,
 )
 from v03_pipeline.lib.paths import (
     imported_callset_path,
-    valid_reference_dataset_path,
+)
+from v03_pipeline.lib.reference_datasets.lookup import (
+    read_reference_dataset,
+    reference_dataset_read_stats,
+    variant_key_intervals,
 )
 from v03_pipeline.lib.reference_datasets.reference_dataset import ReferenceDataset
 from v03_pipeline.lib.tasks.base.base_loading_run_params import BaseLoadingRunParams
 from v03_pipeline.lib.tasks.base.base_update import BaseUpdateTask
+from v03_pipeline.lib.tasks.base.completion_cache import memoized_complete
 from v03_pipeline.lib.tasks.files import CallsetTask, GCSorLocalTarget
 from v03_pipeline.lib.tasks.reference_data.updated_reference_dataset import (
     UpdatedReferenceDatasetTask,
@@ -28,22 +36,39 @@ MAX_SNV_INDEL_ALLELE_LENGTH = 500
 
 @luigi.util.inherits(BaseLoadingRunParams)
 class ValidateCallsetTask(BaseUpdateTask):
-    @property
-    def validation_dependencies(self) -> dict[str, hl.Table]:
+    def validation_dependencies(self, mt: hl.MatrixTable) -> dict[str, hl.Table]:
         deps = {}
         if (
             ALL_VALIDATIONS not in self.validations_to_skip
             and 'validate_sample_type' not in self.validations_to_skip
             and self.dataset_type.can_run_validation
         ):
-            deps['coding_and_noncoding_variants_ht'] = hl.read_table(
-                valid_reference_dataset_path(
-                    self.reference_genome,
-                    ReferenceDataset.gnomad_coding_and_noncoding,
-                ),
+            # Only the partitions overlapping the callset are read when
+            # matching variants, the totals are taken from the full table.
+            intervals = variant_key_intervals(mt.rows(), self.reference_genome)
+            reference_dataset_read_stats(
+                self.reference_genome,
+                ReferenceDataset.gnomad_coding_and_noncoding,
+                intervals,
+            )
+            coding_and_noncoding_variants_ht = read_reference_dataset(
+                self.reference_genome,
+                ReferenceDataset.gnomad_coding_and_noncoding,
+                intervals,
+            )
+            deps['coding_and_noncoding_variants_ht'] = (
+                coding_and_noncoding_variants_ht.annotate_globals(
+                    totals=coding_and_noncoding_totals(
+                        read_reference_dataset(
+                            self.reference_genome,
+                            ReferenceDataset.gnomad_coding_and_noncoding,
+                        ),
+                    ),
+                )
             )
         return deps
 
+    @memoized_complete
     def complete(self) -> luigi.Target:
         if super().complete():
             mt = hl.read_matrix_table(self.output().path)
@@ -82,6 +107,22 @@ class ValidateCallsetTask(BaseUpdateTask):
             CallsetTask(self.callset_path),
         ]
 
+    def validation_errors(self, mt: hl.MatrixTable) -> list[SeqrValidationError]:
+        validation_dependencies = self.validation_dependencies(mt)
+        validation_exceptions = []
+        for validation_f in SKIPPABLE_VALIDATIONS:
+            try:
+                if validation_f.__name__ in self.validations_to_skip:
+                    continue
+                validation_f(
+                    mt,
+                    **validation_dependencies,
+                    **self.param_kwargs,
+                )
+            except SeqrValidationError as e:
+                validation_exceptions.append(e)
+        return validation_exceptions
+
     def update_table(self, mt: hl.MatrixTable) -> hl.MatrixTable:
         mt = hl.read_matrix_table(
             imported_callset_path(
@@ -112,18 +153,15 @@ class ValidateCallsetTask(BaseUpdateTask):
                 callset_path=self.callset_path,
                 validated_sample_type=self.sample_type.value,
             )
-        validation_exceptions = []
-        for validation_f in SKIPPABLE_VALIDATIONS:
-            try:
-                if validation_f.__name__ in self.validations_to_skip:
-                    continue
-                validation_f(
-                    mt,
-                    **self.validation_dependencies,
-                    **self.param_kwargs,
-                )
-            except SeqrValidationError as e:
-                validation_exceptions.append(e)
+        validation_exceptions = (
+            fused_validation_errors(
+                mt,
+                **self.validation_dependencies(mt),
+                **self.param_kwargs,
+            )
+            if FeatureFlag.RUN_FUSED_VALIDATIONS
+            else self.validation_errors(mt)
+        )
         if validation_exceptions:
             write_validation_errors_for_run_task = self.clone(
                 WriteValidationErrorsForRunTask,
@@ -1,5 +1,6 @@
 import json
 import shutil
+from unittest.mock import patch
 
 import luigi.worker
 
@@ -44,6 +45,17 @@ class ValidateCallsetTest(MockedDatarootTestCase):
     def test_validate_callset_multiple_exceptions(
         self,
     ) -> None:
+        self._test_validate_callset_multiple_exceptions()
+
+    @patch('v03_pipeline.lib.tasks.validate_callset.FeatureFlag')
+    def test_validate_callset_multiple_exceptions_fused(
+        self,
+        mock_ff,
+    ) -> None:
+        mock_ff.RUN_FUSED_VALIDATIONS = True
+        self._test_validate_callset_multiple_exceptions()
+
+    def _test_validate_callset_multiple_exceptions(self) -> None:
         worker = luigi.worker.Worker()
         validate_callset_task = ValidateCallsetTask(
             reference_genome=ReferenceGenome.GRCh38,
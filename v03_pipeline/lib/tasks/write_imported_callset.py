@@ -2,11 +2,15 @@ import hail as hl
 import luigi
 import luigi.util
 
+from v03_pipeline.lib.misc.annotations_table import read_variant_annotations_table
 from v03_pipeline.lib.misc.callsets import get_additional_row_fields
 from v03_pipeline.lib.misc.io import (
     import_callset,
+    import_vcf,
+    mapped_validation_errors,
     select_relevant_fields,
     split_multi_hts,
+    write,
 )
 from v03_pipeline.lib.misc.sv import deduplicate_merged_sv_concordance_calls
 from v03_pipeline.lib.misc.validation import (
@@ -15,10 +19,10 @@ from v03_pipeline.lib.misc.validation import (
 from v03_pipeline.lib.misc.vets import annotate_vets
 from v03_pipeline.lib.paths import (
     imported_callset_path,
-    variant_annotations_table_path,
 )
 from v03_pipeline.lib.tasks.base.base_loading_run_params import BaseLoadingRunParams
 from v03_pipeline.lib.tasks.base.base_write import BaseWriteTask
+from v03_pipeline.lib.tasks.base.completion_cache import memoized_complete
 from v03_pipeline.lib.tasks.files import CallsetTask, GCSorLocalTarget
 from v03_pipeline.lib.tasks.write_validation_errors_for_run import (
     with_persisted_validation_errors,
@@ -27,6 +31,7 @@ from v03_pipeline.lib.tasks.write_validation_errors_for_run import (
 
 @luigi.util.inherits(BaseLoadingRunParams)
 class WriteImportedCallsetTask(BaseWriteTask):
+    @memoized_complete
     def complete(self) -> luigi.Target:
         if super().complete():
             mt = hl.read_matrix_table(self.output().path)
@@ -56,6 +61,19 @@ class WriteImportedCallsetTask(BaseWriteTask):
         ]
 
     @with_persisted_validation_errors
+    def run(self) -> None:
+        self.init_hail()
+        mt = self.create_table()
+        # NB: throws SeqrValidationError.  Errors from stages not listed
+        # in VALIDATION_CHECKPOINT_STAGES surface here rather than in
+        # create_table.
+        with mapped_validation_errors(
+            import_vcf,
+            select_relevant_fields,
+            split_multi_hts,
+        ):
+            write(mt, self.output().path)
+
     def create_table(self) -> hl.MatrixTable:
         # NB: throws SeqrValidationError
         mt = import_callset(
@@ -95,11 +113,9 @@ class WriteImportedCallsetTask(BaseWriteTask):
         ):
             mt = deduplicate_merged_sv_concordance_calls(
                 mt,
-                hl.read_table(
-                    variant_annotations_table_path(
-                        self.reference_genome,
-                        self.dataset_type,
-                    ),
+                read_variant_annotations_table(
+                    self.reference_genome,
+                    self.dataset_type,
                 ),
             )
             mt = mt.key_rows_by(
@@ -9,32 +9,43 @@ from v03_pipeline.lib.annotations.fields import get_fields
 from v03_pipeline.lib.annotations.misc import (
     annotate_formatting_annotation_enum_globals,
     annotate_reference_dataset_globals,
+    annotate_reference_datasets,
 )
+from v03_pipeline.lib.core import FeatureFlag
+from v03_pipeline.lib.misc.annotations_table import read_variant_annotations_table
 from v03_pipeline.lib.misc.callsets import get_callset_ht
 from v03_pipeline.lib.misc.io import checkpoint, remap_pedigree_hash
 from v03_pipeline.lib.misc.math import constrain
+from v03_pipeline.lib.misc.runs import update_metadata_for_run
 from v03_pipeline.lib.paths import (
     new_variants_table_path,
     project_pedigree_path,
-    valid_reference_dataset_path,
     variant_annotations_table_path,
 )
 from v03_pipeline.lib.reference_datasets.gencode.mapping_gene_ids import (
-    load_gencode_ensembl_to_refseq_id,
-    load_gencode_gene_symbol_to_gene_id,
+    gencode_ensembl_to_refseq_id_mapping,
+    gencode_gene_symbol_to_gene_id_mapping,
+)
+from v03_pipeline.lib.reference_datasets.lookup import (
+    is_locus_keyed,
+    locus_window_intervals,
+    locus_windows,
+    read_reference_dataset,
+    reference_dataset_read_stats,
 )
 from v03_pipeline.lib.reference_datasets.reference_dataset import ReferenceDataset
 from v03_pipeline.lib.tasks.base.base_loading_run_params import (
     BaseLoadingRunParams,
 )
 from v03_pipeline.lib.tasks.base.base_write import BaseWriteTask
+from v03_pipeline.lib.tasks.base.completion_cache import memoized_complete
 from v03_pipeline.lib.tasks.files import GCSorLocalTarget
 from v03_pipeline.lib.tasks.write_metadata_for_run import (
     WriteMetadataForRunTask,
 )
-from v03_pipeline.lib.vep import run_vep
+from v03_pipeline.lib.vep import compact_vep_cache, run_vep, vep_cost
 
-VARIANTS_PER_VEP_PARTITION = 1e3
+VARIANTS_PER_PARTITION = 1e3
 MIN_PARTITIONS = 10
 MAX_PARTITIONS = 10000
 GENCODE_RELEASE = 42
@@ -43,8 +54,10 @@ GENCODE_FOR_VEP_RELEASE = 44
 
 @luigi.util.inherits(BaseLoadingRunParams)
 class WriteNewVariantsTableTask(BaseWriteTask):
-    @property
-    def annotation_dependencies(self) -> dict[str, hl.Table]:
+    def annotation_dependencies(
+        self,
+        intervals: list[hl.Interval] | None = None,
+    ) -> dict[str, hl.Table]:
         deps = {}
         for (
             reference_dataset
@@ -52,19 +65,21 @@ class WriteNewVariantsTableTask(BaseWriteTask):
             self.reference_genome,
             self.dataset_type,
         ):
-            deps[f'{reference_dataset.value}_ht'] = hl.read_table(
-                valid_reference_dataset_path(self.reference_genome, reference_dataset),
+            deps[f'{reference_dataset.value}_ht'] = read_reference_dataset(
+                self.reference_genome,
+                reference_dataset,
+                intervals,
             )
 
         if self.dataset_type.has_gencode_ensembl_to_refseq_id_mapping(
             self.reference_genome,
         ):
-            deps['gencode_ensembl_to_refseq_id_mapping'] = hl.literal(
-                load_gencode_ensembl_to_refseq_id(GENCODE_FOR_VEP_RELEASE),
+            deps['gencode_ensembl_to_refseq_id_mapping'] = (
+                gencode_ensembl_to_refseq_id_mapping(GENCODE_FOR_VEP_RELEASE)
             )
         if self.dataset_type.has_gencode_gene_symbol_to_gene_id_mapping:
-            deps['gencode_gene_symbol_to_gene_id_mapping'] = hl.literal(
-                load_gencode_gene_symbol_to_gene_id(GENCODE_RELEASE),
+            deps['gencode_gene_symbol_to_gene_id_mapping'] = (
+                gencode_gene_symbol_to_gene_id_mapping(GENCODE_RELEASE)
             )
         return deps
 
@@ -82,6 +97,7 @@ class WriteNewVariantsTableTask(BaseWriteTask):
             self.clone(WriteMetadataForRunTask),
         ]
 
+    @memoized_complete
     def complete(self) -> bool:
         # NOTE: Special hack for ClickHouse migration tasks which
         # do not have a callset/projects to load.
@@ -112,6 +128,13 @@ class WriteNewVariantsTableTask(BaseWriteTask):
             ),
         )
 
+    def run(self) -> None:
+        super().run()
+        # Compacted only once the new variants table is written, as it is
+        # computed from the deltas removed by compaction.
+        if FeatureFlag.CACHE_VEP_ANNOTATIONS and self.dataset_type.veppable:
+            compact_vep_cache(self.reference_genome, self.dataset_type)
+
     def create_table(self) -> hl.Table:
         callset_ht = get_callset_ht(
             self.reference_genome,
@@ -127,11 +150,9 @@ class WriteNewVariantsTableTask(BaseWriteTask):
                 self.dataset_type,
             ),
         ):
-            annotations_ht = hl.read_table(
-                variant_annotations_table_path(
-                    self.reference_genome,
-                    self.dataset_type,
-                ),
+            annotations_ht = read_variant_annotations_table(
+                self.reference_genome,
+                self.dataset_type,
             )
             # Gracefully handle case for on-premises uses
             # where key_ field is not present and migration was not run.
@@ -153,24 +174,74 @@ class WriteNewVariantsTableTask(BaseWriteTask):
             curr_max_key_ = -1
             new_variants_ht = callset_ht
 
-        # Annotate new variants with VEP.
+        # The new variants are checkpointed once, as they are read by both
+        # the aggregate below and VEP.  Their loci and VEP cost are collected
+        # in a single pass, so that only the overlapping reference dataset
+        # partitions are read.
+        new_variants_ht, _ = checkpoint(new_variants_ht)
+        new_variants_stats = new_variants_ht.aggregate(
+            hl.struct(
+                count=hl.agg.count(),
+                **(
+                    {'windows': locus_windows(new_variants_ht.key[0])}
+                    if is_locus_keyed(new_variants_ht)
+                    else {}
+                ),
+                **(
+                    {'vep_cost_units': hl.agg.sum(vep_cost(new_variants_ht))}
+                    if self.dataset_type.veppable
+                    else {}
+                ),
+            ),
+        )
+        new_variants_count = new_variants_stats.count
+        intervals = (
+            locus_window_intervals(new_variants_stats.windows, self.reference_genome)
+            if 'windows' in new_variants_stats
+            else None
+        )
+        update_metadata_for_run(
+            self.reference_genome,
+            self.dataset_type,
+            self.run_id,
+            reference_dataset_reads={
+                reference_dataset.value: reference_dataset_read_stats(
+                    self.reference_genome,
+                    reference_dataset,
+                    intervals,
+                )
+                for reference_dataset in ReferenceDataset.for_reference_genome_dataset_type_annotations(
+                    self.reference_genome,
+                    self.dataset_type,
+                )
+            },
+        )
+        # Annotate new variants with VEP, which plans its own partitioning
+        # from the variants' estimated cost.
+        new_variants_ht = run_vep(
+            new_variants_ht,
+            self.dataset_type,
+            self.reference_genome,
+            n_variants=new_variants_count,
+            cost_units=(
+                new_variants_stats.vep_cost_units
+                if 'vep_cost_units' in new_variants_stats
+                else None
+            ),
+            use_cache=FeatureFlag.CACHE_VEP_ANNOTATIONS,
+            run_id=self.run_id,
+        )
         # Note about the repartition: our work here is cpu/memory bound and
         # proportional to the number of new variants.  Our default partitioning
         # will under-partition in that regard, so we split up our work
         # with a partitioning scheme local to this task.
-        new_variants_count = new_variants_ht.count()
         new_variants_ht = new_variants_ht.repartition(
             constrain(
-                math.ceil(new_variants_count / VARIANTS_PER_VEP_PARTITION),
+                math.ceil(new_variants_count / VARIANTS_PER_PARTITION),
                 MIN_PARTITIONS,
                 MAX_PARTITIONS,
             ),
         )
-        new_variants_ht = run_vep(
-            new_variants_ht,
-            self.dataset_type,
-            self.reference_genome,
-        )
 
         # Select down to the formatting annotations fields and
         # any reference dataset collection annotations.
@@ -178,44 +249,19 @@ class WriteNewVariantsTableTask(BaseWriteTask):
             **get_fields(
                 new_variants_ht,
                 self.dataset_type.formatting_annotation_fns(self.reference_genome),
-                **self.annotation_dependencies,
+                **self.annotation_dependencies(intervals),
                 **self.param_kwargs,
             ),
         )
 
-        # Join new variants against the reference datasets that are not "annotated".
-        for (
-            reference_dataset
-        ) in ReferenceDataset.for_reference_genome_dataset_type_annotations(
+        # Annotate new variants with the reference datasets that are not
+        # formatting annotations, in a single pass.
+        new_variants_ht = annotate_reference_datasets(
+            new_variants_ht,
             self.reference_genome,
             self.dataset_type,
-        ):
-            if reference_dataset.formatting_annotation:
-                continue
-            reference_dataset_ht = self.annotation_dependencies[
-                f'{reference_dataset.value}_ht'
-            ]
-            if reference_dataset.select:
-                reference_dataset_ht = reference_dataset.select(
-                    self.reference_genome,
-                    self.dataset_type,
-                    reference_dataset_ht,
-                )
-            if reference_dataset.filter:
-                reference_dataset_ht = reference_dataset.filter(
-                    self.reference_genome,
-                    self.dataset_type,
-                    reference_dataset_ht,
-                )
-            reference_dataset_ht = reference_dataset_ht.select(
-                **{
-                    f'{reference_dataset.name}': hl.Struct(
-                        **reference_dataset_ht.row_value,
-                    ),
-                },
-            )
-            new_variants_ht = new_variants_ht.join(reference_dataset_ht, 'left')
-            new_variants_ht, _ = checkpoint(new_variants_ht)
+            intervals,
+        )
         new_variants_ht = new_variants_ht.select_globals(
             versions=hl.Struct(),
             enums=hl.Struct(),
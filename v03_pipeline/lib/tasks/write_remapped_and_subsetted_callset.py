@@ -27,6 +27,7 @@ from v03_pipeline.lib.paths import (
 )
 from v03_pipeline.lib.tasks.base.base_loading_run_params import BaseLoadingRunParams
 from v03_pipeline.lib.tasks.base.base_write import BaseWriteTask
+from v03_pipeline.lib.tasks.base.completion_cache import memoized_complete
 from v03_pipeline.lib.tasks.files import GCSorLocalTarget, RawFileTask
 from v03_pipeline.lib.tasks.validate_callset import ValidateCallsetTask
 from v03_pipeline.lib.tasks.write_relatedness_check_tsv import (
@@ -53,6 +54,7 @@ def format_failures(failed_families):
 class WriteRemappedAndSubsettedCallsetTask(BaseWriteTask):
     project_i = luigi.IntParameter()
 
+    @memoized_complete
     def complete(self) -> luigi.Target:
         return super().complete() and hl.eval(
             hl.read_matrix_table(self.output().path).globals.remap_pedigree_hash
@@ -2,7 +2,11 @@ import luigi
 import luigi.util
 
 from v03_pipeline.lib.core.feature_flag import FeatureFlag
-from v03_pipeline.lib.paths import pipeline_run_success_file_path
+from v03_pipeline.lib.misc.checkpoints import delete_checkpoints
+from v03_pipeline.lib.paths import (
+    pipeline_run_success_file_path,
+    run_checkpoints_dir,
+)
 from v03_pipeline.lib.tasks.base.base_loading_run_params import (
     BaseLoadingRunParams,
 )
@@ -36,3 +40,6 @@ class WriteSuccessFileTask(luigi.Task):
     def run(self):
         with self.output().open('w') as f:
             f.write('')
+        # Anything left behind by the run's tasks, e.g. the allele registry
+        # payloads, is no longer needed for retries.
+        delete_checkpoints(run_checkpoints_dir(self.run_id))
@@ -3,6 +3,7 @@ import hailtop.fs as hfs
 import luigi
 
 from v03_pipeline.lib.annotations.fields import get_fields
+from v03_pipeline.lib.misc.annotations_table import read_variant_annotations_table
 from v03_pipeline.lib.paths import (
     variant_annotations_table_path,
     variant_annotations_vcf_path,
@@ -32,12 +33,7 @@ class WriteVariantAnnotationsVCF(luigi.Task):
             ),
         ):
             return
-        ht = hl.read_table(
-            variant_annotations_table_path(
-                self.reference_genome,
-                self.dataset_type,
-            ),
-        )
+        ht = read_variant_annotations_table(self.reference_genome, self.dataset_type)
         ht = ht.annotate(
             **get_fields(
                 ht,
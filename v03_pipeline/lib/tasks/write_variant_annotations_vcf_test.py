@@ -1,6 +1,7 @@
 import gzip
 from unittest.mock import Mock, patch
 
+import hail as hl
 import hailtop.fs as hfs
 import luigi.worker
 
@@ -42,7 +43,7 @@ GENE_ID_MAPPING = {
 
 class WriteVariantAnnotationsVCFTest(MockedReferenceDatasetsTestCase):
     @patch(
-        'v03_pipeline.lib.tasks.write_new_variants_table.load_gencode_gene_symbol_to_gene_id',
+        'v03_pipeline.lib.tasks.write_new_variants_table.gencode_gene_symbol_to_gene_id_mapping',
     )
     def test_sv_export_vcf(
         self,
@@ -55,7 +56,7 @@ class WriteVariantAnnotationsVCFTest(MockedReferenceDatasetsTestCase):
             SampleType.WGS,
             'R0115_test_project2',
         )
-        mock_load_gencode.return_value = GENE_ID_MAPPING
+        mock_load_gencode.return_value = hl.dict(GENE_ID_MAPPING)
         worker = luigi.worker.Worker()
         update_variant_annotations_task = (
             UpdateVariantAnnotationsTableWithNewSamplesTask(
@@ -1,29 +1,302 @@
+import hashlib
+import json
+import math
+import os
+import statistics
+import time
+from dataclasses import dataclass
 from string import Template
 
 import hail as hl
+import hailtop.fs as hfs
 
 from v03_pipeline.lib.core import DatasetType, Env, ReferenceGenome
+from v03_pipeline.lib.logger import get_logger
+from v03_pipeline.lib.misc.delta_tables import (
+    compact_cache_table,
+    read_cache_table,
+    write_cache_table_delta,
+)
+from v03_pipeline.lib.misc.io import checkpoint
+from v03_pipeline.lib.misc.math import constrain
+from v03_pipeline.lib.misc.runs import update_metadata_for_run
+from v03_pipeline.lib.paths import (
+    vep_cache_deltas_dir,
+    vep_cache_dir,
+    vep_cache_table_path,
+    vep_throughput_path,
+)
+
+logger = get_logger(__name__)
+
+DEFAULT_VEP_BLOCK_SIZE = 1000
+MIN_VEP_BLOCK_SIZE = 100
+MIN_VEP_PARTITIONS = 10
+MAX_VEP_PARTITIONS = 10000
+# An SNV costs one unit of VEP time.  Indels cost more, and more again the
+# longer their alleles.
+INDEL_VEP_COST = 2.0
+INDEL_VEP_COST_PER_BASE = 0.02
+# Without any recorded throughput, partitions of 1000 SNVs are assumed to
+# meet the target runtime.
+DEFAULT_VEP_COST_UNITS_PER_PARTITION = 1000
+VEP_THROUGHPUT_HISTORY_RUNS = 10
 
 VEP_CONFIG_URI = Template(
     'file://$vep_reference_datasets_dir/$reference_genome/vep-$reference_genome.json',
 )
 
 
-def run_vep(
-    ht: hl.Table,
+def vep_config_uri(reference_genome: ReferenceGenome) -> str:
+    return VEP_CONFIG_URI.substitute(
+        vep_reference_datasets_dir=Env.VEP_REFERENCE_DATASETS_DIR,
+        reference_genome=reference_genome.value,
+    )
+
+
+def vep_config_hash(reference_genome: ReferenceGenome) -> str:
+    # The config pins the VEP image and cache versions, so any change
+    # to the VEP version changes the hash.
+    with hfs.open(vep_config_uri(reference_genome), 'rb') as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def compact_vep_cache(
+    reference_genome: ReferenceGenome,
+    dataset_type: DatasetType,
+) -> None:
+    """
+    Folds the VEP cache's deltas into the cache table, and removes the
+    caches written with other VEP configs.
+    """
+    cache_dir = vep_cache_dir(reference_genome, dataset_type)
+    if not hfs.exists(cache_dir):
+        return
+    config_hash = vep_config_hash(reference_genome)
+    for f in hfs.ls(cache_dir):
+        if not os.path.basename(f.path.rstrip('/')).startswith(config_hash):
+            logger.info(f'Deleting VEP cache {f.path} written with another config')
+            hfs.rmtree(f.path)
+    compact_cache_table(
+        vep_cache_table_path(reference_genome, dataset_type, config_hash),
+        vep_cache_deltas_dir(reference_genome, dataset_type, config_hash),
+        Env.CACHE_TABLE_MAX_DELTAS,
+    )
+
+
+@dataclass
+class VEPPlan:
+    n_partitions: int
+    block_size: int
+
+
+def vep_cost(ht: hl.Table) -> hl.Float64Expression:
+    return hl.if_else(
+        hl.is_snp(ht.alleles[0], ht.alleles[1]),
+        1.0,
+        INDEL_VEP_COST + INDEL_VEP_COST_PER_BASE * hl.max(ht.alleles.map(hl.len)),
+    )
+
+
+def historical_vep_seconds_per_cost_unit(
+    reference_genome: ReferenceGenome,
     dataset_type: DatasetType,
+) -> float | None:
+    """
+    Returns the median VEP throughput recorded by the most recent runs, or
+    None if no run has recorded one.
+    """
+    path = vep_throughput_path(reference_genome, dataset_type)
+    if not hfs.exists(path):
+        return None
+    with hfs.open(path) as f:
+        observed = json.load(f)['seconds_per_cost_unit']
+    return statistics.median(observed) if observed else None
+
+
+def record_vep_seconds_per_cost_unit(
     reference_genome: ReferenceGenome,
+    dataset_type: DatasetType,
+    seconds_per_cost_unit: float,
+) -> None:
+    # Only the most recent runs' throughputs are kept, so that planning
+    # reads a single small file rather than every run's metadata.
+    path = vep_throughput_path(reference_genome, dataset_type)
+    observed = []
+    if hfs.exists(path):
+        with hfs.open(path) as f:
+            observed = json.load(f)['seconds_per_cost_unit']
+    observed = [*observed, seconds_per_cost_unit][-VEP_THROUGHPUT_HISTORY_RUNS:]
+    with hfs.open(path, 'w') as f:
+        json.dump({'seconds_per_cost_unit': observed}, f)
+
+
+def plan_vep(
+    n_variants: int,
+    cost_units: float,
+    seconds_per_cost_unit: float | None,
+) -> VEPPlan:
+    cost_units_per_partition = (
+        Env.VEP_TARGET_PARTITION_RUNTIME_S / seconds_per_cost_unit
+        if seconds_per_cost_unit
+        else DEFAULT_VEP_COST_UNITS_PER_PARTITION
+    )
+    # Batches of costlier variants are sent to VEP in smaller blocks, so
+    # that a single VEP invocation's runtime stays bounded.
+    mean_cost = cost_units / n_variants if n_variants else 1.0
+    return VEPPlan(
+        n_partitions=constrain(
+            math.ceil(cost_units / cost_units_per_partition),
+            MIN_VEP_PARTITIONS,
+            MAX_VEP_PARTITIONS,
+        ),
+        block_size=constrain(
+            round(DEFAULT_VEP_BLOCK_SIZE / mean_cost),
+            MIN_VEP_BLOCK_SIZE,
+            DEFAULT_VEP_BLOCK_SIZE,
+        ),
+    )
+
+
+def concurrent_task_slots() -> int:
+    sc = hl.spark_context()
+    conf = sc.getConf()
+    executor_cores = conf.get('spark.executor.cores')
+    # The driver is listed alongside the executors.  NB: with dynamic
+    # allocation this is the number of executors when VEP finishes.
+    n_executors = sc._jsc.sc().getExecutorMemoryStatus().size() - 1  # noqa: SLF001
+    if executor_cores and n_executors > 0:
+        return max(
+            n_executors * int(executor_cores) // int(conf.get('spark.task.cpus', '1')),
+            1,
+        )
+    # Otherwise (e.g. in local mode), the default parallelism is assumed to
+    # be the number of tasks that run at once.
+    return sc.defaultParallelism
+
+
+def observed_vep_seconds_per_cost_unit(
+    elapsed_s: float,
+    cost_units: float,
+    n_partitions: int,
+) -> float:
+    # Partitions run in waves of up to the cluster's concurrent task slots,
+    # so the runtime of a single partition is the elapsed time of one wave.
+    waves = math.ceil(n_partitions / concurrent_task_slots())
+    return (elapsed_s / waves) / (cost_units / n_partitions)
+
+
+def _vep(
+    ht: hl.Table,
+    reference_genome: ReferenceGenome,
+    block_size: int = DEFAULT_VEP_BLOCK_SIZE,
 ) -> hl.Table:
-    if not dataset_type.veppable:
-        return ht
     return hl.vep(
         ht,
-        config=VEP_CONFIG_URI.substitute(
-            vep_reference_datasets_dir=Env.VEP_REFERENCE_DATASETS_DIR,
-            reference_genome=reference_genome.value,
-        ),
+        config=vep_config_uri(reference_genome),
         name='vep',
-        block_size=1000,
+        block_size=block_size,
         tolerate_parse_error=True,
         csq=False,
     )
+
+
+def run_vep(  # noqa: PLR0913
+    ht: hl.Table,
+    dataset_type: DatasetType,
+    reference_genome: ReferenceGenome,
+    n_variants: int | None = None,
+    cost_units: float | None = None,
+    use_cache: bool = False,
+    run_id: str | None = None,
+) -> hl.Table:
+    """
+    Annotates the variants of `ht` with VEP.  Callers that already aggregate
+    over `ht` may pass its variant count and summed vep_cost, so that they
+    aren't aggregated again here.
+    """
+    if not dataset_type.veppable:
+        return ht
+
+    # Variants annotated by a previous run (e.g. deleted and later reloaded)
+    # are read from the cache and only the misses are sent through VEP.
+    # Caches are kept per VEP config, so any change to the VEP version starts
+    # a new cache.  NB: `ht` is evaluated for the misses' cost and again for
+    # VEP, so callers should pass a checkpointed table.
+    uncached_ht = ht
+    cache_ht = None
+    if use_cache:
+        config_hash = vep_config_hash(reference_genome)
+        cache_ht = read_cache_table(
+            vep_cache_table_path(reference_genome, dataset_type, config_hash),
+            vep_cache_deltas_dir(reference_genome, dataset_type, config_hash),
+        )
+    if cache_ht is not None:
+        uncached_ht = ht.anti_join(cache_ht)
+        n_variants, cost_units = uncached_ht.aggregate(
+            (hl.agg.count(), hl.agg.sum(vep_cost(uncached_ht))),
+        )
+        if n_variants == 0:
+            return ht.annotate(vep=cache_ht[ht.key].vep)
+    elif n_variants is None or cost_units is None:
+        n_variants, cost_units = uncached_ht.aggregate(
+            (hl.agg.count(), hl.agg.sum(vep_cost(uncached_ht))),
+        )
+
+    # Partitions and blocks are sized from the variants' estimated cost and
+    # the throughput recorded by previous runs.  VEP is timed over a
+    # checkpoint of its input, so that the recorded throughput excludes the
+    # work upstream of it.
+    plan = plan_vep(
+        n_variants,
+        cost_units,
+        historical_vep_seconds_per_cost_unit(reference_genome, dataset_type),
+    )
+    vep_input_ht, _ = checkpoint(uncached_ht.repartition(plan.n_partitions))
+    start = time.monotonic()
+    vep_ht, _ = checkpoint(
+        _vep(vep_input_ht, reference_genome, plan.block_size).select(
+            *vep_input_ht.row_value,
+            'vep',
+        ),
+    )
+    elapsed_s = time.monotonic() - start
+    seconds_per_cost_unit = (
+        observed_vep_seconds_per_cost_unit(elapsed_s, cost_units, plan.n_partitions)
+        if cost_units
+        else None
+    )
+    if seconds_per_cost_unit:
+        record_vep_seconds_per_cost_unit(
+            reference_genome,
+            dataset_type,
+            seconds_per_cost_unit,
+        )
+    if run_id is not None:
+        update_metadata_for_run(
+            reference_genome,
+            dataset_type,
+            run_id,
+            vep={
+                'variants': n_variants,
+                'cost_units': cost_units,
+                'partitions': plan.n_partitions,
+                'block_size': plan.block_size,
+                'elapsed_s': elapsed_s,
+                'seconds_per_cost_unit': seconds_per_cost_unit,
+            },
+        )
+    if use_cache:
+        # The misses are appended to the cache as a delta rather than
+        # rewriting the cache, which is compacted separately by
+        # compact_vep_cache.
+        write_cache_table_delta(
+            vep_ht.select('vep').select_globals(),
+            vep_cache_deltas_dir(reference_genome, dataset_type, config_hash),
+        )
+    # The annotated variants are returned with VEP's partitioning, rather
+    # than joined back onto `ht`.
+    if cache_ht is None:
+        return vep_ht
+    cached_ht = ht.semi_join(cache_ht)
+    return vep_ht.union(cached_ht.annotate(vep=cache_ht[cached_ht.key].vep))
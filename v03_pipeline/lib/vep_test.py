@@ -0,0 +1,177 @@
+from unittest.mock import Mock, patch
+
+import hail as hl
+import hailtop.fs as hfs
+
+from v03_pipeline.lib.core import DatasetType, ReferenceGenome
+from v03_pipeline.lib.misc.delta_tables import delta_table_paths
+from v03_pipeline.lib.paths import vep_cache_deltas_dir, vep_cache_table_path
+from v03_pipeline.lib.test.mocked_dataroot_testcase import MockedDatarootTestCase
+from v03_pipeline.lib.vep import (
+    VEP_THROUGHPUT_HISTORY_RUNS,
+    VEPPlan,
+    compact_vep_cache,
+    historical_vep_seconds_per_cost_unit,
+    plan_vep,
+    record_vep_seconds_per_cost_unit,
+    run_vep,
+    vep_cost,
+)
+from v03_pipeline.var.test.vep.mock_vep_data import MOCK_38_VEP_DATA
+
+
+def variants_ht(positions: list[int], alleles: list[str] | None = None) -> hl.Table:
+    return hl.Table.parallelize(
+        [
+            {
+                'locus': hl.Locus(
+                    contig='chr1',
+                    position=position,
+                    reference_genome=ReferenceGenome.GRCh38.value,
+                ),
+                'alleles': alleles or ['A', 'C'],
+            }
+            for position in positions
+        ],
+        hl.tstruct(
+            locus=hl.tlocus(ReferenceGenome.GRCh38.value),
+            alleles=hl.tarray(hl.tstr),
+        ),
+        key=['locus', 'alleles'],
+    )
+
+
+class VEPTest(MockedDatarootTestCase):
+    def test_vep_cost(self) -> None:
+        ht = variants_ht([100])
+        self.assertEqual(ht.aggregate(hl.agg.sum(vep_cost(ht))), 1.0)
+        ht = variants_ht([100], ['A', 'A' * 51])
+        self.assertAlmostEqual(ht.aggregate(hl.agg.sum(vep_cost(ht))), 3.02)
+
+    def test_plan_vep(self) -> None:
+        # Without history, 1000 SNVs fill a partition.
+        self.assertEqual(plan_vep(50000, 50000.0, None), VEPPlan(50, 1000))
+        self.assertEqual(plan_vep(100, 100.0, None), VEPPlan(10, 1000))
+        # Costlier variants are split into smaller blocks.
+        self.assertEqual(plan_vep(50000, 200000.0, None), VEPPlan(200, 250))
+        # Recorded throughput scales the partition size to the target runtime.
+        self.assertEqual(plan_vep(50000, 50000.0, 6.0), VEPPlan(500, 1000))
+        self.assertEqual(plan_vep(10**8, 10**8, 0.6), VEPPlan(10000, 1000))
+
+    def test_vep_throughput_history(self) -> None:
+        self.assertIsNone(
+            historical_vep_seconds_per_cost_unit(
+                ReferenceGenome.GRCh38,
+                DatasetType.SNV_INDEL,
+            ),
+        )
+        for seconds_per_cost_unit in [100.0, 1.0, 2.0, 3.0]:
+            record_vep_seconds_per_cost_unit(
+                ReferenceGenome.GRCh38,
+                DatasetType.SNV_INDEL,
+                seconds_per_cost_unit,
+            )
+        self.assertEqual(
+            historical_vep_seconds_per_cost_unit(
+                ReferenceGenome.GRCh38,
+                DatasetType.SNV_INDEL,
+            ),
+            2.5,
+        )
+        # Only the most recent runs are kept.
+        for _ in range(VEP_THROUGHPUT_HISTORY_RUNS):
+            record_vep_seconds_per_cost_unit(
+                ReferenceGenome.GRCh38,
+                DatasetType.SNV_INDEL,
+                1.0,
+            )
+        self.assertEqual(
+            historical_vep_seconds_per_cost_unit(
+                ReferenceGenome.GRCh38,
+                DatasetType.SNV_INDEL,
+            ),
+            1.0,
+        )
+
+    @patch('v03_pipeline.lib.vep.update_metadata_for_run')
+    @patch('v03_pipeline.lib.vep.hl.vep')
+    def test_run_vep_records_throughput(
+        self,
+        mock_vep: Mock,
+        mock_update_metadata_for_run: Mock,
+    ) -> None:
+        mock_vep.side_effect = lambda ht, **_: ht.annotate(vep=MOCK_38_VEP_DATA)
+        run_vep(
+            variants_ht([100, 200]),
+            DatasetType.SNV_INDEL,
+            ReferenceGenome.GRCh38,
+            n_variants=2,
+            cost_units=2.0,
+            run_id='manual__2024-04-03',
+        )
+        self.assertEqual(mock_vep.call_args.kwargs['block_size'], 1000)
+        vep_metrics = mock_update_metadata_for_run.call_args.kwargs['vep']
+        self.assertEqual(vep_metrics['variants'], 2)
+        self.assertEqual(vep_metrics['cost_units'], 2.0)
+        self.assertEqual(vep_metrics['partitions'], 10)
+        self.assertGreater(vep_metrics['seconds_per_cost_unit'], 0)
+
+    @patch('v03_pipeline.lib.vep.vep_config_hash')
+    @patch('v03_pipeline.lib.vep.hl.vep')
+    def test_run_vep_cache(
+        self,
+        mock_vep: Mock,
+        mock_vep_config_hash: Mock,
+    ) -> None:
+        mock_vep.side_effect = lambda ht, **_: ht.annotate(vep=MOCK_38_VEP_DATA)
+        mock_vep_config_hash.return_value = 'abc'
+        ht = run_vep(
+            variants_ht([100, 200]),
+            DatasetType.SNV_INDEL,
+            ReferenceGenome.GRCh38,
+            use_cache=True,
+        )
+        self.assertEqual(ht.aggregate(hl.agg.count_where(hl.is_defined(ht.vep))), 2)
+        deltas_dir = vep_cache_deltas_dir(
+            ReferenceGenome.GRCh38,
+            DatasetType.SNV_INDEL,
+            'abc',
+        )
+        self.assertEqual(len(delta_table_paths(deltas_dir)), 1)
+
+        # Only the variant missing from the cache is sent through VEP, and
+        # appended to the cache as another delta.
+        ht = run_vep(
+            variants_ht([100, 200, 300]),
+            DatasetType.SNV_INDEL,
+            ReferenceGenome.GRCh38,
+            use_cache=True,
+        )
+        self.assertEqual(mock_vep.call_args.args[0].count(), 1)
+        self.assertEqual(ht.aggregate(hl.agg.count_where(hl.is_defined(ht.vep))), 3)
+        self.assertEqual(len(delta_table_paths(deltas_dir)), 2)
+        self.assertEqual(hl.read_table(delta_table_paths(deltas_dir)[1]).count(), 1)
+
+        # A config change starts a new cache, and compaction removes the old.
+        mock_vep_config_hash.return_value = 'def'
+        ht = run_vep(
+            variants_ht([100]),
+            DatasetType.SNV_INDEL,
+            ReferenceGenome.GRCh38,
+            use_cache=True,
+        )
+        self.assertEqual(mock_vep.call_args.args[0].count(), 1)
+        with patch('v03_pipeline.lib.vep.Env') as mock_env:
+            mock_env.CACHE_TABLE_MAX_DELTAS = 1
+            compact_vep_cache(ReferenceGenome.GRCh38, DatasetType.SNV_INDEL)
+        self.assertFalse(hfs.exists(deltas_dir))
+        self.assertEqual(
+            hl.read_table(
+                vep_cache_table_path(
+                    ReferenceGenome.GRCh38,
+                    DatasetType.SNV_INDEL,
+                    'def',
+                ),
+            ).count(),
+            1,
+        )